@@ -0,0 +1,216 @@
+"""Benchmarks of the pyidh binding layer against the stub libidh.
+
+The stub (stub_libidh.c) implements include/idh/libidh.h with synthetic
+data and no OPC stack, so the times measured are the binding's own:
+marshalling, the ctypes call and result conversion.  It is built with the
+C compiler on first use and loaded through IDH_LIBRARY_PATH.
+
+    python benchmarks/bench.py                              # print results
+    python benchmarks/bench.py --save baseline.json
+    python benchmarks/bench.py --compare baseline.json
+    python benchmarks/bench.py --package-dir ../other/pyidh --save other.json
+
+--compare exits with status 1 when a case got slower than the baseline by
+more than --threshold.  Best times are compared, so both runs should come
+from the same machine (CI benchmarks the base and head of a pull request
+on one runner); --calibrated divides every time by a calibration loop
+measured in the same run, for a rough comparison across machines.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STUB_SOURCE = os.path.join(HERE, "stub_libidh.c")
+INCLUDE_DIR = os.path.join(HERE, "..", "..", "include")
+DEFAULT_SIZES = (10, 1000, 100000, 1000000)
+BASELINE_VERSION = 1
+
+# largest size per case by default; a 1M browse needs a 1GB item buffer
+CASE_MAX_SIZES = {"browse_source": 100000}
+
+
+def build_stub(build_dir):
+    """Compile the stub library unless it is up to date, return its path"""
+    if sys.platform.startswith("win"):
+        raise OSError("building the stub needs a POSIX C compiler; pass --library")
+    os.makedirs(build_dir, exist_ok=True)
+    library = os.path.join(build_dir, "libidh.so")
+    if os.path.exists(library) and os.path.getmtime(library) >= os.path.getmtime(STUB_SOURCE):
+        return library
+    command = [os.environ.get("CC", "cc"), "-O2", "-shared", "-fPIC", "-I", INCLUDE_DIR, STUB_SOURCE, "-o", library]
+    subprocess.run(command, check=True)
+    return library
+
+
+def measure(fn, min_time, min_runs=3, max_runs=1000):
+    """Run ``fn`` until ``min_time`` seconds and ``min_runs`` runs passed
+
+    Returns:
+        list: seconds of every run
+    """
+    times = []
+    total = 0.0
+    while len(times) < max_runs and (len(times) < min_runs or total < min_time):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        times.append(elapsed)
+        total += elapsed
+    return times
+
+
+def calibrate(repeat=20):
+    """Best time of a fixed pure Python + ctypes workload"""
+    import ctypes
+
+    def workload():
+        values = (ctypes.c_double * 20000)()
+        for i in range(20000):
+            values[i] = i * 0.5
+        return sum({"n": v}["n"] for v in values)
+
+    return min(measure(workload, 0.0, repeat, repeat))
+
+
+def make_cases(idh, source, size):
+    """name -> callable of one call at ``size`` items; setup is done here"""
+    from pyidh import IDH_DATATYPE, TagSet
+
+    tags = [
+        {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 2, "tag_name": f"Bench.Tag{i:07d}"}
+        for i in range(size)
+    ]
+    tagset = TagSet(tags)
+    group = idh.create_group(source, f"Bench{size}")
+    _, handles = idh.subscribe_group(group, tagset)
+    values = [float(i) for i in range(size)]
+    return {
+        "read_values": lambda: idh.read_values(source, tags),
+        "read_values_tagset": lambda: idh.read_values(source, tagset),
+        "subscribe_group": lambda: idh.subscribe_group(group, tags),
+        "read_group_values": lambda: idh.read_group_values(group, handles),
+        "write_group_values": lambda: idh.write_group_values(group, handles, values),
+        "browse_source": lambda: idh.browse_source(source, size, 2, f"Bench.{size}"),
+    }, group, handles
+
+
+def run(sizes, cases=None, min_time=0.5, unlimited=False, log=print):
+    """Run the benchmarks
+
+    Returns:
+        dict: baseline document (see --save)
+    """
+    from pyidh import IDHLibrary, IDH_RTSOURCE
+
+    # calibrated before and after, the best of both is kept
+    calibration = calibrate()
+    idh = IDHLibrary()
+    source = idh.create_source(IDH_RTSOURCE.IDH_RTSOURCE_UA.value, "opc.tcp://stub:4840/", 1000, 0)
+    results = {}
+    for size in sizes:
+        size_cases, group, handles = make_cases(idh, source, size)
+        for name, fn in size_cases.items():
+            if cases and name not in cases:
+                continue
+            if not unlimited and size > CASE_MAX_SIZES.get(name, size):
+                continue
+            times = measure(fn, min_time)
+            best = min(times)
+            results[f"{name}[{size}]"] = {
+                "case": name,
+                "size": size,
+                "runs": len(times),
+                "best_s": best,
+                "median_s": statistics.median(times),
+                "items_per_s": size / best if best else 0.0,
+            }
+            log(f"{name:<20} {size:>8} {best * 1e3:>12.3f} ms {size / best if best else 0:>14,.0f} items/s")
+        idh.unsubscribe_group(group, handles)
+        idh.destroy_group(group)
+    idh.destroy_source(source)
+    import numpy
+    return {
+        "version": BASELINE_VERSION,
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": numpy.__version__,
+            "calibration_s": min(calibration, calibrate()),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.25, calibrated=False, min_delta=1e-5, log=print):
+    """Compare the best times of two documents
+
+    Returns:
+        list: keys of the cases slower than baseline by more than
+        ``threshold`` and more than ``min_delta`` seconds
+    """
+    scale_current = current["meta"]["calibration_s"] if calibrated else 1.0
+    scale_baseline = baseline["meta"]["calibration_s"] if calibrated else 1.0
+    regressions = []
+    log(f"{'case':<32} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for key, result in current["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None:
+            log(f"{key:<32} {'-':>12} {result['best_s'] * 1e3:>10.3f}ms    new")
+            continue
+        ratio = (result["best_s"] / scale_current) / (reference["best_s"] / scale_baseline)
+        # microsecond cases jitter by more than any sensible ratio
+        flag = ratio > 1.0 + threshold and result["best_s"] - reference["best_s"] > min_delta
+        if flag:
+            regressions.append(key)
+        log(f"{key:<32} {reference['best_s'] * 1e3:>10.3f}ms {result['best_s'] * 1e3:>10.3f}ms {ratio:>7.2f}"
+            + ("  REGRESSION" if flag else ""))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pyidh binding against the stub libidh")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma separated item counts")
+    parser.add_argument("--cases", help="comma separated case names (default all)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds measured per case and size")
+    parser.add_argument("--unlimited", action="store_true", help="ignore the per case size limits")
+    parser.add_argument("--library", help="libidh to load (default: build the stub)")
+    parser.add_argument("--build-dir", default=os.path.join(HERE, "build"))
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="compare with a JSON baseline, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown ratio over the baseline")
+    parser.add_argument("--calibrated", action="store_true", help="compare times relative to the calibration loop")
+    parser.add_argument("--package-dir", default=os.path.join(HERE, ".."), help="directory holding the pyidh package")
+    args = parser.parse_args(argv)
+
+    os.environ["IDH_LIBRARY_PATH"] = args.library or os.environ.get("IDH_LIBRARY_PATH") or build_stub(args.build_dir)
+    sys.path.insert(0, os.path.abspath(args.package_dir))
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    cases = set(args.cases.split(",")) if args.cases else None
+    current = run(sizes, cases, args.min_time, args.unlimited)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("version") != BASELINE_VERSION:
+            parser.error(f"{args.compare} is not a version {BASELINE_VERSION} baseline")
+        regressions = compare(current, baseline, args.threshold, args.calibrated)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
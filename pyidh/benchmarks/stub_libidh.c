@@ -0,0 +1,122 @@
+/*
+ * Stub libidh for benchmarks and offline tests.
+ *
+ * Implements include/idh/libidh.h without any OPC stack and returns
+ * synthetic data, so the cost measured is the Python binding's:
+ *
+ * - sources and groups are always valid, handles count up;
+ * - readvalues returns strlen(tag_name) + i, good quality;
+ * - group subscribe returns handles 0x10000 + i, group readvalues
+ *   returns the handle as the value;
+ * - writes succeed;
+ * - browse of "Bench.<n>" returns n variables, any other node 25,
+ *   the root 3 objects.
+ *
+ * Build: cc -O2 -shared -fPIC -I../../include stub_libidh.c -o libidh.so
+ * (bench.py does this) and point IDH_LIBRARY_PATH at the result.
+ */
+#include "idh/libidh.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define STUB_CHILDREN 25
+#define STUB_ROOT_OBJECTS 3
+
+static int g_level = 2;
+static int g_cache = 100;
+static long long g_sources = 100;
+static long long g_groups = 1000;
+static uint64_t g_ts = 820000000000ULL;
+
+idh_handle_t idh_instance_create() { return 1; }
+void idh_instance_destroy(idh_handle_t h) {}
+int idh_set_log_level(ZLOG_LEVEL l) { g_level = l; return 0; }
+int idh_get_log_level(ZLOG_LEVEL* l) { *l = (ZLOG_LEVEL)g_level; return 0; }
+
+int idh_instance_discovery(idh_handle_t h, idh_source_desc_t* v, unsigned n, const char* host, uint16_t port) {
+    unsigned c = n < 2 ? n : 2;
+    for (unsigned i = 0; i < c; i++) {
+        snprintf(v[i].name, sizeof(v[i].name), "stub%u", i);
+        snprintf(v[i].schema, sizeof(v[i].schema), "opc.tcp://%s:%u/%u", host, port, i);
+    }
+    return (int)c;
+}
+
+idh_source_t idh_source_create(idh_handle_t h, IDH_RTSOURCE t, const char* s, int ms, unsigned f) { return ++g_sources; }
+int idh_source_valid(idh_source_t s) { return 1; }
+int idh_source_set_sync_cache_msec(idh_source_t s, int m) { g_cache = m; return 0; }
+int idh_source_get_sync_cache_msec(idh_source_t s) { return g_cache; }
+void idh_source_destroy(idh_source_t s) {}
+
+int idh_source_browse(idh_source_t s, idh_browse_item_t* items, unsigned* count, uint16_t ns, const char* parent) {
+    unsigned total = STUB_CHILDREN;
+    if (parent && strncmp(parent, "Bench.", 6) == 0)
+        total = (unsigned)strtoul(parent + 6, NULL, 10);
+    unsigned c = *count < total ? *count : total;
+    for (unsigned i = 0; i < c; i++) {
+        memset(&items[i], 0, sizeof(items[i]));
+        items[i].namespace_index = ns;
+        snprintf(items[i].node_name, sizeof(items[i].node_name), "%s.N%u", parent ? parent : "Root", i);
+        snprintf(items[i].display_name, sizeof(items[i].display_name), "N%u", i);
+        items[i].node_type = IDH_NODETYPE_VARIABLE;
+        items[i].data_type = IDH_DATATYPE_REAL;
+        items[i].is_readable = 1;
+        items[i].is_writable = 1;
+    }
+    *count = c;
+    return 0;
+}
+
+int idh_source_browse_root(idh_source_t s, idh_browse_item_t* items, unsigned* count) {
+    unsigned c = *count < STUB_ROOT_OBJECTS ? *count : STUB_ROOT_OBJECTS;
+    for (unsigned i = 0; i < c; i++) {
+        memset(&items[i], 0, sizeof(items[i]));
+        items[i].namespace_index = 2;
+        snprintf(items[i].node_name, sizeof(items[i].node_name), "Obj%u", i);
+        items[i].node_type = IDH_NODETYPE_OBJECT;
+        items[i].has_children = 1;
+    }
+    *count = c;
+    return 0;
+}
+
+int idh_source_readvalues(idh_source_t s, idh_real_t* v, const idh_tag_t* t, int n) {
+    for (int i = 0; i < n; i++) {
+        v[i].value = (double)strlen(t[i].tag_name) + i;
+        v[i].time_quality = idh_make_time_quality(0xC0, g_ts + i);
+    }
+    g_ts += 1000;
+    return 0;
+}
+
+int idh_source_writevalues(idh_source_t s, int* r, const double* v, const idh_tag_t* t, int n) {
+    for (int i = 0; i < n; i++) r[i] = 0;
+    return 0;
+}
+
+idh_group_t idh_group_create(idh_source_t h, const char* name) { return ++g_groups; }
+void idh_group_clear(idh_group_t g) {}
+
+int idh_group_subscribe(idh_group_t g, long long* hs, const idh_tag_t* t, unsigned n) {
+    for (unsigned i = 0; i < n; i++) hs[i] = 0x10000 + i;
+    return 0;
+}
+
+void idh_group_unsubscribe(idh_group_t g, const long long* hs, unsigned n) {}
+
+int idh_group_readvalues(idh_group_t g, idh_real_t* v, const long long* hs, unsigned n) {
+    for (unsigned i = 0; i < n; i++) {
+        v[i].value = (double)hs[i];
+        v[i].time_quality = idh_make_time_quality(0xC0, g_ts);
+    }
+    g_ts += 1000;
+    return 0;
+}
+
+int idh_group_writevalues(idh_group_t g, int* r, const double* v, const long long* hs, unsigned n) {
+    for (unsigned i = 0; i < n; i++) r[i] = 0;
+    return 0;
+}
+
+void idh_group_destroy(idh_group_t g) {}
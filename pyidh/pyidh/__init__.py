@@ -3,11 +3,83 @@ from .pyidh import (
     IDH_ERRCODE,
     IDH_DATATYPE,
     IDH_QUALITY,
+    IDH_NODETYPE,
     IDH_RTSOURCE,
     IDH_INVALID_HANDLE,
     idh_source_desc_t,
     idh_tag_t,
-    idh_real_t
+    idh_real_t,
+    TagSet
 )
+from .arrays import (
+    IDH_REAL_DTYPE,
+    as_numpy,
+    empty_values
+)
+from .group import (
+    GroupReader,
+    GroupWriter
+)
+from .sharding import ShardedGroup
+from .tuning import (
+    BatchTuner,
+    BatchedIO
+)
+from .aio import AsyncIDHLibrary
+from .coalesce import (
+    WriteCoalescer,
+    SingleFlightReader
+)
+from .metrics import (
+    IDHMetrics,
+    InstrumentedLib,
+    LatencyHistogram,
+    instrument,
+    uninstrument
+)
+from .profiling import CallProfiler
+from .replay import (
+    CaptureLib,
+    ReplayLib,
+    capture,
+    read_capture
+)
+from .simulation import (
+    SimulatedLib,
+    get_simulator
+)
+from .sources import (
+    SourceManager,
+    SourceLease,
+    ManagedGroup
+)
+from .poller import (
+    MultiSourcePoller,
+    PollResult,
+    PollSnapshot
+)
+from .scheduler import (
+    SampleScheduler,
+    SampleRecord
+)
+from .deadband import (
+    DeadbandFilter,
+    ChangeSet
+)
+from .history import RingHistory
+from .recorder import (
+    Recorder,
+    RecordReader
+)
+from .timeindex import HistoryIndex
+from .browse import (
+    BrowseItem,
+    BrowsePager
+)
+from .crawler import (
+    BrowseCrawler,
+    AddressSpace
+)
+from .catalog import TagCatalog
 
 __version__ = "0.1.0" 
\ No newline at end of file
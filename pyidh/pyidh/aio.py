@@ -0,0 +1,101 @@
+"""asyncio facade over IDHLibrary.
+
+libidh calls block (reads, browse and discovery can block for seconds on
+timeouts).  ctypes releases the GIL while a native function runs, so
+AsyncIDHLibrary runs them on a dedicated thread pool and many requests
+can be in flight at once without blocking the event loop.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .group import GroupReader
+from .pyidh import IDHLibrary
+
+
+def _async_method(name):
+    method = getattr(IDHLibrary, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self._run(getattr(self.idh, name), *args, **kwargs)
+
+    wrapper.__doc__ = f"Awaitable IDHLibrary.{name}"
+    return wrapper
+
+
+class AsyncIDHLibrary:
+    """Awaitable IDHLibrary; every call runs on the executor.
+
+    Args:
+        idh: IDHLibrary to wrap, a new one is created (and owned) if None
+        max_workers: size of the dedicated thread pool
+        executor: use this executor instead of creating one
+    """
+
+    def __init__(self, idh=None, max_workers=32, executor=None):
+        self._owns_idh = idh is None
+        self.idh = IDHLibrary() if idh is None else idh
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="idh")
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    discovery = _async_method("discovery")
+    create_source = _async_method("create_source")
+    is_source_valid = _async_method("is_source_valid")
+    set_sync_cache_msec = _async_method("set_sync_cache_msec")
+    get_sync_cache_msec = _async_method("get_sync_cache_msec")
+    destroy_source = _async_method("destroy_source")
+    read_values = _async_method("read_values")
+    write_values = _async_method("write_values")
+    create_group = _async_method("create_group")
+    clear_group = _async_method("clear_group")
+    subscribe_group = _async_method("subscribe_group")
+    unsubscribe_group = _async_method("unsubscribe_group")
+    read_group_values = _async_method("read_group_values")
+    write_group_values = _async_method("write_group_values")
+    destroy_group = _async_method("destroy_group")
+    browse_source = _async_method("browse_source")
+    browse_source_root = _async_method("browse_source_root")
+
+    async def iter_group_values(self, group, handles, interval, as_array=False):
+        """Read the group every ``interval`` seconds
+
+        Reads are scheduled on a fixed grid from the first read, a slow read
+        does not shift later ones.  The yielded buffer is reused two reads
+        later, copy it if it must outlive that.  ``interval`` must be
+        positive.
+
+        Yields:
+            tuple: (error code, idh_real_t array or NumPy view)
+        """
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        reader = GroupReader(self.idh, group, handles)
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            yield await self._run(reader.read, as_array)
+            next_time += interval
+            now = loop.time()
+            if next_time < now:
+                # overrun: skip the missed slots instead of bursting
+                next_time += (now - next_time) // interval * interval + interval
+            await asyncio.sleep(next_time - now)
+
+    async def close(self):
+        """Shut down the owned executor and IDH instance"""
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        if self._owns_idh:
+            self.idh.destroy()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
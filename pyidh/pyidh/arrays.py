@@ -0,0 +1,85 @@
+"""NumPy views over idh_real_t buffers returned by libidh.
+
+The structured dtype mirrors ``idh_real_t`` in ``include/idh/libidh.h``::
+
+    typedef struct _idh_real {
+        double value;
+        uint64_t time_quality;  // [55:48]=quality, [48:0]=timestamp(ms since 2000-01-01)
+    } idh_real_t;
+
+so a ctypes ``idh_real_t * n`` array can be viewed without copying.
+"""
+
+import ctypes
+
+import numpy as np
+
+from .pyidh import idh_real_t
+
+IDH_REAL_DTYPE = np.dtype([
+    ("value", "<f8"),
+    ("time_quality", "<u8"),
+])
+
+assert IDH_REAL_DTYPE.itemsize == ctypes.sizeof(idh_real_t)
+
+IDH_TQ_QUALITY_SHIFT = np.uint64(idh_real_t.IDH_TQ_QUALITY_SHIFT)
+IDH_TQ_TIME_MASK = np.uint64(idh_real_t.IDH_TQ_TIME_MASK)
+IDH_HIGH_MASK = np.uint8(0xC0)
+
+
+def as_numpy(values):
+    """View a ctypes ``idh_real_t`` array as a NumPy structured array.
+
+    No data is copied: the returned array shares memory with ``values`` and
+    keeps it alive through ``ndarray.base``.
+
+    Args:
+        values: ctypes array of idh_real_t (as returned by read_values)
+
+    Returns:
+        numpy.ndarray: structured array with ``value`` and ``time_quality`` fields
+    """
+    if isinstance(values, np.ndarray):
+        if values.dtype != IDH_REAL_DTYPE:
+            raise TypeError(f"values must have dtype {IDH_REAL_DTYPE}, got {values.dtype}")
+        return values
+    if not isinstance(values, ctypes.Array) or values._type_ is not idh_real_t:
+        raise TypeError("values must be a ctypes array of idh_real_t")
+    return np.frombuffer(values, dtype=IDH_REAL_DTYPE)
+
+
+def empty_values(count):
+    """Allocate a zeroed ``idh_real_t * count`` buffer and its NumPy view.
+
+    Returns:
+        tuple: (ctypes array, numpy view)
+    """
+    values = (idh_real_t * count)()
+    return values, np.frombuffer(values, dtype=IDH_REAL_DTYPE)
+
+
+def _time_quality(values):
+    if isinstance(values, np.ndarray) and values.dtype.names is None:
+        return values.astype(np.uint64, copy=False)
+    return as_numpy(values)["time_quality"]
+
+
+def get_quality(values):
+    """Quality byte of every value, as uint8 array"""
+    return (_time_quality(values) >> IDH_TQ_QUALITY_SHIFT).astype(np.uint8)
+
+
+def get_quality_high(values):
+    """High 2-bit quality class of every value (IDH_HIGH_*)"""
+    return get_quality(values) & IDH_HIGH_MASK
+
+
+def get_quality_low(values):
+    """Low 6-bit quality state of every value (IDH_LOW_*)"""
+    return get_quality(values) & ~IDH_HIGH_MASK
+
+
+def get_timestamp(values):
+    """Timestamp of every value (ms since 2000-01-01), as uint64 array"""
+    return _time_quality(values) & IDH_TQ_TIME_MASK
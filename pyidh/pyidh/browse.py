@@ -0,0 +1,175 @@
+"""Paged browsing with reused buffers and lazy item views.
+
+browse_source allocates ``idh_browse_item_t * max_items`` (about 1 KB per
+item) on every call and converts every item into a dict.  BrowsePager
+browses into a per-thread buffer that is reused between calls and grows
+when a listing fills it, and yields BrowseItem views that only decode the
+fields that are read.
+
+The C API has no continuation point: when a listing fills the buffer the
+folder is browsed again into a buffer twice as large, and the items already
+yielded (the same leading items of the listing) are skipped.
+"""
+
+import threading
+
+from .pyidh import IDH_DATATYPE, IDH_ERRCODE, IDH_NODETYPE, idh_browse_item_t
+
+_NODE_TYPES = IDH_NODETYPE._value2member_map_
+_DATA_TYPES = IDH_DATATYPE._value2member_map_
+
+BROWSE_FIELDS = (
+    'namespace_index', 'node_name', 'display_name', 'description', 'node_type',
+    'data_type', 'is_readable', 'is_writable', 'has_children',
+)
+
+# largest buffer kept per thread between browses (about 4 MB)
+KEEP_BUFFER_ITEMS = 4096
+
+_local = threading.local()
+
+
+def _take_buffer(capacity):
+    """Check out this thread's browse buffer, at least ``capacity`` items"""
+    buffer = getattr(_local, "buffer", None)
+    _local.buffer = None
+    if buffer is None or len(buffer) < capacity:
+        buffer = (idh_browse_item_t * capacity)()
+    return buffer
+
+
+def _give_buffer(buffer):
+    if len(buffer) > KEEP_BUFFER_ITEMS:
+        return
+    current = getattr(_local, "buffer", None)
+    if current is None or len(current) < len(buffer):
+        _local.buffer = buffer
+
+
+class BrowseItem:
+    """View of one idh_browse_item_t in a browse buffer
+
+    Strings are decoded on access.  The view reads the buffer it was
+    yielded from: it is only valid until the next browse on the same
+    thread, use to_dict() to keep an item.  ``item["node_name"]`` works
+    like the dicts returned by browse_source.
+    """
+
+    __slots__ = ("_item",)
+
+    def __init__(self, item):
+        self._item = item
+
+    @property
+    def namespace_index(self):
+        return self._item.namespace_index
+
+    @property
+    def node_name(self):
+        return self._item.node_name.decode('utf-8')
+
+    @property
+    def display_name(self):
+        return self._item.display_name.decode('utf-8')
+
+    @property
+    def description(self):
+        return self._item.description.decode('utf-8')
+
+    @property
+    def node_type(self):
+        value = self._item.node_type
+        return _NODE_TYPES.get(value, value)
+
+    @property
+    def data_type(self):
+        value = self._item.data_type
+        return _DATA_TYPES.get(value, value)
+
+    @property
+    def is_readable(self):
+        return bool(self._item.is_readable)
+
+    @property
+    def is_writable(self):
+        return bool(self._item.is_writable)
+
+    @property
+    def has_children(self):
+        return bool(self._item.has_children)
+
+    def __getitem__(self, key):
+        if key not in BROWSE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        """Same dict as browse_source returns for the item"""
+        return {key: getattr(self, key) for key in BROWSE_FIELDS}
+
+    def __repr__(self):
+        return f"BrowseItem({self.namespace_index}, {self.node_name!r})"
+
+
+class BrowsePager:
+    """Iterates over the children of one node, see IDHLibrary.iter_browse
+
+    After the iteration ``result`` holds the error code of the last browse
+    call (IDH_ERROR_EXCDLEN if the listing still filled ``max_items``) and
+    ``count`` the number of items yielded.
+
+    Args:
+        idh: IDHLibrary
+        source: source handle
+        parent_namespace_index, parent_node_name: node to browse; ``root=True``
+            browses the root instead
+        page_items: initial buffer size in items
+        max_items: the buffer does not grow beyond this many items
+    """
+
+    def __init__(self, idh, source, parent_namespace_index=0, parent_node_name=None, root=False,
+                 page_items=256, max_items=1 << 16):
+        self.idh = idh
+        self.source = source
+        self.parent_namespace_index = parent_namespace_index
+        self.parent_node_name = parent_node_name
+        self.root = root
+        self.page_items = max(1, min(page_items, max_items))
+        self.max_items = max_items
+        self.result = None
+        self.count = 0
+
+    def _browse(self, buffer, capacity):
+        if self.root:
+            return self.idh.browse_root_into(self.source, buffer, capacity)
+        return self.idh.browse_into(self.source, buffer, capacity,
+                                    self.parent_namespace_index, self.parent_node_name)
+
+    def __iter__(self):
+        capacity = self.page_items
+        buffer = _take_buffer(capacity)
+        self.count = 0
+        try:
+            while True:
+                # a reused buffer may be larger than the page: use all of it
+                capacity = min(max(capacity, len(buffer)), self.max_items)
+                self.result, filled = self._browse(buffer, capacity)
+                needed = filled
+                if self.result < IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value:
+                    if self.result != IDH_ERRCODE.IDH_ERROR_EXCDLEN.value:
+                        return
+                    # truncated; the count may tell how many items there are
+                    filled = capacity
+                filled = min(filled, capacity)
+                for index in range(self.count, filled):
+                    yield BrowseItem(buffer[index])
+                self.count = max(self.count, filled)
+                if filled < capacity:
+                    return
+                if capacity >= self.max_items:
+                    self.result = IDH_ERRCODE.IDH_ERROR_EXCDLEN.value
+                    return
+                capacity = min(max(capacity * 2, needed), self.max_items)
+                buffer = (idh_browse_item_t * capacity)()
+        finally:
+            _give_buffer(buffer)
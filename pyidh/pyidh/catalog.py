@@ -0,0 +1,219 @@
+"""Local tag catalog with indexed substring search over browse metadata.
+
+TagCatalog stores browse items (from iter_browse, browse_source or a
+crawled AddressSpace) in SQLite.  Substring search over node_name,
+display_name and description uses an FTS5 trigram index, so a lookup in
+hundreds of thousands of nodes does not scan them; search terms shorter
+than three characters, and SQLite builds without FTS5 trigram support,
+fall back to LIKE.  Matches come back as tag specs ready for
+subscribe_group / read_values, or as a TagSet.
+"""
+
+import sqlite3
+import threading
+
+from .pyidh import IDH_DATATYPE, IDH_NODETYPE, TagSet
+
+SEARCH_FIELDS = ("node_name", "display_name", "description")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    namespace_index INTEGER NOT NULL,
+    node_name TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    node_type INTEGER NOT NULL,
+    data_type INTEGER NOT NULL,
+    is_readable INTEGER NOT NULL,
+    is_writable INTEGER NOT NULL,
+    has_children INTEGER NOT NULL,
+    UNIQUE (source, namespace_index, node_name)
+);
+"""
+
+# the triggers keep the index in sync with small loads; big loads switch
+# them off (fts_state.bulk) and rebuild the index in one pass instead
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS nodes_fts USING fts5(
+    node_name, display_name, description, content='nodes', content_rowid='id', tokenize='trigram'
+);
+CREATE TABLE IF NOT EXISTS fts_state (bulk INTEGER NOT NULL);
+INSERT INTO fts_state SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM fts_state);
+CREATE TRIGGER IF NOT EXISTS nodes_ai AFTER INSERT ON nodes WHEN NOT (SELECT bulk FROM fts_state) BEGIN
+    INSERT INTO nodes_fts(rowid, node_name, display_name, description)
+    VALUES (new.id, new.node_name, new.display_name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS nodes_ad AFTER DELETE ON nodes WHEN NOT (SELECT bulk FROM fts_state) BEGIN
+    INSERT INTO nodes_fts(nodes_fts, rowid, node_name, display_name, description)
+    VALUES ('delete', old.id, old.node_name, old.display_name, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS nodes_au AFTER UPDATE ON nodes WHEN NOT (SELECT bulk FROM fts_state) BEGIN
+    INSERT INTO nodes_fts(nodes_fts, rowid, node_name, display_name, description)
+    VALUES ('delete', old.id, old.node_name, old.display_name, old.description);
+    INSERT INTO nodes_fts(rowid, node_name, display_name, description)
+    VALUES (new.id, new.node_name, new.display_name, new.description);
+END;
+"""
+
+# loads of at least this many items rebuild the index instead of updating it
+BULK_LOAD_ITEMS = 10000
+
+_COLUMNS = ("source", "namespace_index", "node_name", "display_name", "description",
+            "node_type", "data_type", "is_readable", "is_writable", "has_children")
+
+_UPSERT = (
+    f"INSERT INTO nodes ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))}) "
+    "ON CONFLICT (source, namespace_index, node_name) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in _COLUMNS[3:])
+)
+
+
+def _value(x):
+    return getattr(x, "value", x)
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class TagCatalog:
+    """SQLite catalog of browsed nodes, searchable by substring
+
+    Args:
+        path: database file, ":memory:" (default) for an in-memory catalog
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        try:
+            self._db.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # no FTS5 or no trigram tokenizer (SQLite < 3.34)
+            self.fts = False
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def load(self, items, source=""):
+        """Add or update browse items
+
+        Args:
+            items: browse item dicts, BrowseItem views or AddressSpace nodes
+            source: name of the source the items belong to, e.g. its schema
+
+        Returns:
+            int: number of items stored
+        """
+        rows = [
+            (source, item["namespace_index"], item["node_name"], item["display_name"], item["description"],
+             _value(item["node_type"]), _value(item["data_type"]), int(item["is_readable"]),
+             int(item["is_writable"]), int(item["has_children"]))
+            for item in items
+        ]
+        bulk = self.fts and len(rows) >= BULK_LOAD_ITEMS
+        with self._lock, self._db:
+            if bulk:
+                self._db.execute("UPDATE fts_state SET bulk = 1")
+            self._db.executemany(_UPSERT, rows)
+            if bulk:
+                self._db.execute("INSERT INTO nodes_fts(nodes_fts) VALUES ('rebuild')")
+                self._db.execute("UPDATE fts_state SET bulk = 0")
+        return len(rows)
+
+    def load_space(self, space):
+        """Add the nodes of a crawled AddressSpace, under its schema"""
+        return self.load(space.nodes.values(), source=space.schema)
+
+    def remove_source(self, source):
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM nodes WHERE source = ?", (source,)).rowcount
+
+    def _query(self, text, fields, node_types, data_type, readable, writable, source, limit):
+        fields = tuple(fields or SEARCH_FIELDS)
+        for field in fields:
+            if field not in SEARCH_FIELDS:
+                raise ValueError(f"unknown search field: {field}")
+        where, params = [], []
+        join = ""
+        if text:
+            if self.fts and len(text) >= 3:
+                phrase = '"' + text.replace('"', '""') + '"'
+                join = "JOIN nodes_fts ON nodes_fts.rowid = nodes.id"
+                where.append("nodes_fts MATCH ?")
+                params.append("{" + " ".join(fields) + "}: " + phrase)
+            else:
+                pattern = "%" + _escape_like(text) + "%"
+                where.append("(" + " OR ".join(f"nodes.{f} LIKE ? ESCAPE '\\'" for f in fields) + ")")
+                params.extend([pattern] * len(fields))
+        if node_types is not None:
+            node_types = [_value(t) for t in node_types]
+            where.append(f"nodes.node_type IN ({', '.join('?' * len(node_types))})")
+            params.extend(node_types)
+        for column, wanted in (("data_type", data_type), ("is_readable", readable), ("is_writable", writable),
+                               ("source", source)):
+            if wanted is not None:
+                where.append(f"nodes.{column} = ?")
+                params.append(_value(wanted) if column == "data_type" else wanted)
+        sql = f"SELECT {', '.join('nodes.' + c for c in _COLUMNS)} FROM nodes {join}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY nodes.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def find(self, text=None, fields=None, node_types=None, data_type=None, readable=None, writable=None,
+             source=None, limit=1000):
+        """Nodes whose fields contain ``text`` (case-insensitive for ASCII)
+
+        Args:
+            text: substring to look for, None to match every node
+            fields: subset of SEARCH_FIELDS searched, default all of them
+            node_types: IDH_NODETYPE members or values to keep, None for all
+            data_type, readable, writable, source: exact filters, None for any
+            limit: most rows returned, None for no limit
+
+        Returns:
+            list: node dicts (the browse item fields plus ``source``)
+        """
+        rows = self._query(text, fields, node_types, data_type, readable, writable, source, limit)
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def search(self, text=None, fields=None, data_type=None, writable=None, source=None, limit=1000):
+        """Readable variables matching ``text`` as tag specs
+
+        Returns:
+            list: [{"data_type", "namespace_index", "tag_name"}], ready for
+            subscribe_group / read_values; variables of unknown data type
+            are returned as IDH_DATATYPE_REAL
+        """
+        rows = self._query(text, fields, (IDH_NODETYPE.IDH_NODETYPE_VARIABLE,), data_type, True, writable,
+                           source, limit)
+        real = IDH_DATATYPE.IDH_DATATYPE_REAL.value
+        return [
+            {"data_type": row[6] or real, "namespace_index": row[1], "tag_name": row[2]}
+            for row in rows
+        ]
+
+    def search_tagset(self, text=None, **kwargs):
+        """Like search, as a TagSet"""
+        return TagSet(self.search(text, **kwargs))
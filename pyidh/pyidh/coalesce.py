@@ -0,0 +1,287 @@
+"""Coalescing of concurrent writes and reads.
+
+Producers call WriteCoalescer.write() from any thread; writes are queued
+per group, a later write to the same handle replaces the queued value
+(last write wins), and a background thread writes each group with one
+write_group_values call when its oldest queued write is ``interval``
+seconds old or ``max_pending`` handles are queued.  Every write gets a
+Future resolving to the result code of its handle; the futures of
+replaced writes resolve with the result of the value actually written.
+
+SingleFlightReader does the same for read_values: concurrent reads of one
+source arriving within ``window`` seconds are merged into one
+deduplicated native read, and a read whose tags are all part of a read
+already in flight waits for that read instead of making its own.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from ctypes import c_double, c_int
+
+import numpy as np
+
+from .arrays import IDH_REAL_DTYPE, as_numpy
+from .pyidh import TagSet, idh_real_t, make_handle_array
+
+
+class _Pending:
+    __slots__ = ("since", "values", "futures")
+
+    def __init__(self, since):
+        self.since = since
+        # handle -> value, in first-write order
+        self.values = {}
+        # handle -> futures waiting for that handle
+        self.futures = {}
+
+
+class WriteCoalescer:
+    """Coalesces writes per group into batched write_group_values calls
+
+    Args:
+        idh: IDHLibrary
+        interval: seconds a write may wait for others to join its batch
+        max_pending: handles queued for one group that trigger a flush
+    """
+
+    def __init__(self, idh, interval=0.005, max_pending=1000):
+        self.idh = idh
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._cond = threading.Condition()
+        # serializes native writes, see _flush()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.writes = 0
+        self._thread = threading.Thread(target=self._run, name="idh-coalescer", daemon=True)
+        self._thread.start()
+
+    def write(self, group, handle, value):
+        """Queue one value
+
+        Returns:
+            concurrent.futures.Future: resolves to the handle's result code
+            (or raises what the write raised)
+        """
+        return self.write_many(group, (handle,), (value,))[0]
+
+    def write_many(self, group, handles, values):
+        """Queue several values of one group
+
+        Returns:
+            list: one Future per handle
+        """
+        futures = [Future() for _ in handles]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteCoalescer is closed")
+            pending = self._pending.get(group)
+            if pending is None:
+                pending = self._pending[group] = _Pending(time.monotonic())
+            for handle, value, future in zip(handles, values, futures):
+                handle = int(handle)
+                pending.values[handle] = float(value)
+                pending.futures.setdefault(handle, []).append(future)
+            self.writes += len(futures)
+            if len(pending.values) >= self.max_pending or len(self._pending) == 1:
+                self._cond.notify()
+        return futures
+
+    def _due(self, pending, now):
+        return len(pending.values) >= self.max_pending or now - pending.since >= self.interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        if not self._pending:
+                            return
+                        break
+                    now = time.monotonic()
+                    if any(self._due(p, now) for p in self._pending.values()):
+                        break
+                    deadline = min((p.since + self.interval for p in self._pending.values()), default=None)
+                    self._cond.wait(None if deadline is None else max(0.0, deadline - now))
+            self._flush(self._closed)
+
+    def _flush(self, force):
+        # batches are taken and written under one lock, so two batches of
+        # a group can never be written out of order
+        with self._write_lock:
+            with self._cond:
+                now = time.monotonic()
+                due = [g for g, p in self._pending.items() if force or self._due(p, now)]
+                batches = [(g, self._pending.pop(g)) for g in due]
+            for group, pending in batches:
+                if self._write(group, pending):
+                    self.batches += 1
+
+    def _write(self, group, pending):
+        """Write one batch and settle its futures; False if the write raised"""
+        count = len(pending.values)
+        results = (c_int * count)()
+        try:
+            handles_array, _ = make_handle_array(list(pending.values))
+            values_array = (c_double * count)()
+            np.frombuffer(values_array, dtype=np.float64)[:] = list(pending.values.values())
+            result = self.idh.write_group_values_from(group, handles_array, values_array, results, count)
+        except Exception as e:
+            for futures in pending.futures.values():
+                for future in futures:
+                    # skipped if the producer cancelled it
+                    if future.set_running_or_notify_cancel():
+                        future.set_exception(e)
+            return False
+        for code, futures in zip(results, pending.futures.values()):
+            # a call-level failure with untouched per-handle codes fails every handle
+            code = result if result < 0 and code == 0 else code
+            for future in futures:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(code)
+        return True
+
+    def flush(self):
+        """Write everything queued now, from the calling thread"""
+        self._flush(True)
+
+    def close(self):
+        """Write what is queued and stop the background thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _tag_keys(tags):
+    if isinstance(tags, TagSet):
+        return list(zip(tags.namespace_indexes, tags.tag_names, tags.data_types))
+    return [(tag['namespace_index'], tag['tag_name'], tag['data_type']) for tag in tags]
+
+
+class _Flight:
+    __slots__ = ("index", "callers", "done", "result", "values", "error")
+
+    def __init__(self):
+        # (namespace_index, tag_name, data_type) -> position in the native read
+        self.index = {}
+        self.callers = 0
+        self.done = threading.Event()
+        self.result = None
+        self.values = None
+        self.error = None
+
+
+class SingleFlightReader:
+    """Merges concurrent read_values calls of a source into one native read
+
+    The first caller of a batch waits ``window`` seconds (or until
+    ``max_tags`` distinct tags joined) for others, then reads the union of
+    their tags once; every caller gets its own values in its own order.
+
+    Args:
+        idh: IDHLibrary
+        window: seconds the first caller waits for others to join
+        max_tags: distinct tags that close a batch early
+    """
+
+    def __init__(self, idh, window=0.002, max_tags=10000):
+        self.idh = idh
+        self.window = window
+        self.max_tags = max_tags
+        self._pending = {}
+        self._inflight = {}
+        self._cond = threading.Condition()
+        self.requests = 0
+        self.native_calls = 0
+        self.merged_calls = 0
+        self.tags_requested = 0
+        self.tags_read = 0
+
+    def read_values(self, source, tags, as_array=False):
+        """Same as IDHLibrary.read_values, possibly served by a shared read
+
+        Returns:
+            tuple: (error code of the shared read, idh_real_t array or NumPy view)
+        """
+        keys = _tag_keys(tags)
+        with self._cond:
+            self.requests += 1
+            self.tags_requested += len(keys)
+            flight = self._inflight.get(source)
+            leader = False
+            if flight is None or not all(key in flight.index for key in keys):
+                flight = self._pending.get(source)
+                leader = flight is None
+                if leader:
+                    flight = self._pending[source] = _Flight()
+                index = flight.index
+                for key in keys:
+                    index.setdefault(key, len(index))
+                if len(index) >= self.max_tags:
+                    self._cond.notify_all()
+            flight.callers += 1
+            positions = [flight.index[key] for key in keys]
+            if leader:
+                deadline = time.monotonic() + self.window
+                while len(flight.index) < self.max_tags:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                del self._pending[source]
+                self._inflight[source] = flight
+        if leader:
+            self._read(source, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        values = (idh_real_t * len(positions))()
+        if positions:
+            np.frombuffer(values, dtype=IDH_REAL_DTYPE)[:] = flight.values[positions]
+        return flight.result, (as_numpy(values) if as_array else values)
+
+    def _read(self, source, flight):
+        count = len(flight.index)
+        namespace_indexes, tag_names, data_types = zip(*flight.index) if count else ((), (), ())
+        values = (idh_real_t * count)()
+        try:
+            tagset = TagSet.from_columns(data_types, namespace_indexes, tag_names)
+            flight.result = self.idh.read_values_into(source, tagset.tag_array, values, count)
+            flight.values = np.frombuffer(values, dtype=IDH_REAL_DTYPE) if count else \
+                np.zeros(0, dtype=IDH_REAL_DTYPE)
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._cond:
+                if self._inflight.get(source) is flight:
+                    del self._inflight[source]
+                self.native_calls += 1
+                self.tags_read += count
+                if flight.callers > 1:
+                    self.merged_calls += 1
+            flight.done.set()
+
+    def stats(self):
+        """dict: requests, native_calls, merged_calls (native reads shared by
+        several callers), hit_rate (share of requests served by another
+        caller's read), tags_requested, tags_read"""
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "native_calls": self.native_calls,
+                "merged_calls": self.merged_calls,
+                "hit_rate": 1.0 - self.native_calls / self.requests if self.requests else 0.0,
+                "tags_requested": self.tags_requested,
+                "tags_read": self.tags_read,
+            }
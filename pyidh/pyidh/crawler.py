@@ -0,0 +1,343 @@
+"""Parallel recursive browse crawler with an on-disk address-space cache.
+
+BrowseCrawler walks the nodes that have children breadth-first, browsing
+each level on a bounded thread pool.  The resulting AddressSpace can be
+saved to and loaded from a cache file keyed by the source schema, and
+refreshed incrementally: only containers whose listing is stale are
+browsed again, and only subtrees that appeared are crawled.
+"""
+
+import hashlib
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .pyidh import IDH_DATATYPE, IDH_ERRCODE, IDH_NODETYPE
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".idhtree.npz"
+
+ROOT = None
+
+
+def node_key(node):
+    return (node["namespace_index"], node["node_name"])
+
+
+def _plain(item, parent, depth):
+    """Browse item (dict with enums) -> plain node dict"""
+    node_type = item["node_type"]
+    data_type = item["data_type"]
+    return {
+        "namespace_index": item["namespace_index"],
+        "node_name": item["node_name"],
+        "display_name": item["display_name"],
+        "description": item["description"],
+        "node_type": getattr(node_type, "value", node_type),
+        "data_type": getattr(data_type, "value", data_type),
+        "is_readable": bool(item["is_readable"]),
+        "is_writable": bool(item["is_writable"]),
+        "has_children": bool(item["has_children"]),
+        "parent": parent,
+        "depth": depth,
+    }
+
+
+class AddressSpace:
+    """Browsed tree of one source
+
+    nodes: dict (namespace_index, node_name) -> node dict
+    children: dict parent key (ROOT for the root) -> list of child keys
+    browsed: dict container key -> time.time() of its last browse
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.nodes = {}
+        self.children = {}
+        self.browsed = {}
+        self.errors = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes.values())
+
+    def walk(self, key=ROOT):
+        """Nodes below ``key``, breadth-first, each once"""
+        seen = {key}
+        queue = list(self.children.get(key, ()))
+        while queue:
+            next_level = []
+            for child in queue:
+                if child in seen:
+                    continue
+                seen.add(child)
+                node = self.nodes.get(child)
+                if node is not None:
+                    yield node
+                next_level.extend(self.children.get(child, ()))
+            queue = next_level
+
+    def tags(self, node_types=None, data_type=IDH_DATATYPE.IDH_DATATYPE_REAL.value):
+        """Readable variables as tag dicts, ready for subscribe_group
+
+        Args:
+            node_types: node types to include (IDH_NODETYPE values), default variables
+        """
+        node_types = {IDH_NODETYPE.IDH_NODETYPE_VARIABLE.value} if node_types is None else {getattr(t, "value", t) for t in node_types}
+        return [
+            {"data_type": data_type, "namespace_index": node["namespace_index"], "tag_name": node["node_name"]}
+            for node in self.nodes.values()
+            if node["node_type"] in node_types and node["is_readable"]
+        ]
+
+    def remove_subtree(self, key):
+        """Forget everything below ``key`` (the node itself is kept)"""
+        for child in self.children.pop(key, ()):
+            self.remove_subtree(child)
+            self.nodes.pop(child, None)
+        self.browsed.pop(key, None)
+
+    def _rows(self):
+        """Nodes in breadth-first order, so children lists can be rebuilt from parents"""
+        return list(self.walk())
+
+    def to_arrays(self):
+        """Columnar form of the tree, see AddressSpaceCache"""
+        nodes = self._rows()
+        rows = {node_key(node): i for i, node in enumerate(nodes)}
+        rows[ROOT] = -1
+
+        def blob(field):
+            return np.frombuffer("\0".join(node[field] for node in nodes).encode("utf-8"), dtype=np.uint8)
+
+        browsed = [(rows[key], t) for key, t in self.browsed.items() if key in rows]
+        return {
+            "version": np.array(CACHE_VERSION),
+            "schema": np.frombuffer(self.schema.encode("utf-8"), dtype=np.uint8),
+            "count": np.array(len(nodes)),
+            "namespace_index": np.array([n["namespace_index"] for n in nodes], dtype=np.int32),
+            "node_name": blob("node_name"),
+            "display_name": blob("display_name"),
+            "description": blob("description"),
+            "node_type": np.array([n["node_type"] for n in nodes], dtype=np.int32),
+            "data_type": np.array([n["data_type"] for n in nodes], dtype=np.int32),
+            "flags": np.array([n["is_readable"] | n["is_writable"] << 1 | n["has_children"] << 2 for n in nodes],
+                              dtype=np.uint8),
+            "parent": np.array([rows[n["parent"]] for n in nodes], dtype=np.int64),
+            "depth": np.array([n["depth"] for n in nodes], dtype=np.int32),
+            "browsed_rows": np.array([r for r, _ in browsed], dtype=np.int64),
+            "browsed_times": np.array([t for _, t in browsed], dtype=np.float64),
+        }
+
+    @classmethod
+    def from_arrays(cls, data):
+        if int(data["version"]) != CACHE_VERSION:
+            raise ValueError("unsupported address space cache")
+        space = cls(data["schema"].tobytes().decode("utf-8"))
+        count = int(data["count"])
+
+        def strings(field):
+            return data[field].tobytes().decode("utf-8").split("\0") if count else []
+
+        namespaces = data["namespace_index"].tolist()
+        names = strings("node_name")
+        keys = list(zip(namespaces, names))
+        flags = data["flags"]
+        parents = [keys[p] if p >= 0 else ROOT for p in data["parent"].tolist()]
+        columns = zip(namespaces, names, strings("display_name"), strings("description"),
+                      data["node_type"].tolist(), data["data_type"].tolist(), (flags & 1).astype(bool).tolist(),
+                      (flags & 2).astype(bool).tolist(), (flags & 4).astype(bool).tolist(), parents,
+                      data["depth"].tolist())
+        space.nodes = {
+            key: {
+                "namespace_index": ns, "node_name": name, "display_name": display, "description": desc,
+                "node_type": node_type, "data_type": data_type, "is_readable": readable,
+                "is_writable": writable, "has_children": has_children, "parent": parent, "depth": depth,
+            }
+            for key, (ns, name, display, desc, node_type, data_type, readable, writable, has_children,
+                      parent, depth) in zip(keys, columns)
+        }
+        children = space.children
+        for key, parent in zip(keys, parents):
+            children.setdefault(parent, []).append(key)
+        for row, t in zip(data["browsed_rows"].tolist(), data["browsed_times"].tolist()):
+            key = keys[row] if row >= 0 else ROOT
+            space.browsed[key] = t
+            children.setdefault(key, [])
+        return space
+
+
+class AddressSpaceCache:
+    """Directory of address-space cache files, one per source schema
+
+    A tree is saved as ``<sha1 of schema>.idhtree.npz``: one array per node
+    field, strings as NUL-separated UTF-8, parents as row numbers.  Loading
+    is a few bulk conversions instead of parsing every node.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, schema):
+        digest = hashlib.sha1(schema.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + CACHE_SUFFIX)
+
+    def load(self, schema):
+        """Cached AddressSpace of ``schema``, or None (also for a corrupt file)"""
+        try:
+            with np.load(self.path(schema)) as data:
+                space = AddressSpace.from_arrays(data)
+        except (FileNotFoundError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+        return space if space.schema == schema else None
+
+    def save(self, space):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(space.schema)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **space.to_arrays())
+        os.replace(tmp, path)
+
+
+class BrowseCrawler:
+    """Breadth-first crawler over one source
+
+    Args:
+        idh: IDHLibrary
+        source: source handle
+        schema: source schema, the cache key
+        max_workers: concurrent browse calls
+        max_depth: deepest level browsed (root items are depth 0), None for no limit
+        node_types: node types kept in the result (IDH_NODETYPE or values);
+            containers are still descended into when filtered out
+        max_items: most children read per node (see IDHLibrary.iter_browse)
+        cache: AddressSpaceCache, or a directory for one
+    """
+
+    def __init__(self, idh, source, schema, max_workers=8, max_depth=None, node_types=None,
+                 max_items=1 << 16, cache=None):
+        self.idh = idh
+        self.source = source
+        self.schema = schema
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.node_types = None if node_types is None else {getattr(t, "value", t) for t in node_types}
+        self.max_items = max_items
+        self.cache = AddressSpaceCache(cache) if isinstance(cache, str) else cache
+
+    def _browse(self, key):
+        if key is ROOT:
+            pager = self.idh.iter_browse_root(self.source, max_items=self.max_items)
+        else:
+            pager = self.idh.iter_browse(self.source, key[0], key[1], max_items=self.max_items)
+        # the item views only live until the next browse on this thread
+        items = [item.to_dict() for item in pager]
+        return pager.result, items
+
+    def _browse_level(self, executor, space, keys):
+        """Browse ``keys`` in parallel, store their children, return new containers"""
+        next_level = []
+        queued = set()
+        for key, (result, items) in zip(keys, executor.map(self._browse, keys)):
+            if result < IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value:
+                space.errors[key] = result
+                # a listing cut at max_items is still stored
+                if not items:
+                    continue
+            parent = space.nodes.get(key)
+            depth = 0 if parent is None else parent["depth"] + 1
+            child_keys = []
+            for item in items:
+                node = _plain(item, key, depth)
+                child = node_key(node)
+                child_keys.append(child)
+                space.nodes[child] = node
+                # nodes reachable through several parents are browsed once
+                if node["has_children"] and (self.max_depth is None or depth < self.max_depth) \
+                        and child not in space.children and child not in queued:
+                    queued.add(child)
+                    next_level.append(child)
+            space.children[key] = child_keys
+            space.browsed[key] = time.time()
+        return next_level
+
+    def _crawl_from(self, space, keys):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="idh-browse") as executor:
+            level = list(keys)
+            while level:
+                level = self._browse_level(executor, space, level)
+
+    def _filter(self, space):
+        if self.node_types is None:
+            return space
+        dropped = {k for k, n in space.nodes.items() if n["node_type"] not in self.node_types and not n["has_children"]}
+        if dropped:
+            for key in dropped:
+                del space.nodes[key]
+            for key, children in space.children.items():
+                space.children[key] = [c for c in children if c not in dropped]
+        return space
+
+    def crawl(self, use_cache=True):
+        """Crawl the whole address space, or load it from the cache
+
+        Returns:
+            AddressSpace
+        """
+        if use_cache and self.cache is not None:
+            space = self.cache.load(self.schema)
+            if space is not None:
+                return space
+        space = AddressSpace(self.schema)
+        self._crawl_from(space, [ROOT])
+        self._filter(space)
+        if self.cache is not None:
+            self.cache.save(space)
+        return space
+
+    def refresh(self, space, subtrees=None, max_age=None):
+        """Re-browse part of a crawled address space in place
+
+        Args:
+            space: AddressSpace from crawl()
+            subtrees: container keys (namespace_index, node_name) to crawl
+                again completely; ROOT for everything
+            max_age: browse again the containers browsed more than this many
+                seconds ago; only children that appeared are crawled further
+
+        Returns:
+            AddressSpace: ``space``
+        """
+        if subtrees:
+            for key in subtrees:
+                space.remove_subtree(key)
+                self._crawl_from(space, [key])
+        if max_age is not None:
+            deadline = time.time() - max_age
+            stale = [key for key, browsed in space.browsed.items() if browsed < deadline]
+            self._refresh_listings(space, stale)
+        self._filter(space)
+        if self.cache is not None:
+            self.cache.save(space)
+        return space
+
+    def _refresh_listings(self, space, keys):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="idh-browse") as executor:
+            before = {key: set(space.children.get(key, ())) for key in keys}
+            appeared = self._browse_level(executor, space, keys)
+            for key in keys:
+                after = set(space.children.get(key, ()))
+                for gone in before[key] - after:
+                    space.remove_subtree(gone)
+                    space.nodes.pop(gone, None)
+            # containers seen before keep their own (possibly fresh) listing
+            level = [child for child in appeared if child not in space.children]
+            while level:
+                level = self._browse_level(executor, space, level)
@@ -0,0 +1,121 @@
+"""Deadband / change-detection filter for group reads.
+
+DeadbandFilter keeps the last emitted value and quality of every handle and,
+for each new snapshot, returns only the records that changed.  All
+comparisons are vectorized over the whole snapshot.
+"""
+
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .arrays import IDH_TQ_QUALITY_SHIFT, as_numpy
+
+ChangeSet = namedtuple("ChangeSet", ["indices", "handles", "values", "time_quality"])
+ChangeSet.__doc__ = """Records emitted by DeadbandFilter.update, as compact arrays
+
+    indices: int64 positions in the snapshot
+    handles: handles of those positions
+    values: float64 values
+    time_quality: uint64 raw time_quality
+"""
+
+
+class DeadbandFilter:
+    """Emits a record when it leaves the deadband around the last emitted value
+
+    A record is emitted when any of these holds:
+
+    - its handle has never been emitted (or was reset),
+    - ``|value - last| > absolute`` (if absolute is set),
+    - ``|value - last| > percent / 100 * |last|`` (if percent is set),
+    - its quality byte changed (if quality_change),
+    - ``heartbeat_ms`` passed since the handle was last emitted.
+
+    With neither deadband set any change is emitted.  NaN compares equal to
+    NaN.  ``absolute`` and ``percent`` may be scalars or per-handle arrays.
+
+    Args:
+        handles: handles of the snapshot positions, as returned by subscribe_group
+        absolute: absolute deadband, None for none
+        percent: percent deadband relative to the last emitted value
+        quality_change: emit when the quality byte changes
+        heartbeat_ms: force a re-emit after this long without one
+    """
+
+    def __init__(self, handles, absolute=None, percent=None, quality_change=True, heartbeat_ms=None):
+        self.handles = np.asarray(handles, dtype=np.int64)
+        count = len(self.handles)
+        if absolute is None and percent is None:
+            absolute = 0.0
+        self.absolute = None if absolute is None else np.broadcast_to(
+            np.asarray(absolute, dtype=np.float64), (count,))
+        self.percent = None if percent is None else np.broadcast_to(
+            np.asarray(percent, dtype=np.float64) / 100.0, (count,))
+        self.quality_change = quality_change
+        self.heartbeat_ms = heartbeat_ms
+        self._last_value = np.zeros(count, dtype=np.float64)
+        self._last_quality = np.zeros(count, dtype=np.uint8)
+        self._last_emit_ms = np.zeros(count, dtype=np.float64)
+        self._emitted = np.zeros(count, dtype=bool)
+        self.updates = 0
+        self.records_in = 0
+        self.records_out = 0
+
+    def __len__(self):
+        return len(self.handles)
+
+    def reset(self, indices=None):
+        """Forget the last emitted state, so the next update emits again"""
+        if indices is None:
+            self._emitted[:] = False
+        else:
+            self._emitted[indices] = False
+
+    def update(self, values, now_ms=None):
+        """Filter one snapshot
+
+        Args:
+            values: idh_real_t array or IDH_REAL_DTYPE NumPy array, one per handle
+            now_ms: current time in ms for the heartbeat (default: monotonic clock)
+
+        Returns:
+            ChangeSet
+        """
+        view = as_numpy(values)
+        if len(view) != len(self.handles):
+            raise ValueError(f"expected {len(self.handles)} values, got {len(view)}")
+        value = view["value"]
+        time_quality = view["time_quality"]
+
+        with np.errstate(invalid="ignore"):
+            diff = np.abs(value - self._last_value)
+            changed = np.zeros(len(value), dtype=bool)
+            if self.absolute is not None:
+                changed |= diff > self.absolute
+            if self.percent is not None:
+                changed |= diff > self.percent * np.abs(self._last_value)
+        # NaN -> number and number -> NaN are changes, NaN -> NaN is not
+        changed |= np.isnan(value) != np.isnan(self._last_value)
+        changed |= ~self._emitted
+        quality = (time_quality >> IDH_TQ_QUALITY_SHIFT).astype(np.uint8)
+        if self.quality_change:
+            changed |= quality != self._last_quality
+        if self.heartbeat_ms is not None:
+            if now_ms is None:
+                now_ms = time.monotonic() * 1000.0
+            changed |= (now_ms - self._last_emit_ms) >= self.heartbeat_ms
+
+        indices = np.flatnonzero(changed)
+        out_values = value[indices]
+        self._last_value[indices] = out_values
+        self._last_quality[indices] = quality[indices]
+        self._emitted[indices] = True
+        if self.heartbeat_ms is not None:
+            self._last_emit_ms[indices] = now_ms
+
+        self.updates += 1
+        self.records_in += len(view)
+        self.records_out += len(indices)
+        return ChangeSet(indices, self.handles[indices], out_values, time_quality[indices])
@@ -0,0 +1,105 @@
+"""Vectorized decoding of time_quality arrays.
+
+Every function accepts a ctypes idh_real_t array, an IDH_REAL_DTYPE NumPy
+array or a plain uint64 array of raw time_quality values.
+"""
+
+import numpy as np
+
+from .arrays import get_quality, get_timestamp
+from .pyidh import IDH_QUALITY, QUALITY_CLASS_NAMES, idh_real_t
+
+# 2000-01-01T00:00:00Z in ms since the Unix epoch
+IDH_EPOCH_2000_MS = 946684800000
+
+
+def _build_tables():
+    qualities = np.arange(256, dtype=np.uint8)
+    low_names = {
+        member.value: member.name[len("IDH_LOW_"):]
+        for member in IDH_QUALITY
+        if member.name.startswith("IDH_LOW_")
+    }
+    descriptions = []
+    for q in range(256):
+        low_name = low_names.get(q & 0x3F)
+        class_name = QUALITY_CLASS_NAMES[q >> 6]
+        descriptions.append(f"{class_name} ({low_name})" if low_name else class_name)
+    high_good = IDH_QUALITY.IDH_HIGH_GOOD.value
+    high_uncertain = IDH_QUALITY.IDH_HIGH_UNCERTAIN.value
+    high_bad = IDH_QUALITY.IDH_HIGH_BAD.value
+    return (
+        qualities & np.uint8(IDH_QUALITY.IDH_HIGH_MASK.value),
+        qualities >> np.uint8(6),
+        (qualities & 0xC0) == high_good,
+        (qualities & 0xC0) == high_uncertain,
+        (qualities & 0xC0) == high_bad,
+        tuple(descriptions),
+    )
+
+
+# 256-entry lookup tables indexed by the quality byte
+(
+    QUALITY_HIGH_TABLE,
+    QUALITY_CLASS_TABLE,
+    QUALITY_GOOD_TABLE,
+    QUALITY_UNCERTAIN_TABLE,
+    QUALITY_BAD_TABLE,
+    QUALITY_DESCRIPTIONS,
+) = _build_tables()
+
+for _table in (QUALITY_HIGH_TABLE, QUALITY_CLASS_TABLE, QUALITY_GOOD_TABLE, QUALITY_UNCERTAIN_TABLE, QUALITY_BAD_TABLE):
+    _table.flags.writeable = False
+del _table
+
+QUALITY_DESCRIPTION_ARRAY = np.array(QUALITY_DESCRIPTIONS, dtype=object)
+
+
+def timestamps_ms(values):
+    """Timestamps as int64 ms since 2000-01-01"""
+    return get_timestamp(values).view(np.int64)
+
+
+def timestamps_epoch_ms(values):
+    """Timestamps as int64 ms since the Unix epoch"""
+    epoch_ms = timestamps_ms(values)
+    epoch_ms += IDH_EPOCH_2000_MS
+    return epoch_ms
+
+
+def timestamps_datetime64(values):
+    """Timestamps as datetime64[ms] (UTC, naive like the source data)"""
+    return timestamps_epoch_ms(values).view("datetime64[ms]")
+
+
+def quality_class(values):
+    """Quality class index per value: 0=Invalid, 1=Uncertain, 2=Bad, 3=Good"""
+    return QUALITY_CLASS_TABLE[get_quality(values)]
+
+
+def good_mask(values):
+    """Boolean mask of values with Good quality"""
+    return QUALITY_GOOD_TABLE[get_quality(values)]
+
+
+def uncertain_mask(values):
+    """Boolean mask of values with Uncertain quality"""
+    return QUALITY_UNCERTAIN_TABLE[get_quality(values)]
+
+
+def bad_mask(values):
+    """Boolean mask of values with Bad quality (Invalid is neither good nor bad)"""
+    return QUALITY_BAD_TABLE[get_quality(values)]
+
+
+def describe_quality(values):
+    """Human-readable quality description per value, as object array"""
+    return QUALITY_DESCRIPTION_ARRAY[get_quality(values)]
+
+
+def make_time_quality(quality, timestamp_ms):
+    """Vectorized idh_real_t.make_time_quality"""
+    quality = np.asarray(quality, dtype=np.uint64) & np.uint64(0xFF)
+    timestamp_ms = np.asarray(timestamp_ms, dtype=np.uint64) & np.uint64(idh_real_t.IDH_TQ_TIME_MASK)
+    return (quality << np.uint64(idh_real_t.IDH_TQ_QUALITY_SHIFT)) | timestamp_ms
+
@@ -0,0 +1,100 @@
+"""Preallocated readers/writers bound to a subscribed group.
+
+IDHLibrary.read_group_values / write_group_values build the handle array and
+allocate the result buffers on every call.  GroupReader and GroupWriter build
+them once, so a polling loop does no per-cycle allocation.
+"""
+
+import ctypes
+from ctypes import c_double, c_int
+
+import numpy as np
+
+from .arrays import IDH_REAL_DTYPE
+from .pyidh import idh_real_t, make_handle_array
+
+
+class GroupReader:
+    """Reads ``handles`` of ``group`` into reused buffers.
+
+    With ``double_buffer=True`` (default) read() alternates between two
+    buffers, so the values returned by one read stay valid while the next
+    one is filled.  With ``double_buffer=False`` a single buffer is reused.
+    """
+
+    def __init__(self, idh, group, handles, double_buffer=True):
+        self.idh = idh
+        self.group = group
+        self.handles_array, self.count = make_handle_array(handles)
+        self._buffers = [(idh_real_t * self.count)() for _ in range(2 if double_buffer else 1)]
+        self._views = [np.frombuffer(buf, dtype=IDH_REAL_DTYPE) for buf in self._buffers]
+        self._next = 0
+
+    @property
+    def handles(self):
+        return list(self.handles_array)
+
+    def read(self, as_array=False):
+        """Read into the next internal buffer
+
+        Returns:
+            tuple: (error code, idh_real_t array or NumPy view)
+        """
+        index = self._next
+        self._next = (index + 1) % len(self._buffers)
+        result = self.idh.read_group_values_into(self.group, self.handles_array, self._buffers[index], self.count)
+        return result, (self._views[index] if as_array else self._buffers[index])
+
+    def read_into(self, out):
+        """Read into a caller-owned buffer
+
+        Args:
+            out: idh_real_t ctypes array or writable, C-contiguous NumPy array
+                of IDH_REAL_DTYPE, with at least ``count`` items
+
+        Returns:
+            int: error code
+        """
+        if isinstance(out, np.ndarray):
+            if out.dtype != IDH_REAL_DTYPE:
+                raise TypeError(f"out must have dtype {IDH_REAL_DTYPE}, got {out.dtype}")
+            if len(out) < self.count:
+                raise ValueError(f"out holds {len(out)} items, {self.count} required")
+            out = (idh_real_t * self.count).from_buffer(out)
+        elif not isinstance(out, ctypes.Array) or out._type_ is not idh_real_t:
+            raise TypeError("out must be a ctypes array of idh_real_t or a NumPy array")
+        elif len(out) < self.count:
+            raise ValueError(f"out holds {len(out)} items, {self.count} required")
+        return self.idh.read_group_values_into(self.group, self.handles_array, out, self.count)
+
+
+class GroupWriter:
+    """Writes values to ``handles`` of ``group`` through reused buffers.
+
+    The result codes array returned by write() is overwritten by the next call.
+    """
+
+    def __init__(self, idh, group, handles):
+        self.idh = idh
+        self.group = group
+        self.handles_array, self.count = make_handle_array(handles)
+        self.values_array = (c_double * self.count)()
+        self.results = (c_int * self.count)()
+        self._values_view = np.frombuffer(self.values_array, dtype=np.float64)
+
+    def write(self, values):
+        """Write one value per handle
+
+        Args:
+            values: sequence or NumPy array with ``count`` values
+
+        Returns:
+            tuple: (error code, c_int array of per-handle result codes)
+        """
+        if len(values) != self.count:
+            raise ValueError(f"expected {self.count} values, got {len(values)}")
+        self._values_view[:] = values
+        result = self.idh.write_group_values_from(
+            self.group, self.handles_array, self.values_array, self.results, self.count
+        )
+        return result, self.results
@@ -0,0 +1,156 @@
+"""Fixed-capacity in-memory history of group snapshots.
+
+RingHistory keeps the last ``capacity`` snapshots of a group in one
+preallocated (capacity, handles) IDH_REAL_DTYPE array, so its memory
+footprint is fixed at construction no matter how far consumers lag.  A
+GroupReader can read straight into the next ring row.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from .arrays import IDH_REAL_DTYPE, as_numpy
+from .decode import IDH_EPOCH_2000_MS
+
+
+def _now_ms():
+    """Wall clock in ms since 2000-01-01, same base as time_quality"""
+    return int(time.time() * 1000) - IDH_EPOCH_2000_MS
+
+
+class RingHistory:
+    """Ring buffer of the last ``capacity`` snapshots, one column per handle
+
+    Every snapshot is stamped with the time it was appended (ms since
+    2000-01-01, like time_quality timestamps); window queries use that
+    stamp.  Stamps never decrease: one earlier than the previous stamp (a
+    wall clock step back, an out-of-order timestamp_ms) is raised to it.
+    Query results are copies, safe to keep.
+
+    Args:
+        handles: handles returned by subscribe_group; failed subscriptions
+            (negative error codes) keep their column so rows stay aligned
+        capacity: number of snapshots kept
+    """
+
+    def __init__(self, handles, capacity):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.handles = np.asarray(handles, dtype=np.int64)
+        self.capacity = capacity
+        self._columns = {int(h): i for i, h in enumerate(self.handles)}
+        self._data = np.zeros((capacity, len(self.handles)), dtype=IDH_REAL_DTYPE)
+        self._times = np.zeros(capacity, dtype=np.int64)
+        # read_from() target, copied into the ring only if the read succeeded
+        self._scratch = np.zeros(len(self.handles), dtype=IDH_REAL_DTYPE)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_subscription(cls, subscribe_result, capacity):
+        """Build from the (error code, handles) tuple of subscribe_group"""
+        _, handles = subscribe_result
+        return cls(handles, capacity)
+
+    @property
+    def valid(self):
+        """Mask of columns whose subscription succeeded"""
+        return self.handles >= 0
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes + self._times.nbytes
+
+    def __len__(self):
+        return self._count
+
+    def column(self, handle):
+        """Column index of ``handle``"""
+        return self._columns[int(handle)]
+
+    def _commit(self, timestamp_ms):
+        stamp = _now_ms() if timestamp_ms is None else timestamp_ms
+        if self._count:
+            # window() bisects the stamps, they must stay sorted
+            stamp = max(stamp, self._times[(self._next - 1) % self.capacity])
+        self._times[self._next] = stamp
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def append(self, values, timestamp_ms=None):
+        """Store one snapshot (idh_real_t array or NumPy view, one per handle)"""
+        view = as_numpy(values)
+        if len(view) != len(self.handles):
+            raise ValueError(f"expected {len(self.handles)} values, got {len(view)}")
+        with self._lock:
+            self._data[self._next] = view
+            self._commit(timestamp_ms)
+
+    def read_from(self, reader, timestamp_ms=None):
+        """Read a snapshot with a GroupReader straight into the next row
+
+        The row is only kept if the read succeeded (error code >= 0).
+
+        Returns:
+            int: error code of the read
+        """
+        with self._lock:
+            # a failed read may have written part of its buffer: never the
+            # oldest retained row
+            result = reader.read_into(self._scratch)
+            if result >= 0:
+                self._data[self._next] = self._scratch
+                self._commit(timestamp_ms)
+        return result
+
+    def _order(self, count):
+        """Ring rows of the last ``count`` snapshots, oldest first"""
+        count = min(count, self._count)
+        return (np.arange(self._next - count, self._next)) % self.capacity
+
+    def latest(self, handle=None):
+        """Most recent snapshot (IDH_REAL_DTYPE array), or the latest record
+        of one handle; None if empty"""
+        with self._lock:
+            if not self._count:
+                return None
+            row = self._data[(self._next - 1) % self.capacity]
+            if handle is None:
+                return row.copy()
+            return row[self.column(handle)].copy()
+
+    def last(self, count, handles=None):
+        """Last ``count`` snapshots, oldest first
+
+        Returns:
+            tuple: (times int64[k] ms since 2000-01-01, records IDH_REAL_DTYPE[k, n])
+        """
+        with self._lock:
+            rows = self._order(count)
+            return self._select(rows, handles)
+
+    def window(self, seconds, now_ms=None, handles=None):
+        """Snapshots appended in the last ``seconds``, oldest first (see last)"""
+        with self._lock:
+            rows = self._order(self._count)
+            if now_ms is None:
+                now_ms = _now_ms()
+            times = self._times[rows]
+            # stamps are non-decreasing in append order, see _commit
+            start = np.searchsorted(times, now_ms - seconds * 1000.0, side="left")
+            return self._select(rows[start:], handles)
+
+    def _select(self, rows, handles):
+        times = self._times[rows]
+        if handles is None:
+            return times, self._data[rows]
+        columns = [self.column(h) for h in handles]
+        return times, self._data[np.ix_(rows, columns)]
+
+    def clear(self):
+        with self._lock:
+            self._next = 0
+            self._count = 0
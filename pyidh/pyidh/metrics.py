@@ -0,0 +1,290 @@
+"""Latency histograms and counters for libidh calls.
+
+Instrumentation is opt-in and costs nothing while off: IDHLibrary calls
+its ``_lib`` attribute, which is the loaded libidh unless an
+InstrumentedLib was put in its place::
+
+    metrics = instrument(idh)        # every idh_* call made by idh is measured
+    ...
+    print(metrics.to_prometheus())
+    uninstrument(idh)
+
+Each libidh function gets a call counter, a counter per negative error
+code and a LatencyHistogram; calls carrying tags or handles also add
+their item count per source / group handle.
+"""
+
+import threading
+import time
+
+from .pyidh import IDH_INVALID_HANDLE
+
+# values below 2**SUB_BUCKET_BITS ns get a bucket each, larger ones
+# 2**SUB_BUCKET_BITS buckets per power of two (relative error < 1/16)
+SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_BUCKETS = 64 * _SUB_BUCKETS
+
+# le boundaries (seconds) of the exported Prometheus histograms
+PROMETHEUS_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+# function -> (handle kind, index of the item count argument)
+ITEM_ARGUMENTS = {
+    "idh_source_readvalues": ("source", 3),
+    "idh_source_writevalues": ("source", 4),
+    "idh_group_subscribe": ("group", 3),
+    "idh_group_unsubscribe": ("group", 2),
+    "idh_group_readvalues": ("group", 3),
+    "idh_group_writevalues": ("group", 4),
+    # items_count is in/out: the browsed count is read after the call
+    "idh_source_browse": ("source", 2),
+    "idh_source_browse_root": ("source", 2),
+}
+
+# functions returning a handle rather than an error code
+HANDLE_FUNCTIONS = frozenset(("idh_instance_create", "idh_source_create", "idh_group_create"))
+
+# functions without a return value
+VOID_FUNCTIONS = frozenset(("idh_instance_destroy", "idh_source_destroy", "idh_group_clear", "idh_group_unsubscribe",
+                            "idh_group_destroy"))
+
+_INVALID_HANDLE = IDH_INVALID_HANDLE.value
+
+
+def _bucket(ns):
+    if ns < _SUB_BUCKETS:
+        return max(ns, 0)
+    shift = ns.bit_length() - SUB_BUCKET_BITS - 1
+    return min((shift + 1) * _SUB_BUCKETS + (ns >> shift) - _SUB_BUCKETS, _BUCKETS - 1)
+
+
+def _bucket_upper(index):
+    """Largest value (ns) falling into bucket ``index``"""
+    if index < _SUB_BUCKETS:
+        return index
+    shift = index // _SUB_BUCKETS - 1
+    return ((index % _SUB_BUCKETS + _SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR-style histogram of nanosecond latencies
+
+    Buckets are log-linear, so recording is O(1) and percentiles are
+    exact to within 1/16 of the value, from nanoseconds to hours.
+    Not thread-safe by itself; IDHMetrics records under its lock.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, ns):
+        # _bucket() inlined, this runs on every instrumented call
+        if ns < _SUB_BUCKETS:
+            index = max(ns, 0)
+        else:
+            shift = ns.bit_length() - SUB_BUCKET_BITS - 1
+            index = min((shift + 1) * _SUB_BUCKETS + (ns >> shift) - _SUB_BUCKETS, _BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        """Latency (ns) at or below which ``q`` percent of the calls fell"""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+    def cumulative(self, boundaries_ns):
+        """Calls at or below each boundary, for Prometheus ``le`` buckets"""
+        result = []
+        seen = 0
+        index = 0
+        for boundary in boundaries_ns:
+            while index < _BUCKETS and _bucket_upper(index) <= boundary:
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def to_dict(self):
+        """count, sum/min/max and p50/p90/p99/p999, in nanoseconds"""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min or 0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+        }
+
+
+class _FunctionStats:
+    __slots__ = ("calls", "errors", "latency", "items", "returns")
+
+    def __init__(self, function):
+        self.calls = 0
+        # error code -> count
+        self.errors = {}
+        self.latency = LatencyHistogram()
+        self.items = ITEM_ARGUMENTS.get(function)
+        self.returns = "handle" if function in HANDLE_FUNCTIONS else None if function in VOID_FUNCTIONS else "code"
+
+
+class IDHMetrics:
+    """Counters and latency histograms of libidh calls, per function"""
+
+    def __init__(self):
+        self._functions = {}
+        # (kind, handle, function) -> items
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def record(self, function, args, result, ns):
+        """Account one call of ``function`` that returned ``result`` after ``ns``"""
+        with self._lock:
+            stats = self._functions.get(function)
+            if stats is None:
+                stats = self._functions[function] = _FunctionStats(function)
+            stats.calls += 1
+            stats.latency.record(ns)
+            if stats.returns == "code":
+                if result < 0:
+                    stats.errors[result] = stats.errors.get(result, 0) + 1
+            elif stats.returns == "handle" and result == _INVALID_HANDLE:
+                stats.errors["invalid_handle"] = stats.errors.get("invalid_handle", 0) + 1
+            if stats.items is not None:
+                kind, position = stats.items
+                count = args[position]
+                if not isinstance(count, int):
+                    # browse passes items_count as byref(c_uint)
+                    count = count._obj.value
+                key = (kind, args[0], function)
+                self._items[key] = self._items.get(key, 0) + count
+
+    def reset(self):
+        with self._lock:
+            self._functions = {}
+            self._items = {}
+
+    def snapshot(self):
+        """Point-in-time copy as plain dicts
+
+        Returns:
+            dict: {"functions": {function: {"calls", "errors": {code: n},
+            "latency_ns": LatencyHistogram.to_dict()}}, "items": {kind:
+            {handle: {function: items}}}}
+        """
+        with self._lock:
+            functions = {
+                name: {"calls": s.calls, "errors": dict(s.errors), "latency_ns": s.latency.to_dict()}
+                for name, s in self._functions.items()
+            }
+            items = {}
+            for (kind, handle, function), count in self._items.items():
+                items.setdefault(kind, {}).setdefault(handle, {})[function] = count
+        return {"functions": functions, "items": items}
+
+    def to_prometheus(self, prefix="idh"):
+        """Prometheus text exposition format"""
+        boundaries = [round(b * 1e9) for b in PROMETHEUS_BUCKETS]
+        with self._lock:
+            functions = sorted(self._functions.items())
+            rows = [(name, s.calls, sorted(s.errors.items(), key=lambda e: str(e[0])), s.latency.cumulative(boundaries),
+                     s.latency.count, s.latency.total) for name, s in functions]
+            items = sorted(self._items.items(), key=lambda i: (i[0][0], str(i[0][1]), i[0][2]))
+        lines = [f"# HELP {prefix}_calls_total libidh calls", f"# TYPE {prefix}_calls_total counter"]
+        lines += [f'{prefix}_calls_total{{function="{name}"}} {calls}' for name, calls, *_ in rows]
+        lines += [f"# HELP {prefix}_call_errors_total libidh calls failing, by error code",
+                  f"# TYPE {prefix}_call_errors_total counter"]
+        for name, _, errors, *_ in rows:
+            lines += [f'{prefix}_call_errors_total{{function="{name}",code="{code}"}} {n}' for code, n in errors]
+        lines += [f"# HELP {prefix}_call_latency_seconds libidh call latency",
+                  f"# TYPE {prefix}_call_latency_seconds histogram"]
+        for name, _, _, cumulative, count, total in rows:
+            for le, seen in zip(PROMETHEUS_BUCKETS, cumulative):
+                lines.append(f'{prefix}_call_latency_seconds_bucket{{function="{name}",le="{le:g}"}} {seen}')
+            lines.append(f'{prefix}_call_latency_seconds_bucket{{function="{name}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_call_latency_seconds_sum{{function="{name}"}} {total / 1e9:.9f}')
+            lines.append(f'{prefix}_call_latency_seconds_count{{function="{name}"}} {count}')
+        lines += [f"# HELP {prefix}_items_total tags or handles passed per source and group",
+                  f"# TYPE {prefix}_items_total counter"]
+        lines += [f'{prefix}_items_total{{kind="{kind}",handle="{handle}",function="{function}"}} {count}'
+                  for (kind, handle, function), count in items]
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedLib:
+    """Proxy of the native library timing every ``idh_*`` call into ``metrics``
+
+    Args:
+        lib: library to wrap (the loaded libidh)
+        metrics: IDHMetrics, a new one if None
+    """
+
+    def __init__(self, lib, metrics=None):
+        self.lib = lib
+        self.metrics = metrics if metrics is not None else IDHMetrics()
+
+    def __getattr__(self, name):
+        function = getattr(self.lib, name)
+        if not name.startswith("idh_"):
+            return function
+        record = self.metrics.record
+        clock = time.perf_counter_ns
+
+        def call(*args):
+            started = clock()
+            result = function(*args)
+            record(name, args, result, clock() - started)
+            return result
+
+        # cached: later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
+
+
+def forget_cached_calls(wrappers):
+    """Drop the ``idh_*`` closures cached by ``wrappers`` (InstrumentedLib
+    and the like), after a ``lib`` below them was replaced"""
+    for wrapper in wrappers:
+        for name in [n for n in vars(wrapper) if n.startswith("idh_")]:
+            delattr(wrapper, name)
+
+
+def instrument(idh, metrics=None):
+    """Measure every libidh call ``idh`` makes from now on
+
+    Returns:
+        IDHMetrics
+    """
+    lib = idh._lib
+    if isinstance(lib, InstrumentedLib):
+        if metrics is None or metrics is lib.metrics:
+            return lib.metrics
+        lib = lib.lib
+    idh._lib = InstrumentedLib(lib, metrics)
+    return idh._lib.metrics
+
+
+def uninstrument(idh):
+    """Restore direct libidh calls on ``idh``"""
+    if isinstance(idh._lib, InstrumentedLib):
+        idh._lib = idh._lib.lib
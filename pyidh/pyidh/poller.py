@@ -0,0 +1,160 @@
+"""Parallel poller that fans group reads out across many sources.
+
+Thread-safety rules for sharing one IDHLibrary:
+
+- The IDHLibrary object only holds the instance handle and can be shared
+  by any number of threads.
+- Calls on *different* sources/groups may run concurrently; ctypes
+  releases the GIL, so they overlap in the native library.
+- A group (and the GroupReader/GroupWriter bound to it) is used by one
+  thread at a time.  The poller guarantees this by reading each target
+  from exactly one task per cycle.
+- A source or group must not be destroyed while a call on it is running.
+  Remove targets between cycles, never from inside a running poll().
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .group import GroupReader
+from .pyidh import IDH_INVALID_HANDLE
+
+PollResult = namedtuple("PollResult", ["name", "result", "values", "latency", "error"])
+PollResult.__doc__ = """Result of one target in a cycle
+
+    result: libidh error code (None if the read raised)
+    values: idh_real_t array or NumPy view, None on exception
+    latency: seconds spent in the read
+    error: exception raised by the read, or None
+"""
+
+PollSnapshot = namedtuple("PollSnapshot", ["timestamp", "elapsed", "results"])
+PollSnapshot.__doc__ = """One poll cycle
+
+    timestamp: time.time() when the cycle started
+    elapsed: seconds until the last target finished
+    results: dict name -> PollResult, in the order targets were added
+"""
+
+
+class _Target:
+    __slots__ = ("name", "reader", "source", "group", "handles")
+
+    def __init__(self, name, reader, source=None, group=None, handles=None):
+        self.name = name
+        self.reader = reader
+        # set when the poller created (and owns) source/group
+        self.source = source
+        self.group = group
+        self.handles = handles
+
+
+class MultiSourcePoller:
+    """Reads many groups in parallel on a bounded thread pool
+
+    Values in a snapshot are read into per-target double buffers and stay
+    valid until the poll() after next; copy them to keep them longer.
+
+    Args:
+        idh: shared IDHLibrary
+        max_workers: maximum number of concurrent native reads
+    """
+
+    def __init__(self, idh, max_workers=16):
+        self.idh = idh
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="idh-poll")
+        self._targets = {}
+        self._lock = threading.Lock()
+
+    def add_group(self, name, group, handles):
+        """Poll an existing, already subscribed group (not owned by the poller)"""
+        with self._lock:
+            if name in self._targets:
+                raise ValueError(f"target {name!r} already exists")
+            self._targets[name] = _Target(name, GroupReader(self.idh, group, handles))
+
+    def add_source(self, name, source_type, source_schema, sample_timespan_msec, source_flag, tags):
+        """Create a source and group, subscribe ``tags`` and poll them
+
+        The poller owns the created source and group and destroys them in
+        remove()/close().
+
+        Returns:
+            tuple: (subscribe error code, handles)
+        """
+        source = self.idh.create_source(source_type, source_schema, sample_timespan_msec, source_flag)
+        if source == IDH_INVALID_HANDLE.value:
+            raise RuntimeError(f"Failed to create source {source_schema}")
+        group = self.idh.create_group(source, name)
+        if group == IDH_INVALID_HANDLE.value:
+            self.idh.destroy_source(source)
+            raise RuntimeError(f"Failed to create group {name}")
+        result, handles = self.idh.subscribe_group(group, tags)
+        target = _Target(name, GroupReader(self.idh, group, handles), source, group, handles)
+        with self._lock:
+            if name in self._targets:
+                self._destroy(target)
+                raise ValueError(f"target {name!r} already exists")
+            self._targets[name] = target
+        return result, handles
+
+    def remove(self, name):
+        """Stop polling ``name``; destroys the source/group if the poller created them"""
+        with self._lock:
+            target = self._targets.pop(name)
+        self._destroy(target)
+
+    def _destroy(self, target):
+        if target.group is not None:
+            self.idh.unsubscribe_group(target.group, target.handles)
+            self.idh.destroy_group(target.group)
+        if target.source is not None:
+            self.idh.destroy_source(target.source)
+
+    @property
+    def names(self):
+        with self._lock:
+            return list(self._targets)
+
+    @staticmethod
+    def _read(target, as_array):
+        start = time.perf_counter()
+        try:
+            result, values = target.reader.read(as_array)
+            return PollResult(target.name, result, values, time.perf_counter() - start, None)
+        except Exception as e:
+            return PollResult(target.name, None, None, time.perf_counter() - start, e)
+
+    def poll(self, as_array=False):
+        """Read every target once, in parallel
+
+        Returns:
+            PollSnapshot
+        """
+        with self._lock:
+            targets = list(self._targets.values())
+        timestamp = time.time()
+        start = time.perf_counter()
+        futures = [self._executor.submit(self._read, target, as_array) for target in targets]
+        results = {}
+        for future in futures:
+            poll_result = future.result()
+            results[poll_result.name] = poll_result
+        return PollSnapshot(timestamp, time.perf_counter() - start, results)
+
+    def close(self):
+        """Shut down the thread pool and destroy owned sources/groups"""
+        self._executor.shutdown()
+        with self._lock:
+            targets = list(self._targets.values())
+            self._targets.clear()
+        for target in targets:
+            self._destroy(target)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
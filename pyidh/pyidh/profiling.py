@@ -0,0 +1,206 @@
+"""Per-phase profiling of the binding layer.
+
+CallProfiler splits the wall time of IDHLibrary.read_values,
+write_values, subscribe_group, read_group_values and write_group_values
+into
+
+- ``marshal``: building the idh_tag_t / handle / value arrays,
+- ``native``: the libidh call itself,
+- ``convert``: turning the result buffers into what the method returns,
+
+and every ``sample_every``-th call is run under tracemalloc to measure the
+bytes it allocates.  Those methods time their own phases through the
+``_phase_hook`` of their IDHLibrary, which attach() sets on one instance
+only; detached (the default) the hook is None and the calls get a no-op
+timer::
+
+    profiler = CallProfiler()
+    with profiler.attached(idh):
+        ...
+    print(profiler.report())
+
+Sampled calls are left out of the timings, tracemalloc slows them down.
+"""
+
+import contextlib
+import threading
+import time
+import tracemalloc
+
+from .metrics import LatencyHistogram
+
+PHASES = ("marshal", "native", "convert")
+
+PROFILED_METHODS = ("read_values", "write_values", "subscribe_group", "read_group_values", "write_group_values")
+
+
+class _MethodProfile:
+    __slots__ = ("calls", "items", "phases", "sampled", "allocated", "peak")
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+        self.phases = {phase: LatencyHistogram() for phase in PHASES}
+        self.sampled = 0
+        # bytes still allocated after sampled calls (mostly their results)
+        self.allocated = 0
+        # highest bytes allocated at once during sampled calls
+        self.peak = 0
+
+
+class _PhaseTimer:
+    """Times one call: lap() ends marshal and native, stop() ends convert"""
+
+    __slots__ = ("profiler", "profile", "items", "marks")
+
+    def __init__(self, profiler, profile, items):
+        self.profiler = profiler
+        self.profile = profile
+        self.items = items
+        self.marks = [time.perf_counter_ns()]
+
+    def lap(self):
+        self.marks.append(time.perf_counter_ns())
+
+    def stop(self):
+        t3 = time.perf_counter_ns()
+        t0, t1, t2 = self.marks
+        profile = self.profile
+        with self.profiler._lock:
+            profile.items += self.items
+            profile.phases["marshal"].record(t1 - t0)
+            profile.phases["native"].record(t2 - t1)
+            profile.phases["convert"].record(t3 - t2)
+
+
+class _TracedTimer:
+    """Measures the allocations of one call between creation and stop()"""
+
+    __slots__ = ("profiler", "profile", "items", "started", "before", "reset_peak")
+
+    def __init__(self, profiler, profile, items):
+        self.profiler = profiler
+        self.profile = profile
+        self.items = items
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start()
+        self.reset_peak = getattr(tracemalloc, "reset_peak", None)
+        if self.reset_peak is not None:
+            self.reset_peak()
+        self.before, _ = tracemalloc.get_traced_memory()
+
+    def lap(self):
+        pass
+
+    def stop(self):
+        after, peak = tracemalloc.get_traced_memory()
+        self._end()
+        profile = self.profile
+        with self.profiler._lock:
+            profile.items += self.items
+            profile.sampled += 1
+            profile.allocated += after - self.before
+            profile.peak = max(profile.peak, (peak if self.reset_peak is not None else after) - self.before)
+
+    def _end(self):
+        if self.started:
+            self.started = False
+            tracemalloc.stop()
+
+    def __del__(self):
+        # the call raised before stop()
+        self._end()
+
+
+class CallProfiler:
+    """Collects marshal / native / convert times of profiled IDHLibrary methods
+
+    Args:
+        sample_every: trace the allocations of one call in this many, 0 never
+    """
+
+    def __init__(self, sample_every=100):
+        self.sample_every = sample_every
+        self._methods = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def attach(self, idh):
+        """Profile the methods of ``idh`` until detach()"""
+        idh._phase_hook = self._start
+        return idh
+
+    def detach(self, idh):
+        if idh._phase_hook == self._start:
+            idh._phase_hook = None
+
+    @contextlib.contextmanager
+    def attached(self, idh):
+        self.attach(idh)
+        try:
+            yield self
+        finally:
+            self.detach(idh)
+
+    def _start(self, name, items):
+        """Phase hook: a timer for one call of ``name`` on ``items`` items"""
+        with self._lock:
+            profile = self._methods.get(name)
+            if profile is None:
+                profile = self._methods[name] = _MethodProfile()
+            profile.calls += 1
+            sampled = self.sample_every and profile.calls % self.sample_every == 0
+        if sampled:
+            return _TracedTimer(self, profile, items)
+        return _PhaseTimer(self, profile, items)
+
+    def reset(self):
+        with self._lock:
+            self._methods = {}
+            self._started = time.perf_counter()
+
+    def summary(self):
+        """Per method: calls, items, and per phase total / mean / p50 / p99
+        (ns) with its share of the timed time; allocation figures of the
+        sampled calls
+
+        Returns:
+            dict: method -> dict
+        """
+        with self._lock:
+            methods = list(self._methods.items())
+            summary = {}
+            for name, profile in methods:
+                total = sum(h.total for h in profile.phases.values())
+                summary[name] = {
+                    "calls": profile.calls,
+                    "items": profile.items,
+                    "phases": {
+                        phase: {
+                            "total_ns": h.total,
+                            "mean_ns": h.total // h.count if h.count else 0,
+                            "p50_ns": h.percentile(50),
+                            "p99_ns": h.percentile(99),
+                            "share": h.total / total if total else 0.0,
+                        } for phase, h in profile.phases.items()
+                    },
+                    "sampled_calls": profile.sampled,
+                    "bytes_per_call": profile.allocated // profile.sampled if profile.sampled else 0,
+                    "peak_bytes": profile.peak,
+                }
+        return summary
+
+    def report(self):
+        """Summary as a text table"""
+        lines = [f"profiled {time.perf_counter() - self._started:.1f}s",
+                 f"{'method':<18} {'calls':>8} {'items':>10} "
+                 + " ".join(f"{phase + ' mean/p99 us':>22} {'%':>4}" for phase in PHASES)
+                 + f" {'bytes/call':>11} {'peak':>10}"]
+        for name, s in sorted(self.summary().items()):
+            phases = " ".join(
+                f"{p['mean_ns'] / 1000:>10.1f} /{p['p99_ns'] / 1000:>10.1f} {p['share'] * 100:>4.0f}"
+                for p in (s["phases"][phase] for phase in PHASES))
+            lines.append(f"{name:<18} {s['calls']:>8} {s['items']:>10} {phases} "
+                         f"{s['bytes_per_call']:>11} {s['peak_bytes']:>10}")
+        return "\n".join(lines)
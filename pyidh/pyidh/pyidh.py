@@ -16,30 +16,41 @@ from ctypes import (
     byref,
 )
 from enum import Enum
+import functools
 import ctypes.util
+import datetime
 import os
 import sys
 import platform
 
 def load_libidh():
-    # 当前包目录
-    lib_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # 平台目录名称要和 setup.py 中保持一致
-    if sys.platform.startswith("win"):
-        arch = "win_amd64" if platform.machine().lower() in ["x86_64", "amd64"] else "win_arm64"
-        lib_name = "libidh.dll"
-    elif sys.platform.startswith("linux"):
-        arch = "linux_x86_64" if platform.machine().lower() in ["x86_64", "amd64"] else "linux_aarch64"
-        lib_name = "libidh.so"
+    # IDH_LIBRARY_PATH 指定库文件时优先加载(如 benchmarks 的 stub 库)
+    # IDH_LIBRARY_PATH, if set, names the library file to load instead (e.g. the benchmarks stub)
+    override = os.environ.get("IDH_LIBRARY_PATH")
+    if override:
+        lib_path = os.path.abspath(override)
+        platform_dir, lib_name = os.path.split(lib_path)
+        if not os.path.exists(lib_path):
+            raise FileNotFoundError(f"Could not find {lib_name} in {platform_dir} (IDH_LIBRARY_PATH)")
     else:
-        raise OSError(f"Unsupported platform: {sys.platform}")
+        # 当前包目录
+        lib_dir = os.path.dirname(os.path.abspath(__file__))
 
-    platform_dir = os.path.join(lib_dir, arch)
-    lib_path = os.path.join(platform_dir, lib_name)
+        # 平台目录名称要和 setup.py 中保持一致
+        if sys.platform.startswith("win"):
+            arch = "win_amd64" if platform.machine().lower() in ["x86_64", "amd64"] else "win_arm64"
+            lib_name = "libidh.dll"
+        elif sys.platform.startswith("linux"):
+            arch = "linux_x86_64" if platform.machine().lower() in ["x86_64", "amd64"] else "linux_aarch64"
+            lib_name = "libidh.so"
+        else:
+            raise OSError(f"Unsupported platform: {sys.platform}")
+
+        platform_dir = os.path.join(lib_dir, arch)
+        lib_path = os.path.join(platform_dir, lib_name)
 
-    if not os.path.exists(lib_path):
-        raise FileNotFoundError(f"Could not find {lib_name} in {platform_dir}")
+        if not os.path.exists(lib_path):
+            raise FileNotFoundError(f"Could not find {lib_name} in {platform_dir}")
 
     try:
         if sys.platform.startswith("win"):
@@ -196,6 +207,13 @@ class IDH_QUALITY(Enum):
     IDH_LOW_SYS_THROTTLED = 0x3E      # Throttled
     IDH_LOW_SYS_UNKNOWN = 0x3F         # Unknown error
 
+# quality class index (quality >> 6) -> name: "Invalid", "Uncertain", "Bad", "Good"
+QUALITY_CLASS_NAMES = tuple(
+    member.name[len("IDH_HIGH_"):].capitalize()
+    for member in sorted(IDH_QUALITY, key=lambda m: m.value)
+    if member.name.startswith("IDH_HIGH_")
+)
+
 class IDH_RTSOURCE_FLAG(Enum):
     IDH_RTSOURCE_FLAG_NONE = 0x0
     IDH_RTSOURCE_FLAG_SUBSCRIBE = 0x1 # support subscribe
@@ -241,6 +259,10 @@ class idh_real_t(Structure):
     # Constants for time_quality field
     IDH_TQ_QUALITY_SHIFT = 48
     IDH_TQ_TIME_MASK = 0x0000FFFFFFFFFFFF
+    IDH_HIGH_MASK = IDH_QUALITY.IDH_HIGH_MASK.value
+    # 2000-01-01, base of the timestamp field, and the largest offset datetime can hold
+    IDH_TQ_BASE_TIME = datetime.datetime(2000, 1, 1)
+    IDH_TQ_MAX_DATETIME_MS = (datetime.datetime.max - IDH_TQ_BASE_TIME) // datetime.timedelta(milliseconds=1)
     
     def get_quality(self):
         """Extract quality from time_quality field"""
@@ -252,11 +274,11 @@ class idh_real_t(Structure):
     
     def get_quality_high(self):
         """Extract high 2-bit quality class"""
-        return self.get_quality() & IDH_QUALITY.IDH_HIGH_MASK.value
+        return self.get_quality() & self.IDH_HIGH_MASK
 
     def get_quality_low(self):
         """Extract low 6-bit quality class"""
-        return self.get_quality() & ~IDH_QUALITY.IDH_HIGH_MASK.value
+        return self.get_quality() & ~self.IDH_HIGH_MASK
 
     def get_timestamp(self):
         """Extract timestamp from time_quality field (ms since 2000-01-01)"""
@@ -265,19 +287,10 @@ class idh_real_t(Structure):
     def get_timestamp_desc(self):
         """Get human-readable timestamp description"""
         timestamp_ms = self.get_timestamp()
-        import datetime
-
-        base_time = datetime.datetime(2000, 1, 1)
-        max_delta = datetime.datetime.max - base_time
-        max_supported_ms = (
-            max_delta.days * 24 * 60 * 60 * 1000
-            + max_delta.seconds * 1000
-            + max_delta.microseconds // 1000
-        )
-        if timestamp_ms > max_supported_ms:
+        if timestamp_ms > self.IDH_TQ_MAX_DATETIME_MS:
             return f"{timestamp_ms} ms since 2000-01-01"
 
-        timestamp = base_time + datetime.timedelta(milliseconds=timestamp_ms)
+        timestamp = self.IDH_TQ_BASE_TIME + datetime.timedelta(milliseconds=timestamp_ms)
         return timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
 
     @property
@@ -292,16 +305,152 @@ class idh_real_t(Structure):
     @staticmethod
     def get_high_quality_description(quality):
         """Get human-readable description of quality high"""
-        high = quality & IDH_QUALITY.IDH_HIGH_MASK.value
-
-        if high == IDH_QUALITY.IDH_HIGH_GOOD.value:
-            return "Good"
-        elif high == IDH_QUALITY.IDH_HIGH_UNCERTAIN.value:
-            return "Uncertain"
-        elif high == IDH_QUALITY.IDH_HIGH_BAD.value:
-            return "Bad"
+        return QUALITY_CLASS_NAMES[(quality & 0xFF) >> 6]
+
+class TagSet:
+    """Pre-encoded tag list, reusable across calls.
+
+    Tag names are UTF-8 encoded once into a single NUL separated buffer and
+    the idh_tag_t array points into it; both live as long as the TagSet.
+    A TagSet can be passed anywhere IDHLibrary takes ``tags``.
+    """
+
+    def __init__(self, tags=()):
+        if isinstance(tags, TagSet):
+            data_types, namespace_indexes, tag_names = tags.data_types, tags.namespace_indexes, tags.tag_names
         else:
-            return "Invalid"
+            data_types = [tag['data_type'] for tag in tags]
+            namespace_indexes = [tag['namespace_index'] for tag in tags]
+            tag_names = [tag['tag_name'] for tag in tags]
+        self._build(data_types, namespace_indexes, tag_names)
+
+    @classmethod
+    def from_names(cls, tag_names, namespace_index=0, data_type=IDH_DATATYPE.IDH_DATATYPE_REAL.value):
+        """Build from tag names sharing one namespace and data type"""
+        return cls.from_columns(data_type, namespace_index, tag_names)
+
+    @classmethod
+    def from_columns(cls, data_types, namespace_indexes, tag_names):
+        """Build from column sequences or NumPy arrays; scalar columns are broadcast"""
+        tagset = cls.__new__(cls)
+        tagset._build(data_types, namespace_indexes, tag_names)
+        return tagset
+
+    @classmethod
+    def from_csv(cls, csv_file, delimiter=','):
+        """Build from a CSV file (path or file object) with header
+        tag_name[,namespace_index][,data_type]"""
+        import csv
+
+        if isinstance(csv_file, (str, bytes, os.PathLike)):
+            with open(csv_file, newline='', encoding='utf-8-sig') as f:
+                return cls.from_csv(f, delimiter)
+        data_types, namespace_indexes, tag_names = [], [], []
+        for row in csv.DictReader(csv_file, delimiter=delimiter):
+            tag_names.append(row['tag_name'])
+            namespace_indexes.append(int(row.get('namespace_index') or 0))
+            data_types.append(int(row.get('data_type') or IDH_DATATYPE.IDH_DATATYPE_REAL.value))
+        return cls.from_columns(data_types, namespace_indexes, tag_names)
+
+    def _build(self, data_types, namespace_indexes, tag_names):
+        import numpy as np
+
+        tag_names = [n.decode('utf-8') if isinstance(n, bytes) else str(n) for n in tag_names]
+        count = len(tag_names)
+        encoded = [n.encode('utf-8') for n in tag_names]
+        blob = b"\0".join(encoded) + b"\0"
+        self._names_buffer = ctypes.create_string_buffer(blob, len(blob))
+        self.tag_array = (idh_tag_t * count)()
+        self.tag_names = tag_names
+
+        lengths = np.fromiter((len(n) + 1 for n in encoded), dtype=np.uintp, count=count)
+        offsets = np.zeros(count, dtype=np.uintp)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        view = np.frombuffer(self.tag_array, dtype=_tag_dtype())
+        view['data_type'] = data_types
+        view['namespace_index'] = namespace_indexes
+        view['tag_name'] = offsets + ctypes.addressof(self._names_buffer)
+        self.data_types = view['data_type'].tolist()
+        self.namespace_indexes = view['namespace_index'].tolist()
+
+    def __len__(self):
+        return len(self.tag_names)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.subset(range(len(self))[index])
+        return {
+            'data_type': self.data_types[index],
+            'namespace_index': self.namespace_indexes[index],
+            'tag_name': self.tag_names[index],
+        }
+
+    def subset(self, indices):
+        """New TagSet holding the tags at ``indices``, in that order"""
+        indices = list(indices)
+        return TagSet.from_columns(
+            [self.data_types[i] for i in indices],
+            [self.namespace_indexes[i] for i in indices],
+            [self.tag_names[i] for i in indices],
+        )
+
+    def __repr__(self):
+        return f"TagSet({len(self)} tags)"
+
+@functools.lru_cache(maxsize=None)
+def _tag_dtype():
+    import numpy as np
+
+    return np.dtype({
+        'names': ['data_type', 'namespace_index', 'tag_name'],
+        'formats': [np.uint16, np.uint16, np.uintp],
+        'offsets': [idh_tag_t.data_type.offset, idh_tag_t.namespace_index.offset, idh_tag_t.tag_name.offset],
+        'itemsize': ctypes.sizeof(idh_tag_t),
+    })
+
+def make_tag_array(tags):
+    """Marshal ``tags`` (TagSet or list of tag dicts) into an idh_tag_t array.
+
+    Returns:
+        tuple: (idh_tag_t array, tag count)
+    """
+    if isinstance(tags, TagSet):
+        return tags.tag_array, len(tags.tag_names)
+    tags_size = len(tags)
+    tag_array = (idh_tag_t * tags_size)()
+    for i, tag in enumerate(tags):
+        tag_array[i].data_type = tag['data_type']
+        tag_array[i].namespace_index = tag['namespace_index']
+        tag_array[i].tag_name = tag['tag_name'].encode('utf-8')
+    return tag_array, tags_size
+
+def make_handle_array(handles):
+    """Marshal ``handles`` into a c_longlong array; ctypes arrays are used as is.
+
+    Returns:
+        tuple: (c_longlong array, handle count)
+    """
+    if isinstance(handles, ctypes.Array) and handles._type_ is c_longlong:
+        return handles, len(handles)
+    tags_size = len(handles)
+    return (c_longlong * tags_size)(*handles), tags_size
+
+class _NoTimer:
+    """Phase timer of calls made while no profiler is attached"""
+
+    __slots__ = ()
+
+    def lap(self):
+        pass
+
+    def stop(self):
+        pass
+
+_NO_TIMER = _NoTimer()
 
 class idh_browse_item_t(Structure):
     _fields_ = [
@@ -448,14 +597,27 @@ libidh.idh_get_log_level.restype = c_int
 libidh.idh_get_log_level.argtypes = [POINTER(c_int)]
 
 class IDHLibrary:
-    def __init__(self):
-        self.handle = libidh.idh_instance_create()
+    def __init__(self, lib=None):
+        """
+        Args:
+            lib: native library to call, the loaded libidh if None (e.g. an
+                InstrumentedLib wrapping it, see pyidh.metrics)
+        """
+        self._lib = libidh if lib is None else lib
+        # phase timers of read/write/subscribe calls, see pyidh.profiling
+        self._phase_hook = None
+        self.handle = self._lib.idh_instance_create()
         if IDH_INVALID_HANDLE == self.handle:
             raise Exception("Failed to create IDH instance.")
 
+    def _phase_timer(self, name, items):
+        """lap() / stop() timer of one read/write/subscribe call, see pyidh.profiling"""
+        hook = self._phase_hook
+        return _NO_TIMER if hook is None else hook(name, items)
+
     def destroy(self):
         if IDH_INVALID_HANDLE != self.handle:
-            libidh.idh_instance_destroy(self.handle)
+            self._lib.idh_instance_destroy(self.handle)
             self.handle = IDH_INVALID_HANDLE
 
     def set_log_level(self, level):
@@ -470,7 +632,7 @@ class IDHLibrary:
         if not isinstance(level, IDH_LOG_LEVEL):
             raise TypeError("level must be IDH_LOG_LEVEL enum")
         
-        result = libidh.idh_set_log_level(level.value)
+        result = self._lib.idh_set_log_level(level.value)
         return result
 
     def get_log_level(self):
@@ -480,7 +642,7 @@ class IDHLibrary:
             IDH_LOG_LEVEL: 当前日志级别
         """
         level = c_int()
-        result = libidh.idh_get_log_level(byref(level))
+        result = self._lib.idh_get_log_level(byref(level))
         if result == 0:
             return IDH_LOG_LEVEL(level.value)
         else:
@@ -491,7 +653,7 @@ class IDHLibrary:
         if not isinstance(source_array, list) or not all(isinstance(x, idh_source_desc_t) for x in source_array):
             raise TypeError("source_array must be a list of idh_source_desc_t")
         array = (idh_source_desc_t * len(source_array))(*source_array)
-        result = libidh.idh_instance_discovery(
+        result = self._lib.idh_instance_discovery(
             self.handle,
             array,
             len(source_array),
@@ -508,7 +670,12 @@ class IDHLibrary:
         return result
 
     def create_source(self, source_type, source_schema, sample_timespan_msec, source_flag):
-        return libidh.idh_source_create(
+        """Create a source; a "sim://..." schema creates a simulated one (see pyidh.simulation)"""
+        if source_schema.startswith("sim://"):
+            from .simulation import get_simulator
+            # the router it installs sends sim:// schemas to the simulator
+            get_simulator(self, create=True)
+        return self._lib.idh_source_create(
             self.handle,
             source_type,
             source_schema.encode('utf-8'),
@@ -517,118 +684,193 @@ class IDHLibrary:
         )
 
     def is_source_valid(self, source):
-        return bool(libidh.idh_source_valid(source))
+        return bool(self._lib.idh_source_valid(source))
 
     def set_sync_cache_msec(self, source, msec):
         # 设置同步读模式(订阅时间为0)下的缓存有效窗口(毫秒), 默认100ms; 0=每次必读OPC
-        return libidh.idh_source_set_sync_cache_msec(source, msec)
+        return self._lib.idh_source_set_sync_cache_msec(source, msec)
 
     def get_sync_cache_msec(self, source):
         # 获取当前同步读缓存窗口(毫秒); 返回>=0为窗口值, 负值为错误码
-        return libidh.idh_source_get_sync_cache_msec(source)
+        return self._lib.idh_source_get_sync_cache_msec(source)
 
     def destroy_source(self, source):
-        libidh.idh_source_destroy(source)
+        self._lib.idh_source_destroy(source)
 
-    def read_values(self, source, tags):
-        tags_size = len(tags)
-        tag_array = (idh_tag_t * tags_size)()
-        for i, tag in enumerate(tags):
-            tag_array[i].data_type = tag['data_type']
-            tag_array[i].namespace_index = tag['namespace_index']
-            tag_array[i].tag_name = tag['tag_name'].encode('utf-8')
+    def read_values(self, source, tags, as_array=False):
+        """Read tag values from source.
+
+        as_array=True returns a zero-copy NumPy structured view
+        (see pyidh.arrays) instead of the ctypes idh_real_t array.
+        """
+        timer = self._phase_timer("read_values", len(tags))
+        tag_array, tags_size = make_tag_array(tags)
 
         values = (idh_real_t * tags_size)()
-        result = libidh.idh_source_readvalues(
+        timer.lap()
+        result = self.read_values_into(source, tag_array, values, tags_size)
+        timer.lap()
+        if as_array:
+            from .arrays import as_numpy
+            values = as_numpy(values)
+        timer.stop()
+        return result, values
+
+    def read_values_into(self, source, tag_array, values, tags_size):
+        """Read tag values into a caller-owned buffer, without allocating
+
+        Args:
+            source: source handle
+            tag_array: idh_tag_t array (e.g. TagSet.tag_array)
+            values: idh_real_t array receiving the values
+            tags_size: number of tags to read, <= len of both arrays
+
+        Returns:
+            int: error code
+        """
+        return self._lib.idh_source_readvalues(
             source,
             values,
             tag_array,
             tags_size
         )
-        return result, values
 
     def write_values(self, source, tags, values):
-        tags_size = len(tags)
-        tag_array = (idh_tag_t * tags_size)()
-        for i, tag in enumerate(tags):
-            tag_array[i].data_type = tag['data_type']
-            tag_array[i].namespace_index = tag['namespace_index']
-            tag_array[i].tag_name = tag['tag_name'].encode('utf-8')
+        timer = self._phase_timer("write_values", len(tags))
+        tag_array, tags_size = make_tag_array(tags)
 
         values_array = (c_double * tags_size)(*values)
         results = (c_int * tags_size)()
-        result = libidh.idh_source_writevalues(
+        timer.lap()
+        result = self.write_values_from(source, tag_array, values_array, results, tags_size)
+        timer.lap()
+        results = list(results)
+        timer.stop()
+        return result, results
+
+    def write_values_from(self, source, tag_array, values_array, results, tags_size):
+        """Write tag values from caller-owned buffers, without allocating
+
+        Args:
+            source: source handle
+            tag_array: idh_tag_t array
+            values_array: c_double array of values to write
+            results: c_int array receiving per-tag result codes
+            tags_size: number of tags to write, <= len of all arrays
+
+        Returns:
+            int: error code
+        """
+        return self._lib.idh_source_writevalues(
             source,
             results,
             values_array,
             tag_array,
             tags_size
         )
-        return result, list(results)
 
     def create_group(self, source, group_name):
-        return libidh.idh_group_create(
+        return self._lib.idh_group_create(
             source,
             group_name.encode('utf-8')
         )
 
     def clear_group(self, group):
-        libidh.idh_group_clear(group)
+        self._lib.idh_group_clear(group)
 
     def subscribe_group(self, group, tags):
-        tags_size = len(tags)
-        tag_array = (idh_tag_t * tags_size)()
-        for i, tag in enumerate(tags):
-            tag_array[i].data_type = tag['data_type']
-            tag_array[i].namespace_index = tag['namespace_index']
-            tag_array[i].tag_name = tag['tag_name'].encode('utf-8')
+        timer = self._phase_timer("subscribe_group", len(tags))
+        tag_array, tags_size = make_tag_array(tags)
 
         handles_or_errcode = (c_longlong * tags_size)()
-        result = libidh.idh_group_subscribe(
+        timer.lap()
+        result = self._lib.idh_group_subscribe(
             group,
             handles_or_errcode,
             tag_array,
             tags_size
         )
-        return result, list(handles_or_errcode)
+        timer.lap()
+        handles = list(handles_or_errcode)
+        timer.stop()
+        return result, handles
 
     def unsubscribe_group(self, group, handles):
-        tags_size = len(handles)
-        handles_array = (c_longlong * tags_size)(*handles)
-        libidh.idh_group_unsubscribe(
+        handles_array, tags_size = make_handle_array(handles)
+        self._lib.idh_group_unsubscribe(
             group,
             handles_array,
             tags_size
         )
 
-    def read_group_values(self, group, handles):
-        tags_size = len(handles)
-        handles_array = (c_longlong * tags_size)(*handles)
+    def read_group_values(self, group, handles, as_array=False):
+        """Read subscribed values; as_array=True returns a NumPy view (see read_values)"""
+        timer = self._phase_timer("read_group_values", len(handles))
+        handles_array, tags_size = make_handle_array(handles)
         values = (idh_real_t * tags_size)()
-        result = libidh.idh_group_readvalues(
+        timer.lap()
+        result = self.read_group_values_into(group, handles_array, values, tags_size)
+        timer.lap()
+        if as_array:
+            from .arrays import as_numpy
+            values = as_numpy(values)
+        timer.stop()
+        return result, values
+
+    def read_group_values_into(self, group, handles_array, values, tags_size):
+        """Read subscribed values into a caller-owned buffer, without allocating
+
+        Args:
+            group: group handle
+            handles_array: c_longlong array of subscribed handles
+            values: idh_real_t array receiving the values
+            tags_size: number of handles to read, <= len of both arrays
+
+        Returns:
+            int: error code
+        """
+        return self._lib.idh_group_readvalues(
             group,
             values,
             handles_array,
             tags_size
         )
-        return result, values
 
     def write_group_values(self, group, handles, values):
-        tags_size = len(handles)
-        handles_array = (c_longlong * tags_size)(*handles)
+        timer = self._phase_timer("write_group_values", len(handles))
+        handles_array, tags_size = make_handle_array(handles)
         values_array = (c_double * tags_size)(*values)
         results = (c_int * tags_size)()
-        result = libidh.idh_group_writevalues(
+        timer.lap()
+        result = self.write_group_values_from(group, handles_array, values_array, results, tags_size)
+        timer.lap()
+        results = list(results)
+        timer.stop()
+        return result, results
+
+    def write_group_values_from(self, group, handles_array, values_array, results, tags_size):
+        """Write values from caller-owned buffers, without allocating
+
+        Args:
+            group: group handle
+            handles_array: c_longlong array of subscribed handles
+            values_array: c_double array of values to write
+            results: c_int array receiving per-handle result codes
+            tags_size: number of handles to write, <= len of all arrays
+
+        Returns:
+            int: error code
+        """
+        return self._lib.idh_group_writevalues(
             group,
             results,
             values_array,
             handles_array,
             tags_size
         )
-        return result, list(results)
 
     def destroy_group(self, group):
-        libidh.idh_group_destroy(group)
+        self._lib.idh_group_destroy(group)
 
     def browse_source(self, source, max_items, parent_namespace_index=0, parent_node_name=None):
         """
@@ -651,7 +893,7 @@ class IDHLibrary:
         if parent_node_name:
             parent_name_bytes = parent_node_name.encode('utf-8')
         
-        result = libidh.idh_source_browse(
+        result = self._lib.idh_source_browse(
             source, 
             items_array, 
             byref(items_count),
@@ -676,6 +918,46 @@ class IDHLibrary:
         
         return result, items_list
 
+    def browse_into(self, source, items_array, capacity, parent_namespace_index=0, parent_node_name=None):
+        """Browse into a caller-owned idh_browse_item_t array
+
+        Returns:
+            tuple: (error code, items_count set by the library)
+        """
+        items_count = c_uint(capacity)
+        parent_name_bytes = parent_node_name.encode('utf-8') if parent_node_name else None
+        result = self._lib.idh_source_browse(
+            source,
+            items_array,
+            byref(items_count),
+            parent_namespace_index,
+            parent_name_bytes
+        )
+        return result, items_count.value
+
+    def browse_root_into(self, source, items_array, capacity):
+        """Browse the root into a caller-owned idh_browse_item_t array (see browse_into)"""
+        items_count = c_uint(capacity)
+        result = self._lib.idh_source_browse_root(source, items_array, byref(items_count))
+        return result, items_count.value
+
+    def iter_browse(self, source, parent_namespace_index=0, parent_node_name=None, page_items=256, max_items=1 << 16):
+        """Iterate over the children of a node without guessing max_items.
+
+        Browses into a reused per-thread buffer that grows while listings
+        fill it, and yields lazy BrowseItem views (see pyidh.browse).  The
+        error code is in the ``result`` attribute of the returned pager
+        once iterated.
+        """
+        from .browse import BrowsePager
+        return BrowsePager(self, source, parent_namespace_index, parent_node_name,
+                           page_items=page_items, max_items=max_items)
+
+    def iter_browse_root(self, source, page_items=256, max_items=1 << 16):
+        """Iterate over the root items, see iter_browse"""
+        from .browse import BrowsePager
+        return BrowsePager(self, source, root=True, page_items=page_items, max_items=max_items)
+
     def browse_source_root(self, source, max_items):
         """
         浏览OPC服务器根目录
@@ -691,7 +973,7 @@ class IDHLibrary:
         items_array = items_array_type()
         items_count = c_uint(max_items)
         
-        result = libidh.idh_source_browse_root(
+        result = self._lib.idh_source_browse_root(
             source, 
             items_array, 
             byref(items_count)
@@ -0,0 +1,248 @@
+"""Append-only, memory-mapped recording of idh_real_t streams.
+
+Samples are stored in segment files ``<prefix>-<segment>.idhrec``: a 64 byte
+header followed by fixed-size records (RECORD_DTYPE)::
+
+    int64  handle        group handle of the value
+    uint32 tag_id        caller-defined tag id (e.g. index in the tag list)
+    uint32 reserved
+    double value         \\ raw idh_real_t
+    uint64 time_quality  /
+
+Segments are preallocated and memory mapped, so recording is a few array
+copies into the map; the record count in the header is updated after the
+records are written.  RecordReader maps segments back as NumPy arrays
+without parsing or loading whole files.
+"""
+
+import mmap
+import os
+import re
+import time
+
+import numpy as np
+
+from .arrays import as_numpy
+
+RECORD_DTYPE = np.dtype([
+    ("handle", "<i8"),
+    ("tag_id", "<u4"),
+    ("reserved", "<u4"),
+    ("value", "<f8"),
+    ("time_quality", "<u8"),
+])
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("record_size", "<u4"),
+    ("capacity", "<u8"),
+    ("count", "<u8"),
+    ("created_ms", "<i8"),
+    ("segment", "<u8"),
+    ("reserved", "<u8", 2),
+])
+
+RECORDER_MAGIC = b"IDHREC\x00\x01"
+RECORDER_VERSION = 1
+SEGMENT_SUFFIX = ".idhrec"
+
+assert HEADER_DTYPE.itemsize == 64
+assert RECORD_DTYPE.itemsize == 32
+
+
+def segment_path(directory, prefix, segment):
+    return os.path.join(directory, f"{prefix}-{segment:08d}{SEGMENT_SUFFIX}")
+
+
+def list_segments(directory, prefix="idh"):
+    """Sorted (segment number, path) of the segments in ``directory``"""
+    pattern = re.compile(re.escape(prefix) + r"-(\d{8})" + re.escape(SEGMENT_SUFFIX) + "$")
+    segments = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            segments.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def read_header(path):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header["magic"][0] != RECORDER_MAGIC:
+        raise ValueError(f"{path} is not an idh record segment")
+    if header["version"][0] != RECORDER_VERSION or header["record_size"][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: unsupported segment version {header['version'][0]}")
+    return header[0]
+
+
+class Recorder:
+    """Appends records to segmented, memory-mapped files
+
+    A new segment is started when the current one holds ``segment_records``
+    records; recording never appends to segments of an earlier run.
+    Not thread-safe: use one Recorder per writer thread (or lock around it).
+
+    Args:
+        directory: output directory (created if missing)
+        segment_records: records per segment
+        prefix: segment file name prefix
+    """
+
+    def __init__(self, directory, segment_records=1 << 20, prefix="idh"):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_records = segment_records
+        existing = list_segments(directory, prefix)
+        self.segment = existing[-1][0] + 1 if existing else 0
+        self.total = 0
+        self._file = None
+        self._map = None
+        self._header = None
+        self._records = None
+        self._count = 0
+
+    @property
+    def path(self):
+        return segment_path(self.directory, self.prefix, self.segment)
+
+    def _open_segment(self):
+        size = HEADER_DTYPE.itemsize + self.segment_records * RECORD_DTYPE.itemsize
+        self._file = open(self.path, "w+b")
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._header = np.frombuffer(self._map, dtype=HEADER_DTYPE, count=1)
+        self._records = np.frombuffer(self._map, dtype=RECORD_DTYPE, offset=HEADER_DTYPE.itemsize)
+        self._header["magic"] = RECORDER_MAGIC
+        self._header["version"] = RECORDER_VERSION
+        self._header["record_size"] = RECORD_DTYPE.itemsize
+        self._header["capacity"] = self.segment_records
+        self._header["count"] = 0
+        self._header["created_ms"] = int(time.time() * 1000)
+        self._header["segment"] = self.segment
+        self._count = 0
+
+    def _close_segment(self):
+        """Flush and shrink the current segment to its records"""
+        if self._map is None:
+            return
+        self._header["capacity"] = self._count
+        # drop the array views before the map can be closed
+        self._header = self._records = None
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        self._file.truncate(HEADER_DTYPE.itemsize + self._count * RECORD_DTYPE.itemsize)
+        self._file.close()
+        self._file = None
+        self.segment += 1
+
+    def append(self, values, handles, tag_ids=0):
+        """Record one snapshot
+
+        Args:
+            values: idh_real_t array or IDH_REAL_DTYPE NumPy array
+            handles: handle per value (array, or a scalar for all)
+            tag_ids: tag id per value (array, or a scalar for all)
+
+        Returns:
+            int: number of records written
+        """
+        view = as_numpy(values)
+        count = len(view)
+        handles = np.broadcast_to(np.asarray(handles, dtype=np.int64), (count,))
+        tag_ids = np.broadcast_to(np.asarray(tag_ids, dtype=np.uint32), (count,))
+        written = 0
+        while written < count:
+            if self._map is None:
+                self._open_segment()
+            n = min(count - written, self.segment_records - self._count)
+            dst = slice(self._count, self._count + n)
+            src = slice(written, written + n)
+            # no view of the map may outlive this block, see _close_segment
+            self._records["handle"][dst] = handles[src]
+            self._records["tag_id"][dst] = tag_ids[src]
+            self._records["value"][dst] = view["value"][src]
+            self._records["time_quality"][dst] = view["time_quality"][src]
+            self._count += n
+            # publish the records only once they are written
+            self._header["count"] = self._count
+            written += n
+            if self._count == self.segment_records:
+                self._close_segment()
+        self.total += count
+        return count
+
+    def append_records(self, records):
+        """Record a RECORD_DTYPE array as is"""
+        records = np.asarray(records, dtype=RECORD_DTYPE)
+        written = 0
+        while written < len(records):
+            if self._map is None:
+                self._open_segment()
+            n = min(len(records) - written, self.segment_records - self._count)
+            self._records[self._count:self._count + n] = records[written:written + n]
+            self._count += n
+            self._header["count"] = self._count
+            written += n
+            if self._count == self.segment_records:
+                self._close_segment()
+        self.total += len(records)
+        return len(records)
+
+    def flush(self):
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self):
+        self._close_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RecordReader:
+    """Maps recorded segments back as read-only NumPy arrays
+
+    Segments are memory mapped on access; only the pages actually touched
+    are read from disk.  A segment still being written is mapped up to the
+    count published in its header.
+    """
+
+    def __init__(self, directory, prefix="idh"):
+        self.directory = directory
+        self.prefix = prefix
+        self.refresh()
+
+    def refresh(self):
+        """Rescan the directory for new segments"""
+        self.paths = [path for _, path in list_segments(self.directory, self.prefix)]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def segment(self, index):
+        """Records of segment ``index`` as a read-only memory-mapped array"""
+        path = self.paths[index]
+        count = int(read_header(path)["count"])
+        if count == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+    def __iter__(self):
+        for index in range(len(self.paths)):
+            yield self.segment(index)
+
+    @property
+    def count(self):
+        return sum(int(read_header(path)["count"]) for path in self.paths)
+
+    def read_all(self):
+        """All records concatenated in memory (copy)"""
+        segments = list(self)
+        if not segments:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.concatenate(segments)
@@ -0,0 +1,445 @@
+"""Capture of libidh calls and their replay.
+
+capture(idh, path) records every libidh call an IDHLibrary makes, with
+its arguments, the data it returned (values, handles, result codes,
+browse items), its result code and latency, into a ``.idhcap`` file.
+ReplayLib serves a capture back in place of libidh, sleeping the recorded
+latency times ``time_scale``, so a production workload can be re-run,
+profiled and compared without the servers::
+
+    with capture(idh, "prod.idhcap"):
+        run_workload(idh)
+
+    replayed = IDHLibrary(lib=ReplayLib("prod.idhcap", time_scale=1.0))
+    run_workload(replayed)
+
+Calls are matched per function and first handle, in recorded order: the
+n-th read of a group is answered with the n-th recorded read of that
+group.  Replayed sources and groups get their recorded handles.  The
+arguments of a replayed call are not compared with the recorded ones.
+
+File layout: a 32 byte header (magic, version, instance handle, creation
+time) followed by one zlib stream of length-prefixed call records.  Tag
+lists and handle arrays are stored once and referenced by id afterwards,
+so polling the same tags costs only the returned data.
+"""
+
+import collections
+import ctypes
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from .metrics import VOID_FUNCTIONS, InstrumentedLib, forget_cached_calls
+from .pyidh import IDH_ERRCODE, idh_browse_item_t, idh_real_t, idh_source_desc_t
+
+CAPTURE_MAGIC = b"IDHCAP\x00\x01"
+CAPTURE_VERSION = 1
+CAPTURE_SUFFIX = ".idhcap"
+
+# magic, version, reserved, instance handle, created (ms since epoch)
+_HEADER = struct.Struct("<8sIIqq")
+# record length, function id, thread, has result, start (s), latency (s), result
+_RECORD = struct.Struct("<IBHBddq")
+_INT = struct.Struct("<q")
+_UINT = struct.Struct("<I")
+_REF = struct.Struct("<IB")
+
+# argument kinds per function, in argument order:
+#   h  handle            i  integer          s  bytes or None
+#   n  item count of the arrays of the call
+#   tags         idh_tag_t array (stored once per distinct list)
+#   in_i64       handle array (stored once per distinct array)
+#   in_f64       values written
+#   out_real / out_i32 / out_i64   buffers filled by the call
+#   out_browse   browse items, count given by the ``count`` argument
+#   count        byref(c_uint): capacity in, items out
+#   out_desc     discovery results, count given by the result
+#   out_int      byref(c_int) set by the call
+CALL_SPECS = {
+    "idh_instance_create": (),
+    "idh_instance_destroy": ("h",),
+    "idh_set_log_level": ("i",),
+    "idh_get_log_level": ("out_int",),
+    "idh_instance_discovery": ("h", "out_desc", "i", "s", "i"),
+    "idh_source_create": ("h", "i", "s", "i", "i"),
+    "idh_source_valid": ("h",),
+    "idh_source_set_sync_cache_msec": ("h", "i"),
+    "idh_source_get_sync_cache_msec": ("h",),
+    "idh_source_destroy": ("h",),
+    "idh_source_readvalues": ("h", "out_real", "tags", "n"),
+    "idh_source_writevalues": ("h", "out_i32", "in_f64", "tags", "n"),
+    "idh_group_create": ("h", "s"),
+    "idh_group_clear": ("h",),
+    "idh_group_subscribe": ("h", "out_i64", "tags", "n"),
+    "idh_group_unsubscribe": ("h", "in_i64", "n"),
+    "idh_group_readvalues": ("h", "out_real", "in_i64", "n"),
+    "idh_group_writevalues": ("h", "out_i32", "in_f64", "in_i64", "n"),
+    "idh_group_destroy": ("h",),
+    "idh_source_browse": ("h", "out_browse", "count", "i", "s"),
+    "idh_source_browse_root": ("h", "out_browse", "count"),
+}
+FUNCTIONS = tuple(CALL_SPECS)
+_FUNCTION_IDS = {name: i for i, name in enumerate(FUNCTIONS)}
+
+_ITEM_SIZES = {
+    "out_real": ctypes.sizeof(idh_real_t),
+    "out_i32": 4,
+    "out_i64": 8,
+    "in_f64": 8,
+    "in_i64": 8,
+    "out_browse": ctypes.sizeof(idh_browse_item_t),
+    "out_desc": ctypes.sizeof(idh_source_desc_t),
+}
+
+_TAG_FIELDS = np.dtype([("data_type", "<u2"), ("namespace_index", "<u2")])
+
+CallRecord = collections.namedtuple("CallRecord", "function thread start latency result args")
+CallRecord.__doc__ = """One captured call: ``args`` is aligned with CALL_SPECS[function]
+(ints, bytes or None, raw bytes of the arrays, int64 arrays of handles,
+tag lists as (data_types, namespace_indexes, names)); ``start`` is seconds
+since the capture started, ``result`` None for void functions"""
+
+
+def _raw(buffer, size):
+    return ctypes.string_at(ctypes.addressof(buffer), size) if size else b""
+
+
+def _tag_list(tag_array, count):
+    """(data_types + namespace_indexes bytes, NUL-joined names) of a tag array"""
+    view = np.frombuffer(tag_array, dtype=np.dtype({
+        "names": ["data_type", "namespace_index", "tag_name"],
+        "formats": ["<u2", "<u2", np.uintp],
+        "offsets": [0, 2, ctypes.sizeof(ctypes.c_void_p)],
+        "itemsize": ctypes.sizeof(tag_array._type_),
+    }), count=count)
+    fields = np.empty(count, dtype=_TAG_FIELDS)
+    fields["data_type"] = view["data_type"]
+    fields["namespace_index"] = view["namespace_index"]
+    names = b"\0".join(ctypes.string_at(int(p)) for p in view["tag_name"])
+    return fields.tobytes(), names
+
+
+class CaptureLib:
+    """Proxy of the native library writing every call to ``path``
+
+    Args:
+        lib: library to wrap
+        path: capture file, overwritten
+        instance: instance handle, stored for the replay
+        flush_interval: seconds between two flushes of the zlib stream
+    """
+
+    def __init__(self, lib, path, instance=0, flush_interval=1.0):
+        self.lib = lib
+        self.path = path
+        self.flush_interval = flush_interval
+        self.calls = 0
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, 0, instance or 0, int(time.time() * 1000)))
+        self._zip = zlib.compressobj(6)
+        self._lock = threading.Lock()
+        self._threads = {}
+        # content -> id of the tag lists and handle arrays already stored
+        self._interned = {}
+        self._started = time.perf_counter()
+        self._flushed = self._started
+
+    def __getattr__(self, name):
+        function = getattr(self.lib, name)
+        spec = CALL_SPECS.get(name)
+        if spec is None:
+            return function
+        function_id = _FUNCTION_IDS[name]
+        clock = time.perf_counter
+
+        def call(*args):
+            started = clock()
+            result = function(*args)
+            latency = clock() - started
+            self._record(function_id, spec, args, result, started - self._started, latency)
+            return result
+
+        # cached: later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
+
+    def _intern(self, key, parts):
+        """Reference to ``parts`` (stored inline the first time)"""
+        ref = self._interned.get(key)
+        if ref is not None:
+            return [_REF.pack(ref, 0)]
+        ref = self._interned[key] = len(self._interned)
+        return [_REF.pack(ref, 1)] + [_UINT.pack(len(p)) + p for p in parts]
+
+    def _encode(self, spec, args, result):
+        count = next((args[i] for i, kind in enumerate(spec) if kind == "n"), 0)
+        parts = []
+        for kind, arg in zip(spec, args):
+            if kind in ("h", "i", "n"):
+                parts.append(_INT.pack(int(arg)))
+            elif kind == "s":
+                parts.append(_INT.pack(-1) if arg is None else _INT.pack(len(arg)) + arg)
+            elif kind == "count":
+                count = arg._obj.value
+                parts.append(_UINT.pack(count))
+            elif kind == "out_int":
+                parts.append(_INT.pack(arg._obj.value))
+            elif kind == "tags":
+                fields, names = _tag_list(arg, count)
+                parts += self._intern((b"t", fields, names), (fields, names))
+            elif kind == "in_i64":
+                data = _raw(arg, count * 8)
+                parts += self._intern((b"h", data), (data,))
+            elif kind == "out_desc":
+                data = _raw(arg, max(0, min(result, len(arg))) * _ITEM_SIZES[kind])
+                parts.append(_UINT.pack(len(data)) + data)
+            else:
+                data = _raw(arg, count * _ITEM_SIZES[kind])
+                parts.append(_UINT.pack(len(data)) + data)
+        return parts
+
+    def _record(self, function_id, spec, args, result, start, latency):
+        with self._lock:
+            if self._file is None:
+                return
+            thread = self._threads.setdefault(threading.get_ident(), len(self._threads))
+            # browse stores the item count first, it sizes the items
+            if "count" in spec:
+                order = _order(spec)
+                spec, args = [spec[i] for i in order], [args[i] for i in order]
+            body = b"".join(self._encode(spec, args, result))
+            header = _RECORD.pack(_RECORD.size - 4 + len(body), function_id, thread, result is not None,
+                                  start, latency, int(result or 0))
+            self._file.write(self._zip.compress(header + body))
+            self.calls += 1
+            now = time.perf_counter()
+            if now - self._flushed >= self.flush_interval:
+                self._flush_locked(now)
+
+    def _flush_locked(self, now):
+        self._file.write(self._zip.flush(zlib.Z_SYNC_FLUSH))
+        self._file.flush()
+        self._flushed = now
+
+    def flush(self):
+        """Make everything captured so far readable"""
+        with self._lock:
+            if self._file is not None:
+                self._flush_locked(time.perf_counter())
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.write(self._zip.flush())
+                self._file.close()
+                self._file = None
+
+
+class _Capture:
+    def __init__(self, idh, lib):
+        self.idh = idh
+        self.lib = lib
+
+    def close(self):
+        """Stop capturing and close the file"""
+        wrappers = []
+        lib = self.idh._lib
+        while lib is not self.lib and isinstance(lib, (InstrumentedLib, CaptureLib)):
+            wrappers.append(lib)
+            lib = lib.lib
+        if lib is self.lib:
+            if wrappers:
+                wrappers[-1].lib = lib.lib
+                # every wrapper above may hold closures ending at the capture
+                forget_cached_calls(wrappers)
+            else:
+                self.idh._lib = lib.lib
+        self.lib.close()
+
+    def __enter__(self):
+        return self.lib
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def capture(idh, path, flush_interval=1.0):
+    """Capture every libidh call of ``idh`` into ``path`` until close()
+
+    Returns:
+        handle whose close() (or a with block) stops the capture; the with
+        block yields the CaptureLib
+    """
+    lib = CaptureLib(idh._lib, path, idh.handle, flush_interval)
+    idh._lib = lib
+    return _Capture(idh, lib)
+
+
+def _order(spec):
+    """Indexes of ``spec`` in the order its fields are stored"""
+    return sorted(range(len(spec)), key=lambda i: spec[i] != "count")
+
+
+def read_capture(path):
+    """Decode a capture file
+
+    Returns:
+        tuple: (instance handle, list of CallRecord)
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{path} is not an idh capture")
+        magic, version, _, instance, _ = _HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not an idh capture")
+        if version != CAPTURE_VERSION:
+            raise ValueError(f"{path}: unsupported capture version {version}")
+        # a capture cut short (no close()) decodes up to its last flush
+        data = zlib.decompressobj().decompress(f.read())
+    interned = {}
+    records = []
+    offset = 0
+    while offset + _RECORD.size <= len(data):
+        length, function_id, thread, has_result, start, latency, result = _RECORD.unpack_from(data, offset)
+        end = offset + 4 + length
+        if end > len(data):
+            break
+        pos = offset + _RECORD.size
+        function = FUNCTIONS[function_id]
+        spec = CALL_SPECS[function]
+        args = [None] * len(spec)
+        count = 0
+        for index in _order(spec):
+            kind = spec[index]
+            if kind in ("h", "i", "n", "out_int"):
+                value, = _INT.unpack_from(data, pos)
+                pos += 8
+                if kind == "n":
+                    count = value
+            elif kind == "s":
+                size, = _INT.unpack_from(data, pos)
+                pos += 8
+                value = None if size < 0 else data[pos:pos + size]
+                pos += max(size, 0)
+            elif kind == "count":
+                value, = _UINT.unpack_from(data, pos)
+                pos += 4
+                count = value
+            elif kind in ("tags", "in_i64"):
+                ref, new = _REF.unpack_from(data, pos)
+                pos += _REF.size
+                if new:
+                    parts = []
+                    for _ in range(2 if kind == "tags" else 1):
+                        size, = _UINT.unpack_from(data, pos)
+                        parts.append(data[pos + 4:pos + 4 + size])
+                        pos += 4 + size
+                    if kind == "tags":
+                        fields = np.frombuffer(parts[0], dtype=_TAG_FIELDS)
+                        names = [n.decode("utf-8") for n in parts[1].split(b"\0")] if len(fields) else []
+                        interned[ref] = (fields["data_type"].tolist(), fields["namespace_index"].tolist(), names)
+                    else:
+                        interned[ref] = np.frombuffer(parts[0], dtype=np.int64)
+                value = interned[ref]
+            else:
+                size, = _UINT.unpack_from(data, pos)
+                value = data[pos + 4:pos + 4 + size]
+                pos += 4 + size
+            args[index] = value
+        records.append(CallRecord(function, thread, start, latency, result if has_result else None, tuple(args)))
+        offset = end
+    return instance, records
+
+
+class ReplayLib:
+    """Serves a capture in place of the native library
+
+    Args:
+        path: capture file
+        time_scale: recorded latency multiplier (0: answer at once)
+        strict: raise RuntimeError when a call has no recorded call left;
+            otherwise the recorded calls of that function and handle are
+            served again from the first one
+
+    Attributes:
+        replayed: calls answered
+        missing: calls without any recorded counterpart
+    """
+
+    def __init__(self, path, time_scale=1.0, strict=False):
+        self.time_scale = time_scale
+        self.strict = strict
+        self.instance, records = read_capture(path)
+        self.records = records
+        self._queues = collections.defaultdict(list)
+        for record in records:
+            self._queues[_key(record.function, record.args)].append(record)
+        self._positions = collections.Counter()
+        self._lock = threading.Lock()
+        self.replayed = 0
+        self.missing = 0
+
+    def __getattr__(self, name):
+        spec = CALL_SPECS.get(name)
+        if spec is None:
+            raise AttributeError(name)
+
+        def call(*args):
+            return self._replay(name, spec, args)
+
+        setattr(self, name, call)
+        return call
+
+    def _next(self, name, args):
+        key = _key(name, args)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                return None
+            position = self._positions[key]
+            if position >= len(queue):
+                if self.strict:
+                    raise RuntimeError(f"no recorded {name} left for handle {key[1]}")
+                position = 0
+            self._positions[key] = position + 1
+            self.replayed += 1
+            return queue[position]
+
+    def _replay(self, name, spec, args):
+        record = self._next(name, args)
+        if record is None:
+            # the instance is created before capture() can wrap the library
+            if name == "idh_instance_create":
+                return self.instance
+            if name == "idh_instance_destroy":
+                return None
+            with self._lock:
+                self.missing += 1
+            if self.strict:
+                raise RuntimeError(f"{name} was not recorded")
+            return None if name in VOID_FUNCTIONS else IDH_ERRCODE.IDH_ERRCODE_FAILED.value
+        if self.time_scale and record.latency > 0:
+            time.sleep(record.latency * self.time_scale)
+        count = next((args[i] for i, kind in enumerate(spec) if kind == "n"), 0)
+        for kind, arg, recorded in zip(spec, args, record.args):
+            if kind == "count":
+                arg._obj.value = count = min(arg._obj.value, recorded)
+        for kind, arg, data in zip(spec, args, record.args):
+            if kind == "out_int":
+                arg._obj.value = data
+            elif kind in ("out_real", "out_i32", "out_i64", "out_browse", "out_desc"):
+                limit = len(arg) if kind == "out_desc" else count
+                size = min(len(data), limit * _ITEM_SIZES[kind])
+                if size:
+                    ctypes.memmove(ctypes.addressof(arg), data, size)
+        return record.result
+
+
+def _key(function, args):
+    """Calls are replayed in order per function and first handle"""
+    return function, (args[0] if CALL_SPECS[function][:1] == ("h",) else None)
@@ -0,0 +1,259 @@
+"""Drift-free periodic sampling scheduler.
+
+Every job runs on a fixed grid of the monotonic clock (multiples of its
+period), so a slow read never pushes later samples back the way a
+``time.sleep(period)`` loop does.  Jobs with different periods share one
+scheduler thread and a worker pool.
+
+When a read is still running at its next grid slot (an overrun) the job's
+policy decides what happens:
+
+- ``"skip"``: the slot is dropped and counted in ``JobStats.skipped``.
+- ``"catchup"``: the slot is queued and run as soon as the previous read
+  finishes, until the job is back on the grid.  At most ``max_backlog``
+  slots are queued; older ones are dropped and counted as skipped.
+"""
+
+import collections
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .group import GroupReader
+
+OVERRUN_SKIP = "skip"
+OVERRUN_CATCHUP = "catchup"
+
+SampleRecord = namedtuple("SampleRecord", ["job", "scheduled", "started", "finished", "result", "values", "error"])
+SampleRecord.__doc__ = """One executed sample
+
+    job: job name
+    scheduled: monotonic time of the grid slot
+    started / finished: monotonic times the read actually started / finished
+    result, values: return value of the read, (None, None) if it raised
+    error: exception raised by the read, or None
+"""
+
+
+class JobStats:
+    """Counters of a job; lateness is started - scheduled, in seconds"""
+
+    __slots__ = ("runs", "late", "skipped", "errors", "max_lateness", "total_lateness")
+
+    def __init__(self):
+        self.runs = 0
+        self.late = 0
+        self.skipped = 0
+        self.errors = 0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+
+    @property
+    def missed(self):
+        """Deadlines missed: late runs plus skipped slots"""
+        return self.late + self.skipped
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ + ("missed",)}
+
+
+class SampleJob:
+    """A periodic read registered with SampleScheduler"""
+
+    def __init__(self, name, read, period, callback, overrun, tolerance, offset, keep, max_backlog):
+        if overrun not in (OVERRUN_SKIP, OVERRUN_CATCHUP):
+            raise ValueError(f"overrun must be {OVERRUN_SKIP!r} or {OVERRUN_CATCHUP!r}")
+        self.name = name
+        self.read = read
+        self.period = period
+        self.callback = callback
+        self.overrun = overrun
+        self.tolerance = tolerance
+        self.offset = offset
+        self.stats = JobStats()
+        self.history = collections.deque(maxlen=keep)
+        self.running = False
+        self.backlog = collections.deque(maxlen=max(1, max_backlog))
+        self.cancelled = False
+
+    def first_slot(self, now):
+        """First grid slot at or after ``now``"""
+        return math.ceil((now - self.offset) / self.period) * self.period + self.offset
+
+
+class SampleScheduler:
+    """Runs periodic reads on a monotonic-clock grid
+
+    Can be started again after stop().
+
+    Args:
+        max_workers: size of the pool executing the reads
+        clock: monotonic clock, in seconds
+    """
+
+    def __init__(self, max_workers=4, clock=time.monotonic):
+        self.clock = clock
+        self.max_workers = max_workers
+        # created by start(), shut down by stop()
+        self._executor = None
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def add_job(self, name, read, period_ms, callback=None, overrun=OVERRUN_SKIP,
+                tolerance_ms=None, offset_ms=0, keep=0, max_backlog=4):
+        """Run ``read()`` every ``period_ms``
+
+        Args:
+            name: unique job name
+            read: callable returning (error code, values), e.g. GroupReader.read
+            period_ms: grid period, normally the source sample_timespan_msec
+            callback: called with a SampleRecord after every read (worker thread)
+            overrun: OVERRUN_SKIP or OVERRUN_CATCHUP
+            tolerance_ms: a run starting later than this is counted late
+                (default: 10% of the period)
+            offset_ms: phase of the grid, slots are at k * period + offset
+            keep: number of recent SampleRecords kept in job.history
+            max_backlog: most overrun slots queued under OVERRUN_CATCHUP
+
+        Returns:
+            SampleJob
+        """
+        period = period_ms / 1000.0
+        tolerance = period * 0.1 if tolerance_ms is None else tolerance_ms / 1000.0
+        job = SampleJob(name, read, period, callback, overrun, tolerance, offset_ms / 1000.0, keep, max_backlog)
+        with self._cond:
+            if name in self._jobs:
+                raise ValueError(f"job {name!r} already exists")
+            self._jobs[name] = job
+            self._push(job.first_slot(self.clock()), job)
+            self._cond.notify()
+        return job
+
+    def add_group(self, name, idh, group, handles, period_ms, as_array=False, **kwargs):
+        """Sample a subscribed group through a GroupReader (see add_job)
+
+        The reader is double-buffered: values in a record stay valid until
+        the read after next.
+        """
+        reader = GroupReader(idh, group, handles)
+        return self.add_job(name, lambda: reader.read(as_array), period_ms, **kwargs)
+
+    def remove_job(self, name):
+        with self._cond:
+            job = self._jobs.pop(name)
+            job.cancelled = True
+            job.backlog.clear()
+
+    def job(self, name):
+        return self._jobs[name]
+
+    def stats(self):
+        """Stats of every job, as dict name -> dict"""
+        with self._cond:
+            return {name: job.stats.as_dict() for name, job in self._jobs.items()}
+
+    def _push(self, slot, job):
+        heapq.heappush(self._heap, (slot, next(self._seq), job))
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            if self._heap:
+                # restarted: resume on the grid instead of replaying the slots missed while stopped
+                now = self.clock()
+                self._heap = []
+                for job in self._jobs.values():
+                    self._push(job.first_slot(now), job)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="idh-sample")
+            self._thread = threading.Thread(target=self._run, name="idh-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True):
+        """Stop scheduling; running reads are finished if ``wait``"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+            executor, self._executor = self._executor, None
+        if thread is not None:
+            thread.join()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run(self):
+        with self._cond:
+            while not self._stopping:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                slot, _, job = self._heap[0]
+                delay = slot - self.clock()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                self._push(slot + job.period, job)
+                if not job.running:
+                    job.running = True
+                    self._executor.submit(self._execute, job, slot)
+                elif job.overrun == OVERRUN_CATCHUP:
+                    if len(job.backlog) == job.backlog.maxlen:
+                        # the oldest queued slot is dropped
+                        job.stats.skipped += 1
+                    job.backlog.append(slot)
+                else:
+                    job.stats.skipped += 1
+
+    def _execute(self, job, slot):
+        while True:
+            started = self.clock()
+            try:
+                result, values = job.read()
+                error = None
+            except Exception as e:
+                result, values, error = None, None, e
+            record = SampleRecord(job.name, slot, started, self.clock(), result, values, error)
+            lateness = started - slot
+            with self._cond:
+                stats = job.stats
+                stats.runs += 1
+                stats.total_lateness += lateness
+                if lateness > stats.max_lateness:
+                    stats.max_lateness = lateness
+                if lateness > job.tolerance:
+                    stats.late += 1
+                if error is not None:
+                    stats.errors += 1
+                if job.history.maxlen:
+                    job.history.append(record)
+            if job.callback is not None:
+                try:
+                    job.callback(record)
+                except Exception:
+                    # a failing consumer must not stop the sampling
+                    with self._cond:
+                        job.stats.errors += 1
+            with self._cond:
+                if not job.backlog or self._stopping:
+                    job.running = False
+                    return
+                slot = job.backlog.popleft()
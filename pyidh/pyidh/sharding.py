@@ -0,0 +1,195 @@
+"""One logical group spread over several native groups.
+
+Subscribing or reading 100k+ tags in one group makes one huge blocking
+call that can exceed server per-request limits.  ShardedGroup splits the
+tag list into shards (by size, optionally per namespace), gives each shard
+its own native group, subscribes them in parallel and fans reads and
+writes out over a thread pool.  Results are merged back into the original
+tag order: each shard reads straight into its slice of one result buffer
+when the shards are contiguous ranges, otherwise the values are scattered
+into place with one NumPy assignment.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import c_double, c_int
+
+import numpy as np
+
+from .arrays import IDH_REAL_DTYPE
+from .pyidh import IDH_INVALID_HANDLE, TagSet, idh_real_t, make_handle_array
+
+
+def plan_shards(namespace_indexes, shard_size, by_namespace=False):
+    """Split tag positions into shards
+
+    Args:
+        namespace_indexes: namespace index of every tag
+        shard_size: most tags per shard
+        by_namespace: never mix namespaces in one shard
+
+    Returns:
+        list: int64 arrays of tag positions, ascending within each shard
+    """
+    if shard_size <= 0:
+        raise ValueError("shard_size must be positive")
+    positions = np.arange(len(namespace_indexes), dtype=np.int64)
+    if by_namespace:
+        namespaces = np.asarray(namespace_indexes)
+        runs = [positions[namespaces == ns] for ns in np.unique(namespaces)]
+    else:
+        runs = [positions]
+    return [run[start:start + shard_size] for run in runs for start in range(0, len(run), shard_size)]
+
+
+class _Shard:
+    __slots__ = ("group", "positions", "handles_array", "count", "values", "values_array", "write_values",
+                 "results", "result")
+
+    def __init__(self, group, positions):
+        self.group = group
+        self.positions = positions
+        self.count = len(positions)
+        self.handles_array = None
+        self.values = None
+        self.values_array = None
+        self.write_values = None
+        self.results = None
+        self.result = None
+
+
+class ShardedGroup:
+    """Subscribes ``tags`` of ``source`` across native groups of ``shard_size``
+
+    The shards are subscribed on construction.  Use one ShardedGroup from
+    one thread at a time (its shards are read concurrently internally).
+
+    Args:
+        idh: IDHLibrary
+        source: source handle
+        name: group name; shard groups are named "<name>#<i>"
+        tags: TagSet or list of tag dicts
+        shard_size: most tags per native group
+        by_namespace: never mix namespaces in one group
+        max_workers: concurrent native calls
+
+    Attributes:
+        handles: int64 array of the handle (or error code) of every tag,
+            in the original order
+        result: lowest error code of the shard subscriptions
+    """
+
+    def __init__(self, idh, source, name, tags, shard_size=10000, by_namespace=False, max_workers=8):
+        self.idh = idh
+        self.source = source
+        self.name = name
+        tags = tags if isinstance(tags, TagSet) else TagSet(tags)
+        self.count = len(tags)
+        plans = plan_shards(tags.namespace_indexes, shard_size, by_namespace)
+        # contiguous shards read straight into slices of the result buffer
+        self.contiguous = all(p[-1] - p[0] + 1 == len(p) for p in plans) and \
+            all(a[-1] + 1 == b[0] for a, b in zip(plans, plans[1:]))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plans))),
+                                            thread_name_prefix="idh-shard")
+        self.shards = []
+        for i, positions in enumerate(plans):
+            group = idh.create_group(source, f"{name}#{i}")
+            if group == IDH_INVALID_HANDLE.value:
+                self._discard()
+                raise RuntimeError(f"Failed to create group {name}#{i}")
+            self.shards.append(_Shard(group, positions))
+        self.handles = np.empty(self.count, dtype=np.int64)
+        self.values_array = (idh_real_t * self.count)()
+        self.values = np.frombuffer(self.values_array, dtype=IDH_REAL_DTYPE) if self.count else \
+            np.zeros(0, dtype=IDH_REAL_DTYPE)
+        self.results = np.zeros(self.count, dtype=np.int32)
+        try:
+            subscriptions = self._map(lambda shard: idh.subscribe_group(shard.group, tags.subset(shard.positions)))
+        except BaseException:
+            self._discard()
+            raise
+        offset = 0
+        for shard, (result, handles) in zip(self.shards, subscriptions):
+            shard.result = result
+            self.handles[shard.positions] = handles
+            shard.handles_array, _ = make_handle_array(handles)
+            if self.contiguous:
+                shard.values_array = (idh_real_t * shard.count).from_buffer(self.values_array,
+                                                                          offset * IDH_REAL_DTYPE.itemsize)
+            else:
+                shard.values_array = (idh_real_t * shard.count)()
+            shard.values = np.frombuffer(shard.values_array, dtype=IDH_REAL_DTYPE)
+            offset += shard.count
+        self.result = min((s.result for s in self.shards), default=0)
+
+    def _discard(self):
+        """Destroy the shard groups of a failed construction"""
+        for shard in self.shards:
+            self.idh.destroy_group(shard.group)
+        self._executor.shutdown()
+
+    def _map(self, fn):
+        if len(self.shards) == 1:
+            return [fn(self.shards[0])]
+        return list(self._executor.map(fn, self.shards))
+
+    def __len__(self):
+        return self.count
+
+    def _read_shard(self, shard):
+        shard.result = self.idh.read_group_values_into(shard.group, shard.handles_array, shard.values_array,
+                                                       shard.count)
+        return shard.result
+
+    def read(self, as_array=False):
+        """Read every shard in parallel into the merged buffer
+
+        The buffer is reused by the next read.
+
+        Returns:
+            tuple: (lowest shard error code, idh_real_t array or NumPy view
+            in the original tag order)
+        """
+        result = min(self._map(self._read_shard), default=0)
+        if not self.contiguous:
+            for shard in self.shards:
+                self.values[shard.positions] = shard.values
+        return result, (self.values if as_array else self.values_array)
+
+    def _write_shard(self, shard):
+        shard.result = self.idh.write_group_values_from(shard.group, shard.handles_array, shard.write_values,
+                                                        shard.results, shard.count)
+        return shard.result
+
+    def write(self, values):
+        """Write one value per tag (original order), shards in parallel
+
+        Returns:
+            tuple: (lowest shard error code, int32 array of per-tag result
+            codes in the original order, reused by the next write)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) != self.count:
+            raise ValueError(f"expected {self.count} values, got {len(values)}")
+        for shard in self.shards:
+            if shard.results is None:
+                shard.write_values = (c_double * shard.count)()
+                shard.results = (c_int * shard.count)()
+            np.frombuffer(shard.write_values, dtype=np.float64)[:] = values[shard.positions]
+        result = min(self._map(self._write_shard), default=0)
+        for shard in self.shards:
+            self.results[shard.positions] = np.frombuffer(shard.results, dtype=np.int32)
+        return result, self.results
+
+    def close(self):
+        """Unsubscribe and destroy the shard groups"""
+        for shard in self.shards:
+            self.idh.unsubscribe_group(shard.group, shard.handles_array)
+            self.idh.destroy_group(shard.group)
+        self.shards = []
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,513 @@
+"""Simulated sources for offline load tests.
+
+``IDHLibrary.create_source`` with a ``sim://`` schema creates a simulated
+source instead of connecting to a server; every other call on it (reads,
+writes, groups, browse) is answered by SimulatedLib in Python, so
+pollers, schedulers, batch sizes and thread pools can be sized without a
+UA/DA server.  Native sources keep working next to simulated ones.
+
+The schema configures the simulation::
+
+    sim://plant?tags=100000&branching=1000&latency=0.005&jitter=0.002
+        &error_rate=0.01&errors=TIMEOUT,BADQUANLITY&bad_quality=0.02
+
+Address space: the root object ``<name>`` holds ``tags / branching``
+folder objects ``<name>.F<f>``, holding the variables ``<name>.F<f>.T<i>``
+(namespace ``ns``, REAL, readable and writable).
+
+Values follow per tag waveforms (sine, sawtooth, square, triangle,
+noise) of the wall clock; a written value holds until the next write.
+Tags go uncertain / bad for ``quality_period`` seconds at a time, with
+probabilities ``uncertain_quality`` / ``bad_quality``.
+
+Every call sleeps ``latency + per_item * items`` plus a ``jitter``
+sample (``distribution``: uniform, normal or exponential) and at most
+``concurrency`` calls per source run at once.  A call fails with one of
+``errors`` (names of IDH_ERRCODE, with or without the IDH_ERROR_ /
+IDH_ERRCODE_ prefix) with probability ``error_rate``; a TIMEOUT takes
+``timeout`` seconds.  Calls over ``max_items`` items fail with
+IDH_ERROR_EXCDLEN.  The source is invalid for ``outage_for`` seconds
+every ``outage_every`` seconds.
+"""
+
+import math
+import random
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from .arrays import IDH_REAL_DTYPE
+from .pyidh import IDH_DATATYPE, IDH_ERRCODE, IDH_INVALID_HANDLE, IDH_NODETYPE, IDH_QUALITY, idh_real_t
+
+SIM_SCHEME = "sim://"
+
+# simulated source and group handles start here, above any native handle
+SIM_HANDLE_BASE = 1 << 56
+
+# tag handles of simulated groups: tag index + offset
+TAG_HANDLE_OFFSET = 1 << 32
+
+QUALITY_GOOD = IDH_QUALITY.IDH_HIGH_GOOD.value | IDH_QUALITY.IDH_LOW_GOOD_NORMAL.value
+QUALITY_UNCERTAIN = IDH_QUALITY.IDH_HIGH_UNCERTAIN.value | IDH_QUALITY.IDH_LOW_UNCERTAIN_LASTVALUE.value
+QUALITY_BAD = IDH_QUALITY.IDH_HIGH_BAD.value | IDH_QUALITY.IDH_LOW_INVALID_COMM.value
+QUALITY_NOHANDLE = IDH_QUALITY.IDH_HIGH_INVALID.value | IDH_QUALITY.IDH_LOW_INVALID_HANDLE.value
+
+# milliseconds between the Unix epoch and 2000-01-01, the time_quality base
+_EPOCH_2000_MS = 946684800000
+
+_TIMEOUT = IDH_ERRCODE.IDH_ERROR_TIMEOUT.value
+
+DEFAULTS = {
+    "tags": 1000,
+    "branching": 100,
+    "ns": 2,
+    "seed": 0,
+    "latency": 0.0,
+    "per_item": 0.0,
+    "jitter": 0.0,
+    "distribution": "uniform",
+    "concurrency": 0,
+    "error_rate": 0.0,
+    "errors": "TIMEOUT",
+    "timeout": 0.0,
+    "max_items": 0,
+    "bad_quality": 0.0,
+    "uncertain_quality": 0.0,
+    "quality_period": 30.0,
+    "outage_every": 0.0,
+    "outage_for": 0.0,
+}
+
+_NON_NEGATIVE = ("latency", "per_item", "jitter", "concurrency", "error_rate", "timeout", "max_items",
+                 "bad_quality", "uncertain_quality", "outage_every", "outage_for")
+
+
+def error_code(name):
+    """IDH_ERRCODE value of ``name`` ("TIMEOUT", "IDH_ERROR_TIMEOUT", "-2130640888")"""
+    name = name.strip().upper()
+    for candidate in (name, "IDH_ERROR_" + name, "IDH_ERRCODE_" + name):
+        if candidate in IDH_ERRCODE.__members__:
+            return IDH_ERRCODE[candidate].value
+    try:
+        return int(name, 0)
+    except ValueError:
+        raise ValueError(f"unknown error code {name!r}") from None
+
+
+def parse_schema(schema):
+    """Settings of a ``sim://name?key=value&...`` schema, DEFAULTS filled in
+
+    Returns:
+        dict: settings, ``name`` the root object name
+    """
+    if not schema.startswith(SIM_SCHEME):
+        raise ValueError(f"not a simulation schema: {schema}")
+    parts = urlsplit(schema)
+    settings = dict(DEFAULTS)
+    settings["name"] = parts.netloc or "Sim"
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        if key not in DEFAULTS:
+            raise ValueError(f"unknown simulation setting {key!r}")
+        default = DEFAULTS[key]
+        settings[key] = type(default)(value) if not isinstance(default, str) else value
+    if settings["tags"] < 0 or settings["branching"] <= 0:
+        raise ValueError("expected tags >= 0 and branching > 0")
+    if settings["quality_period"] <= 0:
+        raise ValueError("expected quality_period > 0")
+    for key in _NON_NEGATIVE:
+        if settings[key] < 0:
+            raise ValueError(f"expected {key} >= 0")
+    if settings["distribution"] not in ("uniform", "normal", "exponential"):
+        raise ValueError(f"unknown latency distribution {settings['distribution']!r}")
+    settings["error_codes"] = [error_code(e) for e in settings["errors"].split(",") if e.strip()]
+    return settings
+
+
+def _mix(a, b):
+    """Uniform [0, 1) pseudo random numbers from two uint64 arrays (splitmix64)"""
+    with np.errstate(over="ignore"):
+        x = a * np.uint64(0x9E3779B97F4A7C15) + b * np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(31)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(29)
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+class SimulatedSource:
+    """State of one simulated source; see the module docstring for the model"""
+
+    def __init__(self, settings, sample_timespan_msec):
+        self.settings = settings
+        self.name = settings["name"]
+        self.tags = settings["tags"]
+        self.branching = settings["branching"]
+        self.namespace_index = settings["ns"]
+        self.sample_timespan_msec = sample_timespan_msec
+        self.sync_cache_msec = 100
+        self.valid = True
+        self.random = random.Random(settings["seed"])
+        self.written = {}
+        self.calls = 0
+        self.injected = []
+        self._semaphore = threading.BoundedSemaphore(settings["concurrency"]) if settings["concurrency"] else None
+        self._lock = threading.Lock()
+        self._index = {}
+
+    # address space
+
+    def tag_name(self, index):
+        return f"{self.name}.F{index // self.branching}.T{index}"
+
+    def tag_index(self, namespace_index, tag_name):
+        """Index of a tag, or -1 if the source has no such tag"""
+        index = self._index.get(tag_name)
+        if index is None:
+            index = -1
+            folder, _, number = tag_name.rpartition(".T")
+            if number.isdigit() and int(number) < self.tags and folder == f"{self.name}.F{int(number) // self.branching}":
+                index = int(number)
+            if len(self._index) < 1 << 20:
+                self._index[tag_name] = index
+        return index if namespace_index == self.namespace_index else -1
+
+    def folders(self):
+        return math.ceil(self.tags / self.branching)
+
+    def children(self, parent):
+        """(node_name, node_type) of the children of ``parent`` (None: root)"""
+        if parent is None:
+            return [(self.name, IDH_NODETYPE.IDH_NODETYPE_OBJECT)]
+        if parent == self.name:
+            return [(f"{self.name}.F{f}", IDH_NODETYPE.IDH_NODETYPE_OBJECT) for f in range(self.folders())]
+        prefix = f"{self.name}.F"
+        if parent.startswith(prefix) and parent[len(prefix):].isdigit():
+            folder = int(parent[len(prefix):])
+            first = folder * self.branching
+            return [(self.tag_name(i), IDH_NODETYPE.IDH_NODETYPE_VARIABLE)
+                    for i in range(first, min(first + self.branching, self.tags))]
+        return []
+
+    # values
+
+    def values(self, indexes, now, out):
+        """Fill ``out`` (IDH_REAL_DTYPE) with the values of ``indexes`` at ``now``"""
+        valid = indexes >= 0
+        index = np.where(valid, indexes, 0).astype(np.uint64)
+        signed = index.astype(np.float64)
+        period = 10.0 + (index % np.uint64(17)).astype(np.float64) * 5.0
+        phase = (signed * 0.618034) % 1.0
+        x = (now / period + phase) % 1.0
+        kind = index % np.uint64(5)
+        wave = np.select(
+            [kind == 0, kind == 1, kind == 2, kind == 3],
+            [np.sin(2 * np.pi * x), 2.0 * x - 1.0, np.where(x < 0.5, 1.0, -1.0), 1.0 - 4.0 * np.abs(x - 0.5)],
+            default=_mix(index, np.uint64(int(now * 10))) * 2.0 - 1.0,
+        )
+        value = (index % np.uint64(1000)).astype(np.float64) + (1.0 + (index % np.uint64(100)).astype(np.float64)) * wave
+        if self.written:
+            with self._lock:
+                written = dict(self.written)
+            for position in np.flatnonzero(np.isin(indexes, np.fromiter(written, dtype=np.int64))):
+                value[position] = written[int(indexes[position])]
+
+        settings = self.settings
+        quality = np.full(len(indexes), QUALITY_GOOD, dtype=np.uint64)
+        bad, uncertain = settings["bad_quality"], settings["uncertain_quality"]
+        if bad or uncertain:
+            draw = _mix(index, np.uint64(int(now / settings["quality_period"])) + np.uint64(settings["seed"]))
+            quality[draw < bad + uncertain] = QUALITY_UNCERTAIN
+            quality[draw < bad] = QUALITY_BAD
+        quality[~valid] = QUALITY_NOHANDLE
+        value[~valid] = 0.0
+        timestamp = np.uint64(max(int(now * 1000) - _EPOCH_2000_MS, 0)) & np.uint64(idh_real_t.IDH_TQ_TIME_MASK)
+        out["value"] = value
+        out["time_quality"] = (quality << np.uint64(idh_real_t.IDH_TQ_QUALITY_SHIFT)) | timestamp
+
+    def write(self, indexes, values):
+        with self._lock:
+            for index, value in zip(indexes, values):
+                if index >= 0:
+                    self.written[int(index)] = float(value)
+
+    # call behaviour
+
+    def is_valid(self, now=None):
+        settings = self.settings
+        if not self.valid:
+            return False
+        if settings["outage_every"] and settings["outage_for"]:
+            now = time.time() if now is None else now
+            return now % settings["outage_every"] >= settings["outage_for"]
+        return True
+
+    def call(self, items, fn):
+        """Run ``fn()`` (returning an error code) as one server call of ``items``"""
+        if self._semaphore is not None:
+            with self._semaphore:
+                return self._call(items, fn)
+        return self._call(items, fn)
+
+    def _call(self, items, fn):
+        settings = self.settings
+        rng = self.random
+        with self._lock:
+            self.calls += 1
+            injected = self.injected.pop(0) if self.injected else None
+        delay = settings["latency"] + settings["per_item"] * items
+        jitter = settings["jitter"]
+        if jitter:
+            distribution = settings["distribution"]
+            if distribution == "uniform":
+                delay += rng.uniform(-jitter, jitter)
+            elif distribution == "normal":
+                delay += rng.gauss(0.0, jitter)
+            else:
+                delay += rng.expovariate(1.0 / jitter)
+        if injected is None and settings["error_rate"] and settings["error_codes"] and \
+                rng.random() < settings["error_rate"]:
+            injected = rng.choice(settings["error_codes"])
+        if injected == _TIMEOUT:
+            delay = max(delay, settings["timeout"])
+        if delay > 0:
+            time.sleep(delay)
+        if injected is not None:
+            return injected
+        if not self.is_valid():
+            return IDH_ERRCODE.IDH_ERRCODE_INVALIDSERVER.value
+        if settings["max_items"] and items > settings["max_items"]:
+            return IDH_ERRCODE.IDH_ERROR_EXCDLEN.value
+        return fn()
+
+
+class SimulatedLib:
+    """The libidh functions IDHLibrary calls, for simulated handles"""
+
+    def __init__(self):
+        self.sources = {}
+        # group handle -> source handle
+        self.groups = {}
+        self._next = SIM_HANDLE_BASE
+        self._lock = threading.Lock()
+
+    def _handle(self):
+        with self._lock:
+            self._next += 1
+            return self._next
+
+    def source(self, handle):
+        """SimulatedSource of a source or group handle"""
+        return self.sources[self.groups.get(handle, handle)]
+
+    def inject(self, handle, code, calls=1):
+        """Fail the next ``calls`` calls of a source (or its groups) with ``code``"""
+        source = self.source(handle)
+        with source._lock:
+            source.injected.extend([code] * calls)
+
+    def set_valid(self, handle, valid):
+        """Take a source down (False) or bring it back"""
+        self.source(handle).valid = valid
+
+    # sources
+
+    def idh_source_create(self, instance, source_type, schema, sample_timespan_msec, flags):
+        settings = parse_schema(schema.decode("utf-8"))
+        handle = self._handle()
+        self.sources[handle] = SimulatedSource(settings, sample_timespan_msec)
+        return handle
+
+    def idh_source_valid(self, source):
+        return int(source in self.sources and self.sources[source].is_valid())
+
+    def idh_source_set_sync_cache_msec(self, source, msec):
+        self.sources[source].sync_cache_msec = msec
+        return 0
+
+    def idh_source_get_sync_cache_msec(self, source):
+        return self.sources[source].sync_cache_msec
+
+    def idh_source_destroy(self, source):
+        self.sources.pop(source, None)
+        for group in [g for g, s in self.groups.items() if s == source]:
+            del self.groups[group]
+
+    def _tag_indexes(self, source, tag_array, tags_size):
+        return np.fromiter((source.tag_index(tag_array[i].namespace_index, tag_array[i].tag_name.decode("utf-8"))
+                            for i in range(tags_size)), dtype=np.int64, count=tags_size)
+
+    def idh_source_readvalues(self, handle, values, tag_array, tags_size):
+        source = self.sources[handle]
+
+        def read():
+            indexes = self._tag_indexes(source, tag_array, tags_size)
+            source.values(indexes, time.time(), np.frombuffer(values, dtype=IDH_REAL_DTYPE)[:tags_size])
+            return 0 if (indexes >= 0).all() else IDH_ERRCODE.IDH_ERRCODE_NOTALLREADABLE.value
+
+        return source.call(tags_size, read)
+
+    def idh_source_writevalues(self, handle, results, values_array, tag_array, tags_size):
+        source = self.sources[handle]
+
+        def write():
+            indexes = self._tag_indexes(source, tag_array, tags_size)
+            return self._write(source, indexes, results, values_array, tags_size)
+
+        return source.call(tags_size, write)
+
+    def _write(self, source, indexes, results, values_array, tags_size):
+        source.write(indexes, np.frombuffer(values_array, dtype=np.float64)[:tags_size])
+        codes = np.frombuffer(results, dtype=np.int32)[:tags_size]
+        codes[:] = np.where(indexes >= 0, 0, IDH_ERRCODE.IDH_ERRCODE_INVALIDHANDLE.value)
+        return 0 if (indexes >= 0).all() else IDH_ERRCODE.IDH_ERRCODE_INVALIDHANDLE.value
+
+    # groups
+
+    def idh_group_create(self, source, group_name):
+        if source not in self.sources:
+            return IDH_INVALID_HANDLE.value
+        handle = self._handle()
+        self.groups[handle] = source
+        return handle
+
+    def idh_group_clear(self, group):
+        pass
+
+    def idh_group_subscribe(self, group, handles, tag_array, tags_size):
+        source = self.source(group)
+
+        def subscribe():
+            indexes = self._tag_indexes(source, tag_array, tags_size)
+            out = np.frombuffer(handles, dtype=np.int64)[:tags_size]
+            out[:] = np.where(indexes >= 0, indexes + TAG_HANDLE_OFFSET, IDH_ERRCODE.IDH_ERRCODE_INVALIDTAG.value)
+            return 0 if (indexes >= 0).all() else IDH_ERRCODE.IDH_ERRCODE_SUBSCRIBEFAILED.value
+
+        return source.call(tags_size, subscribe)
+
+    def idh_group_unsubscribe(self, group, handles, tags_size):
+        pass
+
+    def _handle_indexes(self, source, handles_array, tags_size):
+        indexes = np.frombuffer(handles_array, dtype=np.int64)[:tags_size] - TAG_HANDLE_OFFSET
+        return np.where((indexes >= 0) & (indexes < source.tags), indexes, -1)
+
+    def idh_group_readvalues(self, group, values, handles_array, tags_size):
+        source = self.source(group)
+
+        def read():
+            indexes = self._handle_indexes(source, handles_array, tags_size)
+            # subscribed values are sampled every sample_timespan_msec
+            sample = max(source.sample_timespan_msec, 1) / 1000.0
+            now = math.floor(time.time() / sample) * sample
+            source.values(indexes, now, np.frombuffer(values, dtype=IDH_REAL_DTYPE)[:tags_size])
+            return 0 if (indexes >= 0).all() else IDH_ERRCODE.IDH_ERRCODE_INVALIDHANDLE.value
+
+        return source.call(tags_size, read)
+
+    def idh_group_writevalues(self, group, results, values_array, handles_array, tags_size):
+        source = self.source(group)
+
+        def write():
+            indexes = self._handle_indexes(source, handles_array, tags_size)
+            return self._write(source, indexes, results, values_array, tags_size)
+
+        return source.call(tags_size, write)
+
+    def idh_group_destroy(self, group):
+        self.groups.pop(group, None)
+
+    # browse
+
+    def _browse(self, handle, items_array, items_count, namespace_index, parent):
+        source = self.sources[handle]
+        count = items_count._obj
+
+        def browse():
+            if parent is not None and namespace_index != source.namespace_index:
+                children = []
+            else:
+                children = source.children(parent)
+            shown = children[:count.value]
+            for item, (node_name, node_type) in zip(items_array, shown):
+                item.namespace_index = source.namespace_index
+                item.node_name = node_name.encode("utf-8")
+                item.display_name = node_name.rpartition(".")[2].encode("utf-8")
+                item.description = b""
+                item.node_type = node_type.value
+                variable = node_type == IDH_NODETYPE.IDH_NODETYPE_VARIABLE
+                item.data_type = IDH_DATATYPE.IDH_DATATYPE_REAL.value if variable else 0
+                item.is_readable = item.is_writable = int(variable)
+                item.has_children = int(not variable)
+            count.value = len(shown)
+            return 0
+
+        result = source.call(0, browse)
+        if result < 0:
+            count.value = 0
+        return result
+
+    def idh_source_browse(self, source, items_array, items_count, parent_namespace_index, parent_node_name):
+        parent = parent_node_name.decode("utf-8") if parent_node_name else None
+        return self._browse(source, items_array, items_count, parent_namespace_index, parent)
+
+    def idh_source_browse_root(self, source, items_array, items_count):
+        return self._browse(source, items_array, items_count, None, None)
+
+
+class SimulationRouter:
+    """Sends calls on simulated handles to SimulatedLib, the others to ``lib``"""
+
+    def __init__(self, lib, sim):
+        self.lib = lib
+        self.sim = sim
+
+    def __getattr__(self, name):
+        native = getattr(self.lib, name)
+        simulated = getattr(self.sim, name, None)
+        if simulated is None:
+            return native
+
+        if name == "idh_source_create":
+            def call(instance, source_type, schema, *args):
+                if schema.startswith(SIM_SCHEME.encode()):
+                    return simulated(instance, source_type, schema, *args)
+                return native(instance, source_type, schema, *args)
+        else:
+            def call(handle, *args):
+                if isinstance(handle, int) and handle > SIM_HANDLE_BASE:
+                    return simulated(handle, *args)
+                return native(handle, *args)
+
+        # cached: later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
+
+
+def get_simulator(idh, create=False):
+    """SimulatedLib serving the simulated sources of ``idh`` (None if it has none)
+
+    The router is put under any InstrumentedLib or CaptureLib, so
+    pyidh.metrics and pyidh.replay also see simulated calls.  A ReplayLib
+    serves the recorded simulated sources itself: no simulator then.
+    """
+    from .metrics import InstrumentedLib, forget_cached_calls
+    from .replay import CaptureLib, ReplayLib
+
+    wrappers = []
+    lib = idh._lib
+    while isinstance(lib, (InstrumentedLib, CaptureLib)):
+        wrappers.append(lib)
+        lib = lib.lib
+    if isinstance(lib, SimulationRouter):
+        return lib.sim
+    if not create or isinstance(lib, ReplayLib):
+        return None
+    router = SimulationRouter(lib, SimulatedLib())
+    if wrappers:
+        wrappers[-1].lib = router
+        # every wrapper above may hold closures ending at the previous lib
+        forget_cached_calls(wrappers)
+    else:
+        idh._lib = router
+    return router.sim
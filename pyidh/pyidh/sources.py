@@ -0,0 +1,357 @@
+"""Shared, health-checked sources.
+
+SourceManager creates one native source per (source_type, schema, flags)
+and hands out reference-counted leases on it, so a process opens one
+session per server no matter how many components use it.  A background
+thread checks every source with is_source_valid; a source that stays
+invalid is destroyed and created again with exponential backoff, and the
+groups created through its leases are recreated and resubscribed.
+
+Handles change on reconnect: read ``lease.source``, ``group.group`` and
+``group.handles`` when needed instead of keeping copies, or use
+ManagedGroup.read / write which always use the current ones.  A group is
+only destroyed (on reconnect, close or release) once the reads and
+writes running on it through ManagedGroup returned.
+"""
+
+import threading
+import time
+
+from .group import GroupReader, GroupWriter
+from .pyidh import IDH_INVALID_HANDLE
+
+
+def _is_handle(handle):
+    return handle is not None and handle != IDH_INVALID_HANDLE.value
+
+
+class ManagedGroup:
+    """Group of a pooled source, recreated after reconnects
+
+    Attributes:
+        group: current group handle
+        handles: current subscribed handles
+        result: error code of the latest subscription
+        generation: incremented every time the group is recreated
+    """
+
+    def __init__(self, entry, name, tags):
+        self._entry = entry
+        self.name = name
+        self.tags = tags
+        self.group = None
+        self.handles = []
+        self.result = None
+        self.generation = 0
+        self._reader = None
+        self._writer = None
+        # reads and writes running on the current group, _destroy waits for them
+        self._calls = 0
+        self._lock = threading.Condition()
+
+    def _create(self, idh, source):
+        group = idh.create_group(source, self.name)
+        if not _is_handle(group):
+            raise RuntimeError(f"Failed to create group {self.name}")
+        result, handles = idh.subscribe_group(group, self.tags)
+        with self._lock:
+            self.group, self.handles, self.result = group, handles, result
+            self._reader = self._writer = None
+            self.generation += 1
+
+    def _destroy(self, idh):
+        with self._lock:
+            group, handles, self.group = self.group, self.handles, None
+            self._lock.wait_for(lambda: not self._calls)
+        if group is not None:
+            idh.unsubscribe_group(group, handles)
+            idh.destroy_group(group)
+
+    def _acquire(self, writer):
+        """The reader (or writer) of the current group, counted as running
+        until _release(); both happen under the lock _destroy takes"""
+        with self._lock:
+            if self.group is None:
+                raise RuntimeError(f"group {self.name} is being reconnected")
+            if writer:
+                if self._writer is None:
+                    self._writer = GroupWriter(self._entry.idh, self.group, self.handles)
+                io = self._writer
+            else:
+                if self._reader is None:
+                    self._reader = GroupReader(self._entry.idh, self.group, self.handles)
+                io = self._reader
+            self._calls += 1
+            return io
+
+    def _release(self):
+        with self._lock:
+            self._calls -= 1
+            if not self._calls:
+                self._lock.notify_all()
+
+    def read(self, as_array=False):
+        """Read the current group through a reused GroupReader (see GroupReader.read)
+
+        Like any group, read from one thread at a time: concurrent reads
+        share the reader's buffers.
+        """
+        reader = self._acquire(False)
+        try:
+            return reader.read(as_array)
+        finally:
+            self._release()
+
+    def write(self, values):
+        """Write one value per tag through a reused GroupWriter (see GroupWriter.write);
+        write from one thread at a time, like read"""
+        writer = self._acquire(True)
+        try:
+            return writer.write(values)
+        finally:
+            self._release()
+
+    def close(self):
+        self._entry.manager._close_group(self._entry, self)
+
+
+class _Entry:
+    __slots__ = ("manager", "idh", "key", "sample_timespan_msec", "source", "refs", "groups", "healthy",
+                 "down_since", "backoff", "next_attempt", "reconnects", "lock", "ready", "error")
+
+    def __init__(self, manager, key, sample_timespan_msec):
+        self.manager = manager
+        self.idh = manager.idh
+        self.key = key
+        self.sample_timespan_msec = sample_timespan_msec
+        self.source = None
+        self.refs = 0
+        self.groups = []
+        self.healthy = True
+        self.down_since = None
+        self.backoff = manager.backoff_initial
+        self.next_attempt = 0.0
+        self.reconnects = 0
+        # held while the source is created, reconnected or destroyed
+        self.lock = threading.Lock()
+        # set once the first connect finished; error is what it raised
+        self.ready = threading.Event()
+        self.error = None
+
+    def connect(self):
+        source_type, schema, flags = self.key
+        source = self.idh.create_source(source_type, schema, self.sample_timespan_msec, flags)
+        if not _is_handle(source):
+            raise RuntimeError(f"Failed to create source {schema}")
+        self.source = source
+
+
+class SourceLease:
+    """A reference on a pooled source; release() (or a with block) drops it"""
+
+    def __init__(self, entry):
+        self._entry = entry
+        self.released = False
+
+    @property
+    def source(self):
+        """Current source handle (changes after a reconnect)"""
+        return self._entry.source
+
+    @property
+    def key(self):
+        return self._entry.key
+
+    @property
+    def healthy(self):
+        return self._entry.healthy
+
+    def create_group(self, name, tags):
+        """Create and subscribe a group that follows reconnects
+
+        Returns:
+            ManagedGroup
+        """
+        entry = self._entry
+        group = ManagedGroup(entry, name, tags)
+        with entry.lock:
+            group._create(entry.idh, entry.source)
+            entry.groups.append(group)
+        return group
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self._entry.manager._release(self._entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class SourceManager:
+    """Pool of sources keyed by (source_type, schema, flags)
+
+    Args:
+        idh: IDHLibrary
+        check_interval: seconds between two health checks of every source
+        backoff_initial: seconds a source must stay invalid before the
+            first reconnect; doubled after every failed reconnect
+        backoff_max: upper bound of the backoff
+    """
+
+    def __init__(self, idh, check_interval=5.0, backoff_initial=1.0, backoff_max=60.0):
+        self.idh = idh
+        self.check_interval = check_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="idh-sources", daemon=True)
+        self._thread.start()
+
+    def checkout(self, source_type, schema, flags=0, sample_timespan_msec=1000):
+        """Lease the source for (source_type, schema, flags), creating it on
+        first use; ``sample_timespan_msec`` only applies when it is created
+
+        Returns:
+            SourceLease
+        """
+        key = (getattr(source_type, "value", source_type), schema, flags)
+        with self._lock:
+            entry = self._entries.get(key)
+            created = entry is None
+            if created:
+                entry = self._entries[key] = _Entry(self, key, sample_timespan_msec)
+            entry.refs += 1
+        if created:
+            try:
+                with entry.lock:
+                    entry.connect()
+            except Exception as e:
+                entry.error = e
+                raise
+            finally:
+                entry.ready.set()
+                if entry.error is not None:
+                    self._release(entry)
+        elif not entry.ready.is_set():
+            entry.ready.wait()
+        if entry.error is not None:
+            if not created:
+                self._release(entry)
+            raise entry.error
+        return SourceLease(entry)
+
+    def _release(self, entry):
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs:
+                return
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+        with entry.lock:
+            for group in entry.groups:
+                group._destroy(self.idh)
+            entry.groups = []
+            if entry.source is not None:
+                self.idh.destroy_source(entry.source)
+                entry.source = None
+
+    def _close_group(self, entry, group):
+        with entry.lock:
+            if group in entry.groups:
+                entry.groups.remove(group)
+                group._destroy(self.idh)
+
+    def stats(self):
+        """dict key -> {"refs", "healthy", "reconnects", "groups"}"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            e.key: {"refs": e.refs, "healthy": e.healthy, "reconnects": e.reconnects, "groups": len(e.groups)}
+            for e in entries
+        }
+
+    def check(self, now=None):
+        """Run one health check pass (the background thread calls this)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            with entry.lock:
+                if entry.refs == 0 or not entry.ready.is_set():
+                    continue
+                if entry.source is not None and self.idh.is_source_valid(entry.source):
+                    entry.healthy = True
+                    entry.down_since = None
+                    entry.backoff = self.backoff_initial
+                    self._recreate_groups(entry)
+                    continue
+                entry.healthy = False
+                if entry.down_since is None:
+                    entry.down_since = now
+                    entry.next_attempt = now + entry.backoff
+                if now >= entry.next_attempt:
+                    self._reconnect(entry, now)
+
+    def _recreate_groups(self, entry):
+        """Create the groups missing after a reconnect; caller holds entry.lock"""
+        for group in entry.groups:
+            if group.group is None:
+                try:
+                    group._create(self.idh, entry.source)
+                except Exception:
+                    # retried at the next check
+                    pass
+
+    def _reconnect(self, entry, now):
+        """Recreate the source and its groups; caller holds entry.lock"""
+        for group in entry.groups:
+            group._destroy(self.idh)
+        if entry.source is not None:
+            self.idh.destroy_source(entry.source)
+            entry.source = None
+        entry.reconnects += 1
+        try:
+            entry.connect()
+        except Exception:
+            pass
+        else:
+            self._recreate_groups(entry)
+        # judged again once the new session had time to come up
+        entry.backoff = min(entry.backoff * 2, self.backoff_max)
+        entry.next_attempt = now + entry.backoff
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception:
+                # a failing check must not stop the health thread
+                pass
+
+    def close(self):
+        """Stop health checks and destroy every pooled source"""
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            with entry.lock:
+                for group in entry.groups:
+                    group._destroy(self.idh)
+                entry.groups = []
+                if entry.source is not None:
+                    self.idh.destroy_source(entry.source)
+                    entry.source = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,198 @@
+"""Sparse time index and range queries over recorded segments.
+
+For every segment written by Recorder, the index keeps, per block of
+``block_records`` records, the min/max timestamp (the 48-bit ms since
+2000-01-01 field of time_quality) and, per handle, the blocks containing
+it.  A query only maps and scans the blocks that can hold matching
+records.
+
+Indexes of closed segments are saved next to them as
+``<segment>.idhidx.npz``; the segment still being recorded is indexed in
+memory on every query.
+"""
+
+import os
+
+import numpy as np
+
+from .arrays import IDH_TQ_TIME_MASK
+from .decode import IDH_EPOCH_2000_MS
+from .recorder import HEADER_DTYPE, RECORD_DTYPE, list_segments, read_header
+
+INDEX_SUFFIX = ".idhidx.npz"
+
+
+class SegmentIndex:
+    """Index of one segment"""
+
+    __slots__ = ("count", "block_records", "tmin", "tmax", "handles", "handle_ptr", "handle_blocks")
+
+    def __init__(self, count, block_records, tmin, tmax, handles, handle_ptr, handle_blocks):
+        self.count = count
+        self.block_records = block_records
+        self.tmin = tmin
+        self.tmax = tmax
+        self.handles = handles
+        self.handle_ptr = handle_ptr
+        self.handle_blocks = handle_blocks
+
+    @classmethod
+    def build(cls, records, block_records):
+        count = len(records)
+        blocks = -(-count // block_records)
+        timestamps = records["time_quality"] & IDH_TQ_TIME_MASK
+        padded = np.empty(blocks * block_records, dtype=np.uint64)
+        padded[:count] = timestamps
+        padded[count:] = timestamps[-1] if count else 0
+        padded = padded.reshape(blocks, block_records)
+        tmin = padded.min(axis=1)
+        tmax = padded.max(axis=1)
+
+        # distinct (handle, block) pairs, grouped by handle (CSR layout)
+        block_ids = np.arange(count, dtype=np.int64) // block_records
+        order = np.lexsort((block_ids, records["handle"]))
+        pair_handles = records["handle"][order]
+        pair_blocks = block_ids[order]
+        distinct = np.ones(count, dtype=bool)
+        distinct[1:] = (pair_handles[1:] != pair_handles[:-1]) | (pair_blocks[1:] != pair_blocks[:-1])
+        pair_handles = pair_handles[distinct]
+        pair_blocks = pair_blocks[distinct].astype(np.int32)
+        handles, starts = np.unique(pair_handles, return_index=True)
+        handle_ptr = np.append(starts, len(pair_handles)).astype(np.int64)
+        return cls(count, block_records, tmin, tmax, handles, handle_ptr, pair_blocks)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(f, **{name: np.asarray(getattr(self, name)) for name in self.__slots__})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                int(data["count"]), int(data["block_records"]), data["tmin"], data["tmax"],
+                data["handles"], data["handle_ptr"], data["handle_blocks"],
+            )
+
+    def candidate_blocks(self, handles, start_ms, end_ms):
+        """Blocks overlapping [start_ms, end_ms] that contain any of ``handles``"""
+        in_range = (self.tmax >= start_ms) & (self.tmin <= end_ms)
+        if handles is None:
+            return np.flatnonzero(in_range)
+        if not len(self.handles):
+            return np.zeros(0, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.handles, handles), len(self.handles) - 1)
+        positions = positions[self.handles[positions] == handles]
+        # concatenate the block lists of the matching handles
+        starts = self.handle_ptr[positions]
+        lengths = self.handle_ptr[positions + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        with_handle = np.zeros(len(self.tmin), dtype=bool)
+        with_handle[self.handle_blocks[offsets + np.arange(len(offsets))]] = True
+        return np.flatnonzero(in_range & with_handle)
+
+
+def to_idh_ms(t):
+    """Convert ms since 2000-01-01 (int) or datetime64 to ms since 2000-01-01"""
+    if isinstance(t, np.datetime64):
+        return int(t.astype("datetime64[ms]").astype(np.int64)) - IDH_EPOCH_2000_MS
+    return int(t)
+
+
+class HistoryIndex:
+    """Time-range queries over the segments of a Recorder directory
+
+    Args:
+        directory: Recorder output directory
+        prefix: segment file name prefix
+        block_records: records per index block; smaller blocks index finer
+            but make the index larger
+    """
+
+    def __init__(self, directory, prefix="idh", block_records=4096):
+        self.directory = directory
+        self.prefix = prefix
+        self.block_records = block_records
+        self._indexes = {}
+
+    @staticmethod
+    def _map(path, count):
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+    def _segment_index(self, path):
+        header = read_header(path)
+        count = int(header["count"])
+        closed = count == int(header["capacity"])
+        cached = self._indexes.get(path)
+        if cached is not None and cached.count == count:
+            return cached, count
+        index_path = path + INDEX_SUFFIX
+        index = None
+        if closed and os.path.exists(index_path):
+            index = SegmentIndex.load(index_path)
+            if index.count != count or index.block_records != self.block_records:
+                index = None
+        if index is None:
+            records = self._map(path, count) if count else np.zeros(0, dtype=RECORD_DTYPE)
+            index = SegmentIndex.build(records, self.block_records)
+            if closed:
+                index.save(index_path)
+        self._indexes[path] = index
+        return index, count
+
+    def build(self):
+        """Index every closed segment that has no up to date index file
+
+        Returns:
+            int: number of segments indexed
+        """
+        segments = list_segments(self.directory, self.prefix)
+        for _, path in segments:
+            self._segment_index(path)
+        return len(segments)
+
+    def query(self, handles, start, end):
+        """Records of ``handles`` with start <= timestamp <= end
+
+        Args:
+            handles: handles to return, None for all
+            start, end: ms since 2000-01-01 or numpy.datetime64 (UTC)
+
+        Returns:
+            numpy.ndarray: RECORD_DTYPE records, in recording order
+        """
+        start_ms, end_ms = max(to_idh_ms(start), 0), to_idh_ms(end)
+        if end_ms < start_ms:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        if handles is not None:
+            handles = np.unique(np.asarray(handles, dtype=np.int64))
+        parts = []
+        for _, path in list_segments(self.directory, self.prefix):
+            index, count = self._segment_index(path)
+            blocks = index.candidate_blocks(handles, start_ms, end_ms)
+            if not len(blocks):
+                continue
+            records = self._map(path, count)
+            # merge adjacent blocks into contiguous runs
+            breaks = np.flatnonzero(np.diff(blocks) != 1) + 1
+            for run in np.split(blocks, breaks):
+                chunk = records[run[0] * index.block_records:(run[-1] + 1) * index.block_records]
+                timestamps = chunk["time_quality"] & IDH_TQ_TIME_MASK
+                mask = (timestamps >= start_ms) & (timestamps <= end_ms)
+                if handles is not None:
+                    mask &= np.isin(chunk["handle"], handles, assume_unique=False)
+                parts.append(np.array(chunk[mask]))
+        if not parts:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts)
+
+    def query_by_handle(self, handles, start, end):
+        """Like query, split into a dict handle -> records sorted by timestamp"""
+        records = self.query(handles, start, end)
+        timestamps = records["time_quality"] & IDH_TQ_TIME_MASK
+        order = np.lexsort((timestamps, records["handle"]))
+        records = records[order]
+        keys, starts = np.unique(records["handle"], return_index=True)
+        result = {int(h): np.zeros(0, dtype=RECORD_DTYPE) for h in (handles if handles is not None else ())}
+        for key, part in zip(keys, np.split(records, starts[1:])):
+            result[int(key)] = part
+        return result
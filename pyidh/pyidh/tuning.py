@@ -0,0 +1,297 @@
+"""Self-tuning batch sizes for source and group reads/writes.
+
+The best number of tags per native call depends on the server (UA
+MaxNodesPerRead limits, DA servers that slow down on big requests).
+BatchTuner keeps one chunk size per source (or group) and adapts it from
+every call it is told about:
+
+- a call failing with a size-related error (IDH_ERROR_TIMEOUT,
+  IDH_ERROR_EXCDLEN) or slower than ``max_latency`` halves the size, and
+  sizes at or above the failing one are not tried again for
+  ``cooldown_calls`` calls;
+- every ``probe_every`` successful calls the size is raised by
+  ``increase`` as long as its throughput (items/s, smoothed) keeps up with
+  the best size measured so far, otherwise it falls back to that size.
+
+probe() measures a list of sizes up front, so the tuner starts from a
+measured size.  BatchedIO splits reads and writes into chunks of the
+current size, reading into slices of one result buffer, and retries a
+chunk with a smaller size when it fails with a size-related error.
+"""
+
+import ctypes
+import threading
+import time
+from ctypes import c_double, c_int
+
+import numpy as np
+
+from .arrays import as_numpy
+from .pyidh import IDH_ERRCODE, idh_real_t, make_handle_array, make_tag_array
+
+SHRINK_ERRORS = frozenset((IDH_ERRCODE.IDH_ERROR_TIMEOUT.value, IDH_ERRCODE.IDH_ERROR_EXCDLEN.value))
+
+
+def probe_sizes(min_size, max_size, factor=4):
+    """Geometric sizes from min_size up to and including max_size"""
+    sizes = []
+    size = min_size
+    while size < max_size:
+        sizes.append(size)
+        size *= factor
+    sizes.append(max_size)
+    return sizes
+
+
+class _Tuning:
+    __slots__ = ("size", "ceiling", "cooldown", "successes", "throughput", "calls", "errors", "shrinks",
+                 "latency")
+
+    def __init__(self, size):
+        self.size = size
+        self.ceiling = None
+        self.cooldown = 0
+        self.successes = 0
+        # size -> smoothed items per second
+        self.throughput = {}
+        self.calls = 0
+        self.errors = 0
+        self.shrinks = 0
+        self.latency = 0.0
+
+
+class BatchTuner:
+    """Chunk size per key (source or group handle), adapted from measurements
+
+    Args:
+        initial_size: size of a key before anything was measured
+        min_size, max_size: bounds of the size
+        max_latency: calls slower than this (seconds) shrink the size
+        probe_every: successful calls between two attempts to grow
+        increase, decrease: growth / shrink factors
+        cooldown_calls: calls during which a failing size is not tried again
+        smoothing: weight of a new throughput sample in the moving average
+    """
+
+    def __init__(self, initial_size=1000, min_size=16, max_size=100000, max_latency=2.0, probe_every=16,
+                 increase=1.5, decrease=0.5, cooldown_calls=256, smoothing=0.2):
+        if not 0 < min_size <= initial_size <= max_size:
+            raise ValueError("expected 0 < min_size <= initial_size <= max_size")
+        self.initial_size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_latency = max_latency
+        self.probe_every = probe_every
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown_calls = cooldown_calls
+        self.smoothing = smoothing
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def _state(self, key):
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _Tuning(self.initial_size)
+        return state
+
+    def size(self, key):
+        """Current chunk size of ``key``"""
+        with self._lock:
+            return self._state(key).size
+
+    def set_size(self, key, size):
+        with self._lock:
+            self._state(key).size = max(self.min_size, min(self.max_size, int(size)))
+
+    def record(self, key, items, latency, result):
+        """Feed the outcome of one native call of ``items`` tags
+
+        Returns:
+            bool: True if the call failed because of its size (retry smaller)
+        """
+        with self._lock:
+            state = self._state(key)
+            state.calls += 1
+            state.latency += (latency - state.latency) * self.smoothing if state.calls > 1 else latency
+            if state.cooldown:
+                state.cooldown -= 1
+                if not state.cooldown:
+                    state.ceiling = None
+            too_big = result in SHRINK_ERRORS or latency > self.max_latency
+            if result < 0:
+                state.errors += 1
+            if too_big:
+                state.shrinks += 1
+                state.size = max(self.min_size, min(state.size, int(items * self.decrease)))
+                state.ceiling = items
+                state.cooldown = self.cooldown_calls
+                state.successes = 0
+                return result in SHRINK_ERRORS and items > self.min_size
+            if result < 0 or items < state.size:
+                # other errors and partial chunks say nothing about the size
+                return False
+            sample = items / max(latency, 1e-9)
+            previous = state.throughput.get(items)
+            state.throughput[items] = sample if previous is None else previous + (sample - previous) * self.smoothing
+            state.successes += 1
+            if state.successes % self.probe_every == 0:
+                self._adjust(state)
+            return False
+
+    def _adjust(self, state):
+        best_size = max(state.throughput, key=state.throughput.get)
+        if state.throughput.get(state.size, 0.0) < 0.95 * state.throughput[best_size]:
+            state.size = best_size
+            return
+        grown = min(self.max_size, int(state.size * self.increase))
+        if state.ceiling is not None:
+            grown = min(grown, state.ceiling - 1)
+        if grown > state.size and grown not in state.throughput:
+            state.size = grown
+
+    def probe(self, key, call, sizes=None, repeat=2):
+        """Measure ``call(n)`` (one native call of n tags, returns its error
+        code) for each size and keep the fastest one that succeeded
+
+        Returns:
+            int: the chosen size
+        """
+        if sizes is None:
+            sizes = probe_sizes(self.min_size, self.max_size)
+        best, best_rate = None, 0.0
+        for size in sizes:
+            elapsed, ok = 0.0, True
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = call(size)
+                latency = time.perf_counter() - started
+                self.record(key, size, latency, result)
+                elapsed += latency
+                if result < 0 or latency > self.max_latency:
+                    ok = False
+                    break
+            if not ok:
+                # larger sizes fail too
+                break
+            rate = size * repeat / max(elapsed, 1e-9)
+            if rate > best_rate:
+                best, best_rate = size, rate
+        if best is not None:
+            self.set_size(key, best)
+        return self.size(key)
+
+    def stats(self, key):
+        """dict: size, calls, errors, shrinks, smoothed latency, throughput per size"""
+        with self._lock:
+            state = self._state(key)
+            return {
+                "size": state.size,
+                "calls": state.calls,
+                "errors": state.errors,
+                "shrinks": state.shrinks,
+                "latency": state.latency,
+                "throughput": dict(state.throughput),
+            }
+
+
+def _slice(array, start, count):
+    """Zero-copy view of ``count`` items of a ctypes array from ``start``"""
+    item = array._type_
+    return (item * count).from_buffer(array, start * ctypes.sizeof(item))
+
+
+class BatchedIO:
+    """Chunked reads and writes sized by a BatchTuner
+
+    Results are merged into one buffer in the original order; the error
+    code returned is the lowest of the chunks.
+
+    Args:
+        idh: IDHLibrary
+        tuner: BatchTuner, a default one if None
+        max_retries: times a chunk is retried smaller after a size error
+    """
+
+    def __init__(self, idh, tuner=None, max_retries=4):
+        self.idh = idh
+        self.tuner = tuner or BatchTuner()
+        self.max_retries = max_retries
+
+    def _run(self, key, total, call):
+        """Call ``call(start, count)`` over [0, total) in tuned chunks"""
+        worst = None
+        start = 0
+        retries = 0
+        while start < total:
+            count = min(self.tuner.size(key), total - start)
+            started = time.perf_counter()
+            result = call(start, count)
+            retry = self.tuner.record(key, count, time.perf_counter() - started, result)
+            if retry and retries < self.max_retries:
+                retries += 1
+                continue
+            retries = 0
+            worst = result if worst is None else min(worst, result)
+            start += count
+        return 0 if worst is None else worst
+
+    def read_values(self, source, tags, as_array=False, key=None):
+        """Like IDHLibrary.read_values, in tuned chunks (tuning key: source)"""
+        tag_array, total = make_tag_array(tags)
+        values = (idh_real_t * total)()
+        result = self._run(source if key is None else key, total, lambda start, count: self.idh.read_values_into(
+            source, _slice(tag_array, start, count), _slice(values, start, count), count))
+        return result, (as_numpy(values) if as_array else values)
+
+    def write_values(self, source, tags, values, key=None):
+        """Like IDHLibrary.write_values, in tuned chunks
+
+        Returns:
+            tuple: (error code, list of per-tag result codes)
+        """
+        tag_array, total = make_tag_array(tags)
+        values_array = (c_double * total)()
+        np.frombuffer(values_array, dtype=np.float64)[:] = values
+        results = (c_int * total)()
+        result = self._run(source if key is None else key, total, lambda start, count: self.idh.write_values_from(
+            source, _slice(tag_array, start, count), _slice(values_array, start, count),
+            _slice(results, start, count), count))
+        return result, list(results)
+
+    def read_group_values(self, group, handles, as_array=False, key=None):
+        """Like IDHLibrary.read_group_values, in tuned chunks (tuning key:
+        ``key``, e.g. the source of the group, default the group)"""
+        handles_array, total = make_handle_array(handles)
+        values = (idh_real_t * total)()
+        result = self._run(group if key is None else key, total, lambda start, count: self.idh.read_group_values_into(
+            group, _slice(handles_array, start, count), _slice(values, start, count), count))
+        return result, (as_numpy(values) if as_array else values)
+
+    def write_group_values(self, group, handles, values, key=None):
+        """Like IDHLibrary.write_group_values, in tuned chunks"""
+        handles_array, total = make_handle_array(handles)
+        values_array = (c_double * total)()
+        np.frombuffer(values_array, dtype=np.float64)[:] = values
+        results = (c_int * total)()
+        result = self._run(group if key is None else key, total, lambda start, count: self.idh.write_group_values_from(
+            group, _slice(handles_array, start, count), _slice(values_array, start, count),
+            _slice(results, start, count), count))
+        return result, list(results)
+
+    def probe_read_values(self, source, tags, sizes=None, repeat=2, key=None):
+        """Probe read sizes over the first tags of ``tags`` (see BatchTuner.probe)"""
+        tag_array, total = make_tag_array(tags)
+        values = (idh_real_t * total)()
+        sizes = [s for s in (sizes or probe_sizes(self.tuner.min_size, min(total, self.tuner.max_size))) if s <= total]
+        return self.tuner.probe(source if key is None else key,
+                                lambda n: self.idh.read_values_into(source, tag_array, values, n), sizes, repeat)
+
+    def probe_read_group_values(self, group, handles, sizes=None, repeat=2, key=None):
+        """Probe group read sizes over the first handles (see BatchTuner.probe)"""
+        handles_array, total = make_handle_array(handles)
+        values = (idh_real_t * total)()
+        sizes = [s for s in (sizes or probe_sizes(self.tuner.min_size, min(total, self.tuner.max_size))) if s <= total]
+        return self.tuner.probe(group if key is None else key,
+                                lambda n: self.idh.read_group_values_into(group, handles_array, values, n),
+                                sizes, repeat)
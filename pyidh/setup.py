@@ -66,7 +66,7 @@ def get_precompiled_library_files(target_platform):
     return library_files
 
 def get_install_requires(target_platform):
-    base_requires = []
+    base_requires = ["numpy>=1.17"]
     if target_platform.startswith("win_"):
         base_requires.append("pywin32>=305")
     return base_requires
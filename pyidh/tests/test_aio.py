@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+from pyidh import (
+    AsyncIDHLibrary,
+    IDH_DATATYPE,
+    IDH_ERRCODE,
+    IDH_RTSOURCE
+)
+
+
+class TestAsyncIDHLibrary(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.aidh = AsyncIDHLibrary(max_workers=8)
+        self.source = await self.aidh.create_source(
+            source_type=IDH_RTSOURCE.IDH_RTSOURCE_UA.value,
+            source_schema="opc.tcp://192.168.200.105:48010/",
+            sample_timespan_msec=1000,
+            source_flag=0
+        )
+        self.tags = [
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Demo.Static.Scalar.Double"},
+        ]
+
+    async def asyncTearDown(self):
+        await self.aidh.destroy_source(self.source)
+        await self.aidh.close()
+
+    async def test_concurrent_reads(self):
+        results = await asyncio.gather(*[self.aidh.read_values(self.source, self.tags) for _ in range(16)])
+        for result, values in results:
+            self.assertGreaterEqual(result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+            self.assertEqual(len(values), 1)
+
+    async def test_iter_group_values(self):
+        group = await self.aidh.create_group(self.source, "TestAsyncGroup")
+        _, handles = await self.aidh.subscribe_group(group, self.tags)
+        reads = 0
+        async for result, values in self.aidh.iter_group_values(group, handles, 0.01):
+            self.assertGreaterEqual(result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+            reads += 1
+            if reads == 3:
+                break
+        with self.assertRaises(ValueError):
+            async for _ in self.aidh.iter_group_values(group, handles, 0):
+                pass
+        await self.aidh.destroy_group(group)
+
+
+if __name__ == '__main__':
+    unittest.main()
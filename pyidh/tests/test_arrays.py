@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+from pyidh import (
+    IDH_QUALITY,
+    IDH_REAL_DTYPE,
+    idh_real_t,
+    as_numpy,
+    empty_values
+)
+from pyidh import arrays
+
+
+class TestArrays(unittest.TestCase):
+    def test_zero_copy_view(self):
+        values = (idh_real_t * 3)()
+        view = as_numpy(values)
+        self.assertEqual(view.dtype, IDH_REAL_DTYPE)
+        self.assertIs(view.base, values)
+        values[1].value = 12.5
+        self.assertEqual(view["value"][1], 12.5)
+
+    def test_accessors_match_struct(self):
+        values, view = empty_values(4)
+        qualities = [IDH_QUALITY.IDH_HIGH_GOOD.value | 0x20, IDH_QUALITY.IDH_HIGH_BAD.value | 0x09, 0x41, 0x00]
+        for i, q in enumerate(qualities):
+            values[i].time_quality = idh_real_t.make_time_quality(q, 820000000000 + i)
+        np.testing.assert_array_equal(arrays.get_quality(view), [v.get_quality() for v in values])
+        np.testing.assert_array_equal(arrays.get_quality_high(view), [v.get_quality_high() for v in values])
+        np.testing.assert_array_equal(arrays.get_quality_low(view), [v.get_quality_low() for v in values])
+        np.testing.assert_array_equal(arrays.get_timestamp(values), [v.get_timestamp() for v in values])
+
+    def test_rejects_other_arrays(self):
+        with self.assertRaises(TypeError):
+            as_numpy([1.0, 2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from pyidh import (
+    IDHLibrary,
+    IDH_ERRCODE,
+    IDH_NODETYPE,
+    IDH_RTSOURCE
+)
+from pyidh import browse
+from pyidh.browse import BrowsePager
+
+
+class FakeFolder:
+    """browse_into over a folder of ``size`` variables"""
+
+    def __init__(self, size):
+        self.size = size
+        self.capacities = []
+
+    def browse_into(self, source, items_array, capacity, namespace_index=0, node_name=None):
+        self.capacities.append(capacity)
+        count = min(capacity, self.size)
+        for i in range(count):
+            items_array[i].namespace_index = namespace_index
+            items_array[i].node_name = f"{node_name}.V{i}".encode('utf-8')
+            items_array[i].node_type = IDH_NODETYPE.IDH_NODETYPE_VARIABLE.value
+        return IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value, count
+
+
+class TestBrowsePager(unittest.TestCase):
+    def test_grows_until_complete(self):
+        folder = FakeFolder(1000)
+        pager = BrowsePager(folder, 1, 2, "Folder", page_items=64)
+        names = [item.node_name for item in pager]
+        self.assertEqual(names, [f"Folder.V{i}" for i in range(1000)])
+        self.assertEqual(pager.result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+        self.assertEqual(pager.count, 1000)
+        self.assertEqual(folder.capacities[:5], [64, 128, 256, 512, 1024])
+
+    def test_max_items(self):
+        pager = BrowsePager(FakeFolder(1000), 1, 2, "Folder", page_items=64, max_items=100)
+        self.assertEqual(len(list(pager)), 100)
+        self.assertEqual(pager.result, IDH_ERRCODE.IDH_ERROR_EXCDLEN.value)
+
+    def test_reuses_thread_buffer(self):
+        list(BrowsePager(FakeFolder(10), 1, 2, "A", page_items=64))
+        buffer = browse._local.buffer
+        items = iter(BrowsePager(FakeFolder(10), 1, 2, "B", page_items=32))
+        item = next(items)
+        # checked out while the iteration runs
+        self.assertIs(browse._local.buffer, None)
+        self.assertEqual(item["node_name"], "B.V0")
+        self.assertEqual(item.to_dict()["node_type"], IDH_NODETYPE.IDH_NODETYPE_VARIABLE)
+        with self.assertRaises(KeyError):
+            item["value"]
+        del item, items
+        list(BrowsePager(FakeFolder(10), 1, 2, "C", page_items=32))
+        self.assertIs(browse._local.buffer, buffer)
+
+
+class TestIterBrowse(unittest.TestCase):
+    def setUp(self):
+        self.idh = IDHLibrary()
+        self.source = self.idh.create_source(
+            source_type=IDH_RTSOURCE.IDH_RTSOURCE_UA.value,
+            source_schema="opc.tcp://192.168.200.105:48010/",
+            sample_timespan_msec=1000,
+            source_flag=0
+        )
+
+    def tearDown(self):
+        self.idh.destroy_source(self.source)
+        self.idh.destroy()
+
+    def test_matches_browse_source(self):
+        _, expected = self.idh.browse_source_root(self.source, 1000)
+        pager = self.idh.iter_browse_root(self.source, page_items=2)
+        self.assertEqual([item.to_dict() for item in pager], expected)
+        self.assertGreaterEqual(pager.result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
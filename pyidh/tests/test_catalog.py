@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from pyidh import IDH_DATATYPE, IDH_NODETYPE, TagCatalog, TagSet
+from pyidh import catalog
+
+
+def node(name, description="", node_type=IDH_NODETYPE.IDH_NODETYPE_VARIABLE, readable=True, writable=False):
+    return {
+        'namespace_index': 3,
+        'node_name': name,
+        'display_name': name.rsplit('.', 1)[-1],
+        'description': description,
+        'node_type': node_type,
+        'data_type': IDH_DATATYPE.IDH_DATATYPE_REAL,
+        'is_readable': readable,
+        'is_writable': writable,
+        'has_children': node_type == IDH_NODETYPE.IDH_NODETYPE_OBJECT,
+    }
+
+
+NODES = [
+    node("Plant.Unit1", node_type=IDH_NODETYPE.IDH_NODETYPE_OBJECT),
+    node("Plant.Unit1.FIC101.PV", "Feed flow"),
+    node("Plant.Unit1.FIC101.SP", "Feed flow setpoint", writable=True),
+    node("Plant.Unit1.TI102.PV", "Reactor 100% temperature"),
+    node("Plant.Unit1.Secret", "hidden", readable=False),
+]
+
+
+class TestTagCatalog(unittest.TestCase):
+    def setUp(self):
+        self.catalog = TagCatalog()
+        self.assertEqual(self.catalog.load(NODES, source="opc.tcp://a"), 5)
+
+    def tearDown(self):
+        self.catalog.close()
+
+    def test_search_returns_tag_specs(self):
+        tags = self.catalog.search("fic101")
+        self.assertEqual(tags, [
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Plant.Unit1.FIC101.PV"},
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Plant.Unit1.FIC101.SP"},
+        ])
+        self.assertEqual([t["tag_name"] for t in self.catalog.search("flow", fields=["description"], writable=True)],
+                         ["Plant.Unit1.FIC101.SP"])
+        self.assertEqual(self.catalog.search("hidden"), [])
+        self.assertEqual(self.catalog.search("Unit1", source="opc.tcp://b"), [])
+        self.assertIsInstance(self.catalog.search_tagset("PV"), TagSet)
+        self.assertEqual(len(self.catalog.search_tagset("PV")), 2)
+
+    def test_find_and_short_or_special_terms(self):
+        self.assertEqual(len(self.catalog.find("Unit1")), 5)
+        objects = self.catalog.find(node_types=[IDH_NODETYPE.IDH_NODETYPE_OBJECT])
+        self.assertEqual([n["node_name"] for n in objects], ["Plant.Unit1"])
+        # shorter than a trigram: LIKE fallback
+        self.assertEqual(len(self.catalog.find("sp")), 1)
+        self.assertEqual([n["node_name"] for n in self.catalog.find("0%")], ["Plant.Unit1.TI102.PV"])
+        self.assertEqual(self.catalog.find('"x'), [])
+        with self.assertRaises(ValueError):
+            self.catalog.find("x", fields=["value"])
+
+    def test_update_remove_and_bulk_load(self):
+        self.catalog.load([node("Plant.Unit1.FIC101.PV", "Bypass flow")], source="opc.tcp://a")
+        self.assertEqual(len(self.catalog), 5)
+        self.assertEqual(len(self.catalog.find("bypass")), 1)
+        self.assertEqual(len(self.catalog.find("Feed flow")), 1)
+        self.assertEqual(self.catalog.remove_source("opc.tcp://a"), 5)
+        self.assertEqual(self.catalog.find("flow"), [])
+
+        many = [node(f"Line.M{i}.PV", f"motor {i}") for i in range(catalog.BULK_LOAD_ITEMS)]
+        self.catalog.load(many, source="opc.tcp://b")
+        self.assertEqual(len(self.catalog.find("motor 1234")), 1)
+        self.catalog.load([node("Line.New.PV", "motor new")], source="opc.tcp://b")
+        self.assertEqual(len(self.catalog.find("motor new")), 1)
+
+    def test_persistent(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tags.db")
+            with TagCatalog(path) as first:
+                first.load(NODES)
+            with TagCatalog(path) as second:
+                self.assertEqual(len(second.search("TI102")), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import threading
+import time
+import unittest
+from pyidh import IDH_ERRCODE, SingleFlightReader, TagSet, WriteCoalescer
+
+
+class RecordingGroup:
+    """Fake IDHLibrary recording batched group writes"""
+
+    def __init__(self, delay=0.0, fail=None):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def write_group_values_from(self, group, handles_array, values_array, results, tags_size):
+        time.sleep(self.delay)
+        if self.fail is not None:
+            raise self.fail
+        with self.lock:
+            self.batches.append((group, list(handles_array), list(values_array)))
+        for i in range(tags_size):
+            # odd handles are rejected
+            results[i] = IDH_ERRCODE.IDH_ERRCODE_INVALIDHANDLE.value if handles_array[i] % 2 else 0
+        return 0
+
+
+class TestWriteCoalescer(unittest.TestCase):
+    def test_last_write_wins(self):
+        fake = RecordingGroup()
+        with WriteCoalescer(fake, interval=10) as coalescer:
+            first = coalescer.write(7, 10, 1.0)
+            second = coalescer.write(7, 10, 2.0)
+            other = coalescer.write(7, 11, 3.0)
+            coalescer.flush()
+            self.assertEqual(first.result(1), 0)
+            self.assertEqual(second.result(1), 0)
+            self.assertEqual(other.result(1), IDH_ERRCODE.IDH_ERRCODE_INVALIDHANDLE.value)
+        self.assertEqual(fake.batches, [(7, [10, 11], [2.0, 3.0])])
+
+    def test_cancelled_futures_are_skipped(self):
+        fake = RecordingGroup()
+        with WriteCoalescer(fake, interval=0.01) as coalescer:
+            cancelled = coalescer.write(1, 2, 1.0)
+            self.assertTrue(cancelled.cancel())
+            kept = coalescer.write(1, 4, 2.0)
+            self.assertEqual(kept.result(1), 0)
+            # the background thread survived the cancelled future
+            self.assertEqual(coalescer.write(1, 6, 3.0).result(1), 0)
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(coalescer.batches, 2)
+
+    def test_interval_and_size_triggers(self):
+        fake = RecordingGroup()
+        with WriteCoalescer(fake, interval=0.01, max_pending=3) as coalescer:
+            self.assertEqual(coalescer.write(1, 2, 1.0).result(1), 0)
+            futures = coalescer.write_many(2, [2, 4, 6], [1.0, 2.0, 3.0])
+            self.assertEqual([f.result(1) for f in futures], [0, 0, 0])
+        self.assertEqual(len(fake.batches), 2)
+
+    def test_many_producers(self):
+        fake = RecordingGroup(delay=0.001)
+        with WriteCoalescer(fake, interval=0.002) as coalescer:
+            def produce(handle):
+                futures = [coalescer.write(1, handle * 2, k) for k in range(50)]
+                self.assertEqual({f.result(5) for f in futures}, {0})
+
+            threads = [threading.Thread(target=produce, args=(i,)) for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(coalescer.writes, 400)
+        self.assertLess(len(fake.batches), 400)
+        last = {}
+        for _, handles, values in fake.batches:
+            last.update(zip(handles, values))
+        self.assertEqual(last, {i * 2: 49.0 for i in range(8)})
+
+    def test_errors_and_close(self):
+        coalescer = WriteCoalescer(RecordingGroup(fail=OSError("native write failed")), interval=0.001)
+        future = coalescer.write(1, 2, 1.0)
+        with self.assertRaises(OSError):
+            future.result(1)
+        coalescer.close()
+        with self.assertRaises(RuntimeError):
+            coalescer.write(1, 2, 1.0)
+
+
+class CountingSource:
+    """Fake IDHLibrary whose values are the tag numbers ("T<n>" -> n)"""
+
+    def __init__(self, delay=0.0, fail=None):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def read_values_into(self, source, tag_array, values, tags_size):
+        names = [tag_array[i].tag_name.decode() for i in range(tags_size)]
+        with self.lock:
+            self.calls.append(names)
+        time.sleep(self.delay)
+        if self.fail is not None:
+            raise self.fail
+        for i, name in enumerate(names):
+            values[i].value = float(name[1:])
+        return 0
+
+
+def tags(numbers):
+    return [{"data_type": 1, "namespace_index": 2, "tag_name": f"T{n}"} for n in numbers]
+
+
+class TestSingleFlightReader(unittest.TestCase):
+    def test_overlapping_reads_share_one_call(self):
+        fake = CountingSource(delay=0.01)
+        reader = SingleFlightReader(fake, window=0.05)
+        barrier = threading.Barrier(8)
+        results = {}
+
+        def read(i):
+            wanted = list(range(i, i + 10))
+            barrier.wait()
+            results[i] = reader.read_values(7, tags(wanted) if i % 2 else TagSet(tags(wanted)), as_array=True)
+
+        threads = [threading.Thread(target=read, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for i, (result, values) in results.items():
+            self.assertEqual(result, 0)
+            self.assertEqual(list(values["value"]), [float(n) for n in range(i, i + 10)])
+        self.assertEqual(len(fake.calls), 1)
+        self.assertEqual(sorted(fake.calls[0]), sorted(f"T{n}" for n in range(17)))
+        stats = reader.stats()
+        self.assertEqual((stats["requests"], stats["native_calls"], stats["merged_calls"]), (8, 1, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 7 / 8)
+        self.assertEqual((stats["tags_requested"], stats["tags_read"]), (80, 17))
+
+    def test_joins_read_in_flight(self):
+        fake = CountingSource(delay=0.1)
+        reader = SingleFlightReader(fake, window=0)
+        first = threading.Thread(target=reader.read_values, args=(7, tags(range(5))))
+        first.start()
+        time.sleep(0.05)
+        result, values = reader.read_values(7, tags([3, 1]))
+        first.join()
+        self.assertEqual([v.value for v in values], [3.0, 1.0])
+        # not covered by the read in flight: a new read
+        reader.read_values(7, tags([9]))
+        self.assertEqual(len(fake.calls), 2)
+        self.assertEqual(reader.stats()["merged_calls"], 1)
+
+    def test_errors_reach_every_caller(self):
+        reader = SingleFlightReader(CountingSource(fail=OSError("down")), window=0)
+        with self.assertRaises(OSError):
+            reader.read_values(7, tags([1]))
+        result, values = SingleFlightReader(CountingSource()).read_values(7, [])
+        self.assertEqual((result, len(values)), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
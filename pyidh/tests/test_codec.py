@@ -0,0 +1,69 @@
+import io
+import unittest
+import numpy as np
+from pyidh import IDH_REAL_DTYPE, empty_values
+from pyidh import codec
+from pyidh.decode import make_time_quality
+
+
+def series(values, qualities, timestamps):
+    out = np.empty(len(values), dtype=IDH_REAL_DTYPE)
+    out["value"] = values
+    out["time_quality"] = make_time_quality(qualities, timestamps)
+    return out
+
+
+class TestCodec(unittest.TestCase):
+    def assertLossless(self, records, level=1):
+        decoded = codec.decode(codec.encode(records, level))
+        self.assertEqual(decoded.dtype, IDH_REAL_DTYPE)
+        self.assertEqual(decoded.tobytes(), np.ascontiguousarray(records).tobytes())
+
+    def test_round_trip(self):
+        rng = np.random.default_rng(1)
+        count = 5000
+        values = rng.normal(size=count)
+        values[[3, 7]] = [np.nan, -np.inf]
+        timestamps = 820000000000 + np.cumsum(rng.integers(0, 5000, size=count))
+        qualities = rng.choice([0xC0, 0x89, 0x41], size=count)
+        records = series(values, qualities, timestamps)
+        # the reserved byte above the quality must survive too
+        records["time_quality"][10] |= np.uint64(0xAB << 56)
+        for level in (0, 1, 9):
+            self.assertLossless(records, level)
+
+    def test_small_series(self):
+        for count in range(4):
+            self.assertLossless(series(np.arange(count), 0xC0, np.arange(count) * 1000))
+
+    def test_regular_series_compresses(self):
+        count = 10000
+        records = series(np.repeat(np.arange(count // 100) * 0.5, 100), 0xC0,
+                         820000000000 + np.arange(count) * 1000)
+        encoded = codec.encode(records)
+        self.assertGreater(records.nbytes / len(encoded), 10)
+        self.assertLossless(records)
+
+    def test_varint(self):
+        values = np.array([0, 1, 127, 128, 300, 2 ** 48, 2 ** 64 - 1], dtype=np.uint64)
+        data = codec.varint_encode(values)
+        decoded, used = codec.varint_decode(data, len(values))
+        np.testing.assert_array_equal(decoded, values)
+        self.assertEqual(used, len(data))
+
+    def test_group_stream(self):
+        stream = io.BytesIO()
+        values, view = empty_values(2)
+        with codec.GroupStreamEncoder(stream, [11, 12], chunk_snapshots=4) as encoder:
+            for i in range(10):
+                view["value"] = [i, -i]
+                view["time_quality"] = make_time_quality(0xC0, 1000 * i)
+                encoder.append(values)
+        stream.seek(0)
+        decoded = codec.GroupStreamDecoder(stream).read_all()
+        np.testing.assert_array_equal(decoded[12]["value"], -np.arange(10))
+        np.testing.assert_array_equal(decoded[11]["time_quality"] & np.uint64(0xFFFFFFFFFFFF), np.arange(10) * 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
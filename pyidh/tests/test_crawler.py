@@ -0,0 +1,125 @@
+import tempfile
+import threading
+import unittest
+from pyidh import IDH_NODETYPE, IDH_DATATYPE
+from pyidh.browse import BrowsePager
+from pyidh.crawler import AddressSpaceCache, BrowseCrawler, ROOT
+
+
+def item(name, has_children):
+    return {
+        'namespace_index': 2,
+        'node_name': name,
+        'display_name': name.rsplit('.', 1)[-1],
+        'description': '',
+        'node_type': IDH_NODETYPE.IDH_NODETYPE_OBJECT if has_children else IDH_NODETYPE.IDH_NODETYPE_VARIABLE,
+        'data_type': IDH_DATATYPE.IDH_DATATYPE_REAL,
+        'is_readable': True,
+        'is_writable': False,
+        'has_children': has_children,
+    }
+
+
+class FakeSource:
+    """Two folders per object, three variables per leaf folder, three levels"""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.extra = {}
+
+    def _children(self, parent, level):
+        if level < 2:
+            children = [item(f"{parent}.F{i}", True) for i in range(2)]
+        else:
+            children = [item(f"{parent}.V{i}", False) for i in range(3)]
+        return children + self.extra.get(parent, [])
+
+    def _fill(self, items_array, capacity, children):
+        for i, child in enumerate(children[:capacity]):
+            item = items_array[i]
+            item.namespace_index = child['namespace_index']
+            item.node_name = child['node_name'].encode('utf-8')
+            item.display_name = child['display_name'].encode('utf-8')
+            item.node_type = child['node_type'].value
+            item.data_type = child['data_type'].value
+            item.is_readable = child['is_readable']
+            item.has_children = child['has_children']
+        return 0, min(capacity, len(children))
+
+    def browse_root_into(self, source, items_array, capacity):
+        with self.lock:
+            self.calls.append(None)
+        return self._fill(items_array, capacity, self._children("Root", 0))
+
+    def browse_into(self, source, items_array, capacity, namespace_index=0, node_name=None):
+        with self.lock:
+            self.calls.append(node_name)
+        return self._fill(items_array, capacity, self._children(node_name, node_name.count('.')))
+
+    def iter_browse(self, source, parent_namespace_index=0, parent_node_name=None, max_items=1 << 16):
+        return BrowsePager(self, source, parent_namespace_index, parent_node_name, max_items=max_items)
+
+    def iter_browse_root(self, source, max_items=1 << 16):
+        return BrowsePager(self, source, root=True, max_items=max_items)
+
+
+class TestBrowseCrawler(unittest.TestCase):
+    def test_crawl_depth_and_filter(self):
+        fake = FakeSource()
+        space = BrowseCrawler(fake, 1, "opc.tcp://fake", max_workers=4).crawl()
+        # 2 + 4 folders, 4 * 3 variables
+        self.assertEqual(len(space), 18)
+        self.assertEqual(len(fake.calls), 7)
+        self.assertEqual(len(space.tags()), 12)
+        self.assertEqual(space.nodes[(2, "Root.F0.F1.V2")]["depth"], 2)
+
+        fake = FakeSource()
+        space = BrowseCrawler(fake, 1, "opc.tcp://fake", max_depth=0).crawl()
+        self.assertEqual(len(space), 2)
+
+        space = BrowseCrawler(FakeSource(), 1, "opc.tcp://fake",
+                              node_types=[IDH_NODETYPE.IDH_NODETYPE_OBJECT]).crawl()
+        self.assertEqual(sum(1 for _ in space.walk()), 6)
+        self.assertEqual(space.tags(), [])
+
+    def test_cache_and_refresh(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fake = FakeSource()
+            crawler = BrowseCrawler(fake, 1, "opc.tcp://fake", cache=tmp)
+            space = crawler.crawl()
+            fake.calls.clear()
+            cached = crawler.crawl()
+            self.assertEqual(fake.calls, [])
+            self.assertEqual(cached.nodes, space.nodes)
+            self.assertEqual(cached.children, space.children)
+            self.assertIsNone(AddressSpaceCache(tmp).load("opc.tcp://other"))
+            # a corrupt or truncated file is a miss
+            cache = AddressSpaceCache(tmp)
+            for content in (b"not a zip file", b""):
+                with open(cache.path("opc.tcp://corrupt"), "wb") as f:
+                    f.write(content)
+                self.assertIsNone(cache.load("opc.tcp://corrupt"))
+
+            # a new folder appears under one container: only it is crawled
+            fake.extra["Root.F1"] = [item("Root.F1.New", True)]
+            crawler.refresh(cached, subtrees=[(2, "Root.F1")])
+            self.assertIn((2, "Root.F1.New.V0"), cached.nodes)
+            self.assertNotIn(None, fake.calls)
+            self.assertNotIn("Root.F0", fake.calls)
+
+            fake.extra.clear()
+            fake.calls.clear()
+            crawler.refresh(cached, max_age=0)
+            self.assertNotIn((2, "Root.F1.New"), cached.nodes)
+            self.assertNotIn((2, "Root.F1.New.V0"), cached.nodes)
+            self.assertEqual(len(cached), 18)
+            self.assertEqual(AddressSpaceCache(tmp).load("opc.tcp://fake").nodes, cached.nodes)
+
+            fake.calls.clear()
+            crawler.refresh(cached, subtrees=[ROOT])
+            self.assertEqual(len(fake.calls), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+from pyidh import empty_values
+from pyidh.decode import make_time_quality
+from pyidh.deadband import DeadbandFilter
+
+
+def snapshot(values, qualities=0xC0, timestamp_ms=820000000000):
+    buf, view = empty_values(len(values))
+    view["value"] = values
+    view["time_quality"] = make_time_quality(qualities, timestamp_ms)
+    return buf
+
+
+class TestDeadbandFilter(unittest.TestCase):
+    def test_first_update_emits_all(self):
+        f = DeadbandFilter([11, 12, 13])
+        changes = f.update(snapshot([1.0, 2.0, 3.0]))
+        np.testing.assert_array_equal(changes.handles, [11, 12, 13])
+        self.assertEqual(len(f.update(snapshot([1.0, 2.0, 3.0])).indices), 0)
+
+    def test_absolute_and_percent(self):
+        f = DeadbandFilter([1, 2], absolute=0.5)
+        f.update(snapshot([10.0, 10.0]))
+        np.testing.assert_array_equal(f.update(snapshot([10.4, 10.6])).indices, [1])
+        # compared against the last *emitted* value, not the last seen one
+        np.testing.assert_array_equal(f.update(snapshot([10.6, 10.6])).indices, [0])
+
+        f = DeadbandFilter([1, 2], absolute=np.inf, percent=[1.0, 10.0])
+        f.update(snapshot([100.0, 100.0]))
+        changes = f.update(snapshot([102.0, 105.0]))
+        np.testing.assert_array_equal(changes.indices, [0])
+        np.testing.assert_array_equal(changes.values, [102.0])
+
+    def test_percent_alone(self):
+        f = DeadbandFilter([1, 2], percent=10)
+        f.update(snapshot([100.0, 100.0]))
+        np.testing.assert_array_equal(f.update(snapshot([100.5, 111.0])).indices, [1])
+        # both deadbands set: either one emits
+        f = DeadbandFilter([1, 2], absolute=1.0, percent=10)
+        f.update(snapshot([100.0, 100.0]))
+        np.testing.assert_array_equal(f.update(snapshot([100.5, 102.0])).indices, [1])
+
+    def test_quality_nan_and_heartbeat(self):
+        f = DeadbandFilter([1, 2, 3], heartbeat_ms=1000)
+        f.update(snapshot([1.0, np.nan, 3.0]), now_ms=0)
+        changes = f.update(snapshot([1.0, np.nan, 3.0], [0x80, 0xC0, 0xC0]), now_ms=500)
+        np.testing.assert_array_equal(changes.indices, [0])
+        self.assertEqual(changes.time_quality[0] >> 48, 0x80)
+        self.assertEqual(len(f.update(snapshot([1.0, np.nan, 3.0], [0x80, 0xC0, 0xC0]), now_ms=999).indices), 0)
+        np.testing.assert_array_equal(
+            f.update(snapshot([1.0, np.nan, 3.0], [0x80, 0xC0, 0xC0]), now_ms=1000).indices, [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from pyidh import (
+    IDH_QUALITY,
+    idh_real_t,
+    empty_values
+)
+from pyidh import decode
+
+
+class TestDecode(unittest.TestCase):
+    def setUp(self):
+        self.qualities = [0xC0, 0x49, 0x89, 0x01, 0xE0]
+        self.values, self.view = empty_values(len(self.qualities))
+        for i, q in enumerate(self.qualities):
+            self.values[i].time_quality = idh_real_t.make_time_quality(q, 820000000000 + i * 1000)
+
+    def test_timestamps(self):
+        expected = [v.get_timestamp_desc().replace(" ", "T") for v in self.values]
+        self.assertEqual([str(t) for t in decode.timestamps_datetime64(self.view)], expected)
+        self.assertEqual(decode.timestamps_epoch_ms(self.values)[0], 820000000000 + decode.IDH_EPOCH_2000_MS)
+
+    def test_masks(self):
+        np.testing.assert_array_equal(decode.good_mask(self.view), [True, False, False, False, True])
+        np.testing.assert_array_equal(decode.uncertain_mask(self.view), [False, True, False, False, False])
+        np.testing.assert_array_equal(decode.bad_mask(self.view), [False, False, True, False, False])
+        np.testing.assert_array_equal(decode.quality_class(self.view), [3, 1, 2, 0, 3])
+
+    def test_tables(self):
+        for q in range(256):
+            self.assertEqual(decode.QUALITY_HIGH_TABLE[q], q & IDH_QUALITY.IDH_HIGH_MASK.value)
+            self.assertTrue(decode.QUALITY_DESCRIPTIONS[q].startswith(idh_real_t.get_high_quality_description(q)))
+        self.assertEqual(decode.QUALITY_DESCRIPTIONS[0x89], "Bad (INVALID_TIMEOUT)")
+
+    def test_make_time_quality(self):
+        np.testing.assert_array_equal(
+            decode.make_time_quality(self.qualities, decode.timestamps_ms(self.view)),
+            self.view["time_quality"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from pyidh import (
+    IDHLibrary,
+    IDH_DATATYPE,
+    IDH_ERRCODE,
+    IDH_RTSOURCE,
+    GroupReader,
+    GroupWriter,
+    empty_values
+)
+
+
+class TestGroupIO(unittest.TestCase):
+    def setUp(self):
+        self.idh = IDHLibrary()
+        self.source = self.idh.create_source(
+            source_type=IDH_RTSOURCE.IDH_RTSOURCE_UA.value,
+            source_schema="opc.tcp://192.168.200.105:48010/",
+            sample_timespan_msec=1000,
+            source_flag=0
+        )
+        self.group = self.idh.create_group(self.source, "TestGroupIO")
+        tags = [
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Demo.Static.Scalar.Double"},
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Demo.Static.Scalar.Float"},
+        ]
+        _, self.handles = self.idh.subscribe_group(self.group, tags)
+
+    def tearDown(self):
+        self.idh.unsubscribe_group(self.group, self.handles)
+        self.idh.destroy_group(self.group)
+        self.idh.destroy_source(self.source)
+        self.idh.destroy()
+
+    def test_reader_reuses_buffers(self):
+        reader = GroupReader(self.idh, self.group, self.handles)
+        result, first = reader.read()
+        self.assertGreaterEqual(result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+        _, second = reader.read()
+        _, third = reader.read()
+        self.assertIsNot(first, second)
+        self.assertIs(first, third)
+
+    def test_read_into(self):
+        reader = GroupReader(self.idh, self.group, self.handles, double_buffer=False)
+        values, view = empty_values(len(self.handles))
+        self.assertGreaterEqual(reader.read_into(values), IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+        _, expected = self.idh.read_group_values(self.group, self.handles, as_array=True)
+        np.testing.assert_array_equal(view["value"], expected["value"])
+        with self.assertRaises(ValueError):
+            reader.read_into(empty_values(1)[1])
+
+    def test_writer(self):
+        writer = GroupWriter(self.idh, self.group, self.handles)
+        result, results = writer.write([654.321, 210.987])
+        self.assertGreaterEqual(result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+        self.assertIs(writer.write(np.array([1.0, 2.0]))[1], results)
+        with self.assertRaises(ValueError):
+            writer.write([1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from pyidh import (
+    IDHLibrary,
+    IDH_DATATYPE,
+    IDH_RTSOURCE,
+    GroupReader,
+    empty_values
+)
+from pyidh.history import RingHistory
+
+
+def snapshot(values):
+    buf, view = empty_values(len(values))
+    view["value"] = values
+    return buf
+
+
+class TestRingHistory(unittest.TestCase):
+    def test_wraparound_and_queries(self):
+        history = RingHistory([10, 20], capacity=3)
+        self.assertIsNone(history.latest())
+        for i in range(5):
+            history.append(snapshot([i, i * 10]), timestamp_ms=1000 * i)
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.latest(20)["value"], 40)
+        times, records = history.last(10)
+        np.testing.assert_array_equal(times, [2000, 3000, 4000])
+        np.testing.assert_array_equal(records["value"], [[2, 20], [3, 30], [4, 40]])
+        times, records = history.window(1.5, now_ms=4000, handles=[20])
+        np.testing.assert_array_equal(times, [3000, 4000])
+        np.testing.assert_array_equal(records["value"], [[30], [40]])
+        self.assertEqual(history.nbytes, 3 * 2 * 16 + 3 * 8)
+
+    def test_out_of_order_timestamps_are_clamped(self):
+        history = RingHistory([10], capacity=4)
+        for i, stamp in enumerate((1000, 3000, 2000, 4000)):
+            history.append(snapshot([i]), timestamp_ms=stamp)
+        times, records = history.last(4)
+        np.testing.assert_array_equal(times, [1000, 3000, 3000, 4000])
+        times, records = history.window(1.5, now_ms=4000)
+        np.testing.assert_array_equal(records["value"], [[1], [2], [3]])
+
+    def test_failed_read_keeps_oldest_row(self):
+        class FailingReader:
+            def read_into(self, out):
+                out["value"] = -1.0
+                return -3
+
+        history = RingHistory([10], capacity=2)
+        history.append(snapshot([1.0]), timestamp_ms=1000)
+        history.append(snapshot([2.0]), timestamp_ms=2000)
+        self.assertEqual(history.read_from(FailingReader()), -3)
+        times, records = history.last(2)
+        np.testing.assert_array_equal(times, [1000, 2000])
+        np.testing.assert_array_equal(records["value"], [[1.0], [2.0]])
+
+    def test_read_from_group(self):
+        idh = IDHLibrary()
+        source = idh.create_source(IDH_RTSOURCE.IDH_RTSOURCE_UA.value, "opc.tcp://192.168.200.105:48010/", 1000, 0)
+        group = idh.create_group(source, "TestHistory")
+        tags = [{"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Demo.Static.Scalar.Double"}]
+        subscription = idh.subscribe_group(group, tags)
+        history = RingHistory.from_subscription(subscription, capacity=4)
+        reader = GroupReader(idh, group, subscription[1])
+        for _ in range(6):
+            self.assertGreaterEqual(history.read_from(reader), 0)
+        self.assertEqual(len(history), 4)
+        _, expected = idh.read_group_values(group, subscription[1], as_array=True)
+        self.assertEqual(history.latest()["time_quality"][0] >> 48, expected["time_quality"][0] >> 48)
+        idh.destroy_group(group)
+        idh.destroy_source(source)
+        idh.destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from pyidh import (
+    IDHLibrary,
+    IDH_DATATYPE,
+    IDH_RTSOURCE,
+    IDHMetrics,
+    InstrumentedLib,
+    LatencyHistogram,
+    instrument,
+    uninstrument
+)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_precision(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 10001):
+            histogram.record(value * 1000)
+        stats = histogram.to_dict()
+        self.assertEqual((stats["count"], stats["min"], stats["max"]), (10000, 1000, 10000000))
+        for q in (50, 90, 99):
+            exact = q * 100000
+            self.assertLessEqual(abs(histogram.percentile(q) - exact), exact / 16)
+        self.assertEqual(histogram.cumulative([959, 1023, 10 ** 10]), [0, 1, 10000])
+
+
+class FakeLib:
+    def idh_source_readvalues(self, source, values, tags, size):
+        return -3 if source == 0 else 0
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_counts_errors_and_items(self):
+        lib = InstrumentedLib(FakeLib())
+        lib.idh_source_readvalues(7, None, None, 10)
+        lib.idh_source_readvalues(7, None, None, 5)
+        lib.idh_source_readvalues(0, None, None, 1)
+        snapshot = lib.metrics.snapshot()
+        read = snapshot["functions"]["idh_source_readvalues"]
+        self.assertEqual(read["calls"], 3)
+        self.assertEqual(read["errors"], {-3: 1})
+        self.assertEqual(read["latency_ns"]["count"], 3)
+        self.assertEqual(snapshot["items"]["source"], {7: {"idh_source_readvalues": 15},
+                                                       0: {"idh_source_readvalues": 1}})
+        text = lib.metrics.to_prometheus()
+        self.assertIn('idh_calls_total{function="idh_source_readvalues"} 3\n', text)
+        self.assertIn('idh_call_errors_total{function="idh_source_readvalues",code="-3"} 1\n', text)
+        self.assertIn('idh_call_latency_seconds_bucket{function="idh_source_readvalues",le="+Inf"} 3\n', text)
+        self.assertIn('idh_items_total{kind="source",handle="7",function="idh_source_readvalues"} 15\n', text)
+
+    def test_instrument_library(self):
+        idh = IDHLibrary()
+        metrics = instrument(idh)
+        self.assertIs(instrument(idh), metrics)
+        source = idh.create_source(IDH_RTSOURCE.IDH_RTSOURCE_UA.value, "opc.tcp://192.168.200.105:48010/", 1000, 0)
+        tags = [{"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Demo.Static.Scalar.Double"}]
+        idh.read_values(source, tags)
+        group = idh.create_group(source, "TestMetrics")
+        _, handles = idh.subscribe_group(group, tags)
+        idh.read_group_values(group, handles)
+        list(idh.iter_browse_root(source))
+        idh.unsubscribe_group(group, handles)
+        idh.destroy_group(group)
+        uninstrument(idh)
+        idh.read_values(source, tags)
+        idh.destroy_source(source)
+        idh.destroy()
+
+        functions = metrics.snapshot()["functions"]
+        for name in ("idh_source_create", "idh_source_readvalues", "idh_group_subscribe", "idh_group_readvalues",
+                     "idh_source_browse_root"):
+            self.assertIn(name, functions)
+        self.assertEqual(functions["idh_source_readvalues"]["calls"], 1)
+        self.assertNotIn("idh_source_destroy", functions)
+        items = metrics.snapshot()["items"]
+        self.assertEqual(items["group"][group]["idh_group_readvalues"], 1)
+        self.assertIsInstance(metrics, IDHMetrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from pyidh import (
+    IDHLibrary,
+    IDH_DATATYPE,
+    IDH_ERRCODE,
+    IDH_RTSOURCE,
+    MultiSourcePoller
+)
+from pyidh.pyidh import IDH_INVALID_HANDLE
+
+
+class FailingIDH:
+    """Fake IDHLibrary failing source or group creation"""
+
+    def __init__(self, fail_source):
+        self.fail_source = fail_source
+        self.destroyed = []
+
+    def create_source(self, source_type, source_schema, sample_timespan_msec, source_flag):
+        return IDH_INVALID_HANDLE.value if self.fail_source else 7
+
+    def create_group(self, source, name):
+        return IDH_INVALID_HANDLE.value
+
+    def destroy_source(self, source):
+        self.destroyed.append(source)
+
+
+class TestMultiSourcePoller(unittest.TestCase):
+    def setUp(self):
+        self.idh = IDHLibrary()
+        self.tags = [
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Demo.Static.Scalar.Double"},
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Demo.Static.Scalar.Float"},
+        ]
+
+    def tearDown(self):
+        self.idh.destroy()
+
+    def test_poll(self):
+        with MultiSourcePoller(self.idh, max_workers=4) as poller:
+            for name in ("ua1", "ua2"):
+                result, handles = poller.add_source(
+                    name, IDH_RTSOURCE.IDH_RTSOURCE_UA.value, "opc.tcp://192.168.200.105:48010/", 1000, 0, self.tags)
+                self.assertEqual(len(handles), len(self.tags))
+            snapshot = poller.poll(as_array=True)
+            self.assertEqual(list(snapshot.results), ["ua1", "ua2"])
+            for r in snapshot.results.values():
+                self.assertIsNone(r.error)
+                self.assertGreaterEqual(r.result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+                self.assertEqual(len(r.values), len(self.tags))
+                self.assertGreaterEqual(r.latency, 0)
+            poller.remove("ua1")
+            self.assertEqual(poller.names, ["ua2"])
+
+    def test_failed_create(self):
+        for fail_source in (True, False):
+            idh = FailingIDH(fail_source)
+            with MultiSourcePoller(idh, max_workers=1) as poller:
+                with self.assertRaises(RuntimeError):
+                    poller.add_source("ua", IDH_RTSOURCE.IDH_RTSOURCE_UA.value, "opc.tcp://down:4840/", 1000, 0,
+                                      self.tags)
+                self.assertEqual(poller.names, [])
+            self.assertEqual(idh.destroyed, [] if fail_source else [7])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import tracemalloc
+import unittest
+from pyidh import IDHLibrary, IDH_DATATYPE, IDH_RTSOURCE, CallProfiler, TagSet
+
+
+class TestCallProfiler(unittest.TestCase):
+    def setUp(self):
+        self.idh = IDHLibrary()
+        self.source = self.idh.create_source(IDH_RTSOURCE.IDH_RTSOURCE_UA.value, "opc.tcp://192.168.200.105:48010/", 1000, 0)
+        self.tags = TagSet.from_names([f"Demo.Static.Scalar.D{i}" for i in range(100)], 3,
+                                      IDH_DATATYPE.IDH_DATATYPE_REAL.value)
+
+    def tearDown(self):
+        self.idh.destroy_source(self.source)
+        self.idh.destroy()
+
+    def test_phases_and_allocations(self):
+        profiler = CallProfiler(sample_every=5)
+        with profiler.attached(self.idh):
+            for _ in range(20):
+                result, values = self.idh.read_values(self.source, self.tags, as_array=True)
+                self.assertEqual(len(values), 100)
+            group = self.idh.create_group(self.source, "TestProfiling")
+            result, handles = self.idh.subscribe_group(group, list(self.tags))
+            self.assertEqual(len(handles), 100)
+            self.idh.read_group_values(group, handles)
+            self.idh.write_group_values(group, handles[:10], range(10))
+        self.assertIsNone(self.idh._phase_hook)
+        self.idh.read_values(self.source, self.tags)
+
+        summary = profiler.summary()
+        read = summary["read_values"]
+        self.assertEqual((read["calls"], read["items"], read["sampled_calls"]), (20, 2000, 4))
+        self.assertGreater(read["phases"]["native"]["total_ns"], 0)
+        self.assertAlmostEqual(sum(p["share"] for p in read["phases"].values()), 1.0)
+        # the values buffer of every sampled call
+        self.assertGreaterEqual(read["bytes_per_call"], 100 * 16)
+        self.assertEqual(summary["subscribe_group"]["calls"], 1)
+        self.assertIn("read_group_values", profiler.report())
+        self.assertEqual(summary["write_group_values"]["items"], 10)
+
+        self.idh.unsubscribe_group(group, handles)
+        self.idh.destroy_group(group)
+
+    def test_failed_sampled_call_stops_tracing(self):
+        profiler = CallProfiler(sample_every=1)
+        with profiler.attached(self.idh):
+            with self.assertRaises(KeyError):
+                self.idh.read_values(self.source, [{"tag_name": "Demo.Static.Scalar.D0"}])
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(profiler.summary()["read_values"]["sampled_calls"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyidh import empty_values
+from pyidh.recorder import RECORD_DTYPE, HEADER_DTYPE, Recorder, RecordReader
+
+
+class TestRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_segmented_round_trip(self):
+        values, view = empty_values(6)
+        view["value"] = np.arange(6) * 1.5
+        view["time_quality"] = np.arange(6, dtype=np.uint64) | np.uint64(0xC0 << 48)
+        with Recorder(self.directory, segment_records=4) as recorder:
+            recorder.append(values, handles=np.arange(100, 106), tag_ids=np.arange(6))
+            recorder.append(view[:1], handles=100, tag_ids=0)
+            self.assertEqual(recorder.total, 7)
+
+        reader = RecordReader(self.directory)
+        self.assertEqual([len(s) for s in reader], [4, 3])
+        self.assertEqual(reader.count, 7)
+        records = reader.read_all()
+        self.assertEqual(records.dtype, RECORD_DTYPE)
+        np.testing.assert_array_equal(records["value"][:6], view["value"])
+        np.testing.assert_array_equal(records["time_quality"][:6], view["time_quality"])
+        np.testing.assert_array_equal(records["handle"], [100, 101, 102, 103, 104, 105, 100])
+        sizes = sorted(os.path.getsize(p) for p in reader.paths)
+        self.assertEqual(sizes, [HEADER_DTYPE.itemsize + 3 * 32, HEADER_DTYPE.itemsize + 4 * 32])
+
+    def test_new_run_starts_new_segment(self):
+        records = np.zeros(2, dtype=RECORD_DTYPE)
+        with Recorder(self.directory) as recorder:
+            recorder.append_records(records)
+        with Recorder(self.directory) as recorder:
+            self.assertEqual(recorder.segment, 1)
+            recorder.append_records(records)
+        self.assertEqual(RecordReader(self.directory).count, 4)
+
+    def test_reader_sees_published_records(self):
+        recorder = Recorder(self.directory, segment_records=16)
+        recorder.append_records(np.zeros(3, dtype=RECORD_DTYPE))
+        recorder.flush()
+        self.assertEqual(len(RecordReader(self.directory).segment(0)), 3)
+        recorder.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
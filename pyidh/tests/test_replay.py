@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pyidh import (
+    IDHLibrary,
+    IDH_DATATYPE,
+    IDH_ERRCODE,
+    IDH_RTSOURCE,
+    ReplayLib,
+    TagSet,
+    capture,
+    get_simulator,
+    instrument,
+    read_capture
+)
+
+UA = IDH_RTSOURCE.IDH_RTSOURCE_UA.value
+TAGS = [{"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 2, "tag_name": f"plant.F0.T{i}"}
+        for i in range(20)]
+
+
+def session(idh, reads=3):
+    """Calls of a short polling session and everything they returned"""
+    seen = []
+    source = idh.create_source(UA, "sim://plant?tags=100&branching=20&latency=0.01", 1000, 0)
+    result, values = idh.read_values(source, TAGS, as_array=True)
+    seen.append((result, values.tobytes()))
+    seen.append(idh.write_values(source, TAGS[:5], [1.0, 2.0, 3.0, 4.0, 5.0]))
+    group = idh.create_group(source, "replay")
+    result, handles = idh.subscribe_group(group, TAGS)
+    seen.append((source, group, result, handles))
+    for _ in range(reads):
+        result, values = idh.read_group_values(group, handles, as_array=True)
+        seen.append((result, values.tobytes()))
+    seen.append(idh.browse_source(source, 100, 2, "plant.F0"))
+    seen.append(idh.browse_source_root(source, 10))
+    idh.unsubscribe_group(group, handles)
+    idh.destroy_group(group)
+    idh.destroy_source(source)
+    return seen
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "session.idhcap")
+        self.idh = IDHLibrary()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(self.idh.destroy)
+
+    def test_capture_and_replay(self):
+        with capture(self.idh, self.path) as lib:
+            recorded = session(self.idh)
+        self.assertEqual(lib.calls, 13)
+        self.assertNotIsInstance(self.idh._lib, type(lib))
+        instance, records = read_capture(self.path)
+        self.assertEqual(instance, self.idh.handle)
+        self.assertEqual([r.function for r in records[:3]],
+                         ["idh_source_create", "idh_source_readvalues", "idh_source_writevalues"])
+        read = records[1]
+        self.assertEqual(read.args[2][2], [t["tag_name"] for t in TAGS])
+        self.assertGreaterEqual(read.latency, 0.01)
+        # the subscribed tags are stored once, with the first read
+        self.assertIs(records[4].args[2], read.args[2])
+
+        replay = ReplayLib(self.path, time_scale=0)
+        idh = IDHLibrary(lib=replay)
+        self.assertEqual(idh.handle, instance)
+        started = time.perf_counter()
+        self.assertEqual(session(idh), recorded)
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual((replay.replayed, replay.missing), (13, 0))
+
+    def test_scaled_timing(self):
+        with capture(self.idh, self.path):
+            session(self.idh, reads=1)
+        _, records = read_capture(self.path)
+        recorded = sum(r.latency for r in records)
+        timings = {}
+        for scale in (1.0, 0.25):
+            idh = IDHLibrary(lib=ReplayLib(self.path, time_scale=scale))
+            started = time.perf_counter()
+            session(idh, reads=1)
+            timings[scale] = time.perf_counter() - started
+        self.assertGreaterEqual(timings[1.0], recorded * 0.95)
+        self.assertGreaterEqual(timings[0.25], recorded * 0.25 * 0.95)
+        self.assertLess(timings[0.25], timings[1.0] * 0.6)
+
+    def test_error_codes_and_exhaustion(self):
+        source = self.idh.create_source(UA, "sim://plant?tags=100&branching=20", 1000, 0)
+        tags = TagSet(TAGS)
+        get_simulator(self.idh).inject(source, IDH_ERRCODE.IDH_ERROR_TIMEOUT.value)
+        with capture(self.idh, self.path):
+            failed, _ = self.idh.read_values(source, tags)
+            result, values = self.idh.read_values(source, tags)
+        self.assertEqual(failed, IDH_ERRCODE.IDH_ERROR_TIMEOUT.value)
+
+        idh = IDHLibrary(lib=ReplayLib(self.path, time_scale=0))
+        self.assertEqual(idh.read_values(source, tags)[0], failed)
+        self.assertEqual(bytes(idh.read_values(source, tags)[1]), bytes(values))
+        # recorded reads start over
+        self.assertEqual(idh.read_values(source, tags)[0], failed)
+        self.assertEqual(idh.create_group(source, "unrecorded"), IDH_ERRCODE.IDH_ERRCODE_FAILED.value)
+
+        strict = IDHLibrary(lib=ReplayLib(self.path, time_scale=0, strict=True))
+        strict.read_values(source, tags)
+        strict.read_values(source, tags)
+        with self.assertRaises(RuntimeError):
+            strict.read_values(source, tags)
+
+    def test_capture_under_instrumentation_and_flush(self):
+        metrics = instrument(self.idh)
+        handle = capture(self.idh, self.path, flush_interval=0)
+        source = self.idh.create_source(UA, "sim://plant?tags=100&branching=20", 1000, 0)
+        self.idh.read_values(source, TAGS)
+        # readable up to the last flush before close()
+        _, records = read_capture(self.path)
+        self.assertEqual([r.function for r in records], ["idh_source_create", "idh_source_readvalues"])
+        handle.close()
+        self.idh.read_values(source, TAGS)
+        self.assertEqual(len(read_capture(self.path)[1]), 2)
+        self.assertEqual(metrics.snapshot()["functions"]["idh_source_readvalues"]["calls"], 2)
+
+    def test_simulator_under_stacked_wrappers(self):
+        metrics = instrument(self.idh)
+        handle = capture(self.idh, self.path)
+        native = self.idh.create_source(UA, "opc.tcp://192.168.200.105:48010/", 1000, 0)
+        self.addCleanup(self.idh.destroy_source, native)
+        # both wrappers cached idh_source_create before the router is put under them
+        source = self.idh.create_source(UA, "sim://plant?tags=10", 1000, 0)
+        self.assertEqual(list(get_simulator(self.idh).sources), [source])
+        self.assertEqual(self.idh.read_values(source, TAGS[:1])[0], 0)
+        handle.close()
+        self.assertEqual(self.idh.read_values(source, TAGS[:1])[0], 0)
+        _, records = read_capture(self.path)
+        self.assertEqual([r.result for r in records if r.function == "idh_source_create"], [native, source])
+        self.assertEqual(metrics.snapshot()["functions"]["idh_source_readvalues"]["calls"], 2)
+        self.idh.destroy_source(source)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"IDHREC\x00\x01" + bytes(32))
+        with self.assertRaises(ValueError):
+            read_capture(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
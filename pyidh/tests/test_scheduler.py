@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+from pyidh import SampleScheduler
+
+
+class TestSampleScheduler(unittest.TestCase):
+    def test_grid_alignment(self):
+        records = []
+        with SampleScheduler() as scheduler:
+            scheduler.add_job("fast", lambda: (0, None), 20, callback=records.append)
+            time.sleep(0.25)
+        self.assertGreaterEqual(len(records), 8)
+        for prev, cur in zip(records, records[1:]):
+            self.assertAlmostEqual(cur.scheduled - prev.scheduled, 0.02, places=6)
+            self.assertGreaterEqual(cur.started, cur.scheduled)
+
+    def test_overrun_policies(self):
+        def slow():
+            time.sleep(0.05)
+            return 0, None
+
+        with SampleScheduler() as scheduler:
+            skip = scheduler.add_job("skip", slow, 20, tolerance_ms=15)
+            catchup = scheduler.add_job("catchup", slow, 20, overrun="catchup", max_backlog=100)
+            time.sleep(0.3)
+        self.assertGreater(skip.stats.skipped, 0)
+        self.assertEqual(skip.stats.late, 0)
+        self.assertEqual(catchup.stats.skipped, 0)
+        self.assertGreater(catchup.stats.late, 0)
+
+    def test_catchup_backlog_is_bounded(self):
+        def slow():
+            time.sleep(0.1)
+            return 0, None
+
+        with SampleScheduler() as scheduler:
+            job = scheduler.add_job("catchup", slow, 10, overrun="catchup", max_backlog=2)
+            time.sleep(0.25)
+            self.assertLessEqual(len(job.backlog), 2)
+        self.assertGreater(job.stats.skipped, 0)
+
+    def test_restart(self):
+        records = []
+        scheduler = SampleScheduler()
+        scheduler.add_job("fast", lambda: (0, None), 10, callback=records.append)
+        scheduler.start()
+        time.sleep(0.05)
+        scheduler.stop()
+        runs = len(records)
+        self.assertGreater(runs, 0)
+        time.sleep(0.05)
+        scheduler.start()
+        time.sleep(0.05)
+        scheduler.stop()
+        self.assertGreater(len(records), runs)
+        # no burst of the slots missed while stopped
+        self.assertLess(len(records), runs + 10)
+
+    def test_errors_are_counted(self):
+        done = threading.Event()
+
+        def failing():
+            done.set()
+            raise RuntimeError("read failed")
+
+        with SampleScheduler() as scheduler:
+            job = scheduler.add_job("failing", failing, 10, keep=2)
+            self.assertTrue(done.wait(1))
+            time.sleep(0.02)
+        self.assertGreater(job.stats.errors, 0)
+        self.assertIsInstance(job.history[0].error, RuntimeError)
+
+
+if __name__ == '__main__':
+    unittest.main()
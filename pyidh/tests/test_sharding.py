@@ -0,0 +1,109 @@
+import unittest
+import numpy as np
+from pyidh import (
+    IDHLibrary,
+    IDH_DATATYPE,
+    IDH_ERRCODE,
+    IDH_RTSOURCE,
+    ShardedGroup,
+    TagSet
+)
+from pyidh.pyidh import IDH_INVALID_HANDLE
+from pyidh.sharding import plan_shards
+
+
+class FailingGroups:
+    """Delegates to ``idh`` but fails create_group after ``groups`` calls
+    (and every subscribe_group if ``subscribe_error`` is set)"""
+
+    def __init__(self, idh, groups, subscribe_error=None):
+        self.idh = idh
+        self.groups = groups
+        self.subscribe_error = subscribe_error
+        self.created = []
+        self.destroyed = []
+
+    def create_group(self, source, name):
+        if len(self.created) == self.groups:
+            return IDH_INVALID_HANDLE.value
+        self.created.append(self.idh.create_group(source, name))
+        return self.created[-1]
+
+    def subscribe_group(self, group, tags):
+        if self.subscribe_error is not None:
+            raise self.subscribe_error
+        return self.idh.subscribe_group(group, tags)
+
+    def destroy_group(self, group):
+        self.destroyed.append(group)
+        self.idh.destroy_group(group)
+
+
+class TestPlanShards(unittest.TestCase):
+    def test_by_size_and_namespace(self):
+        shards = plan_shards([2] * 10, 4)
+        self.assertEqual([s.tolist() for s in shards], [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+        shards = plan_shards([2, 3, 2, 3, 2], 2, by_namespace=True)
+        self.assertEqual([s.tolist() for s in shards], [[0, 2], [4], [1, 3]])
+        with self.assertRaises(ValueError):
+            plan_shards([2], 0)
+
+
+class TestShardedGroup(unittest.TestCase):
+    def setUp(self):
+        self.idh = IDHLibrary()
+        self.source = self.idh.create_source(
+            source_type=IDH_RTSOURCE.IDH_RTSOURCE_UA.value,
+            source_schema="opc.tcp://192.168.200.105:48010/",
+            sample_timespan_msec=1000,
+            source_flag=0
+        )
+        names = ["Demo.Static.Scalar.Double", "Demo.Static.Scalar.Float"] * 5
+        self.tags = TagSet.from_columns(IDH_DATATYPE.IDH_DATATYPE_REAL.value, [3, 2] * 5, names)
+
+    def tearDown(self):
+        self.idh.destroy_source(self.source)
+        self.idh.destroy()
+
+    def check_read(self, group):
+        self.assertGreaterEqual(group.result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+        self.assertEqual(len(group.handles), 10)
+        result, values = group.read(as_array=True)
+        self.assertGreaterEqual(result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+        self.assertEqual(len(values), 10)
+        # every position holds the value of its own handle
+        _, reference = self.idh.read_group_values(group.shards[0].group, group.shards[0].handles_array, as_array=True)
+        first = group.shards[0].positions
+        np.testing.assert_array_equal(values["value"][first], reference["value"])
+        result, results = group.write(np.arange(10.0))
+        self.assertGreaterEqual(result, IDH_ERRCODE.IDH_ERRCODE_SUCCESS.value)
+        self.assertEqual(results.shape, (10,))
+
+    def test_contiguous_shards(self):
+        with ShardedGroup(self.idh, self.source, "Sharded", self.tags, shard_size=4) as group:
+            self.assertTrue(group.contiguous)
+            self.assertEqual(len(group.shards), 3)
+            self.check_read(group)
+
+    def test_failed_group_creation(self):
+        idh = FailingGroups(self.idh, 2)
+        with self.assertRaisesRegex(RuntimeError, "Sharded#2"):
+            ShardedGroup(idh, self.source, "Sharded", self.tags, shard_size=4)
+        self.assertEqual(idh.destroyed, idh.created)
+
+    def test_failed_subscription(self):
+        idh = FailingGroups(self.idh, None, subscribe_error=OSError("access violation"))
+        with self.assertRaises(OSError):
+            ShardedGroup(idh, self.source, "Sharded", self.tags, shard_size=4)
+        self.assertEqual(len(idh.created), 3)
+        self.assertEqual(idh.destroyed, idh.created)
+
+    def test_namespace_shards(self):
+        with ShardedGroup(self.idh, self.source, "Sharded", self.tags, shard_size=4, by_namespace=True) as group:
+            self.assertFalse(group.contiguous)
+            self.assertEqual([s.count for s in group.shards], [4, 1, 4, 1])
+            self.check_read(group)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import threading
+import time
+import unittest
+import numpy as np
+from pyidh import (
+    IDHLibrary,
+    IDH_DATATYPE,
+    IDH_ERRCODE,
+    IDH_NODETYPE,
+    IDH_RTSOURCE,
+    TagSet,
+    get_simulator,
+    instrument
+)
+from pyidh.arrays import get_quality_high as quality_high
+from pyidh.simulation import parse_schema
+
+UA = IDH_RTSOURCE.IDH_RTSOURCE_UA.value
+
+
+def sim_tags(indexes, name="plant", branching=100):
+    return [{"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 2,
+             "tag_name": f"{name}.F{i // branching}.T{i}"} for i in indexes]
+
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        self.idh = IDHLibrary()
+
+    def tearDown(self):
+        self.idh.destroy()
+
+    def create(self, query="", sample_timespan_msec=1000):
+        source = self.idh.create_source(UA, f"sim://plant?tags=1000&branching=100{query}", sample_timespan_msec, 0)
+        self.addCleanup(self.idh.destroy_source, source)
+        return source
+
+    def test_read_write_and_native_side_by_side(self):
+        source = self.create()
+        native = self.idh.create_source(UA, "opc.tcp://192.168.200.105:48010/", 1000, 0)
+        self.assertTrue(self.idh.is_source_valid(source))
+        result, values = self.idh.read_values(source, TagSet(sim_tags(range(10))), as_array=True)
+        self.assertEqual(result, 0)
+        self.assertTrue((quality_high(values) == 0xC0).all())
+        self.assertTrue((values["time_quality"] & 0xFFFFFFFFFFFF > 0).all())
+
+        result, codes = self.idh.write_values(source, sim_tags([3]), [42.5])
+        self.assertEqual((result, codes), (0, [0]))
+        _, values = self.idh.read_values(source, sim_tags([3, 4]) + sim_tags([5], name="other"))
+        self.assertEqual(values[0].value, 42.5)
+        self.assertEqual(values[2].get_quality(), 0x05)
+
+        # calls on native handles still reach libidh
+        self.assertEqual(self.idh.read_values(native, sim_tags([1]))[0], 0)
+        self.idh.destroy_source(native)
+
+    def test_groups(self):
+        source = self.create(sample_timespan_msec=500)
+        group = self.idh.create_group(source, "G")
+        result, handles = self.idh.subscribe_group(group, sim_tags([1, 2]) + sim_tags([5000]))
+        self.assertEqual(result, IDH_ERRCODE.IDH_ERRCODE_SUBSCRIBEFAILED.value)
+        self.assertEqual(handles[2], IDH_ERRCODE.IDH_ERRCODE_INVALIDTAG.value)
+        result, values = self.idh.read_group_values(group, handles[:2], as_array=True)
+        self.assertEqual(result, 0)
+        # subscribed values are sampled on the group's timespan
+        self.assertEqual(int(values["time_quality"][0] & 0xFFFFFFFFFFFF) % 500, 0)
+        result, codes = self.idh.write_group_values(group, handles[:2], [1.0, 2.0])
+        self.assertEqual((result, codes), (0, [0, 0]))
+        _, values = self.idh.read_group_values(group, handles[:2], as_array=True)
+        self.assertEqual(list(values["value"]), [1.0, 2.0])
+        self.idh.unsubscribe_group(group, handles)
+        self.idh.destroy_group(group)
+
+    def test_browse_address_space(self):
+        source = self.create()
+        root = list(self.idh.iter_browse_root(source))
+        self.assertEqual([item.node_name for item in root], ["plant"])
+        folders = [item.node_name for item in self.idh.iter_browse(source, 2, "plant", page_items=4)]
+        self.assertEqual(folders, [f"plant.F{i}" for i in range(10)])
+        result, items = self.idh.browse_source(source, 1000, 2, "plant.F9")
+        self.assertEqual(len(items), 100)
+        self.assertEqual(items[0]["node_name"], "plant.F9.T900")
+        self.assertEqual(items[0]["node_type"], IDH_NODETYPE.IDH_NODETYPE_VARIABLE)
+
+    def test_latency_errors_and_quality(self):
+        source = self.create("&latency=0.02&concurrency=1")
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self.idh.read_values, args=(source, sim_tags([1]))) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # one call at a time
+        self.assertGreaterEqual(time.perf_counter() - started, 0.06)
+
+        failing = self.create("&error_rate=1&errors=TIMEOUT,BADQUANLITY&seed=3")
+        codes = {self.idh.read_values(failing, sim_tags([1]))[0] for _ in range(20)}
+        self.assertEqual(codes, {IDH_ERRCODE.IDH_ERROR_TIMEOUT.value, IDH_ERRCODE.IDH_ERRCODE_BADQUANLITY.value})
+
+        limited = self.create("&max_items=5&bad_quality=1")
+        self.assertEqual(self.idh.read_values(limited, sim_tags(range(6)))[0], IDH_ERRCODE.IDH_ERROR_EXCDLEN.value)
+        _, values = self.idh.read_values(limited, sim_tags(range(5)), as_array=True)
+        self.assertTrue((quality_high(values) == 0x80).all())
+
+        simulator = get_simulator(self.idh)
+        simulator.inject(source, IDH_ERRCODE.IDH_ERRCODE_INVALIDSERVER.value)
+        self.assertEqual(self.idh.read_values(source, sim_tags([1]))[0], IDH_ERRCODE.IDH_ERRCODE_INVALIDSERVER.value)
+        simulator.set_valid(source, False)
+        self.assertFalse(self.idh.is_source_valid(source))
+
+    def test_schema_and_instrumentation(self):
+        self.assertEqual(parse_schema("sim://x?tags=5&errors=EXCDLEN")["error_codes"],
+                         [IDH_ERRCODE.IDH_ERROR_EXCDLEN.value])
+        with self.assertRaises(ValueError):
+            self.idh.create_source(UA, "sim://x?tag=5", 1000, 0)
+        for query in ("quality_period=0&bad_quality=0.5", "latency=-1", "concurrency=-1", "max_items=-1",
+                      "timeout=-0.5", "outage_every=-1", "outage_for=-1"):
+            with self.assertRaises(ValueError, msg=query):
+                parse_schema(f"sim://x?{query}")
+        metrics = instrument(self.idh)
+        source = self.create()
+        self.idh.read_values(source, sim_tags(range(4)))
+        self.assertEqual(metrics.snapshot()["items"]["source"][source]["idh_source_readvalues"], 4)
+
+    def test_values_are_deterministic(self):
+        source = self.create()
+        simulator = get_simulator(self.idh)
+        first = np.zeros(1000, dtype=[("value", "<f8"), ("time_quality", "<u8")])
+        second = first.copy()
+        simulator.source(source).values(np.arange(1000), 1.7e9, first)
+        simulator.source(source).values(np.arange(1000), 1.7e9, second)
+        self.assertTrue((first == second).all())
+        self.assertGreater(len(np.unique(first["value"])), 800)
+
+
+if __name__ == '__main__':
+    unittest.main()
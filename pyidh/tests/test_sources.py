@@ -0,0 +1,157 @@
+import threading
+import time
+import unittest
+from pyidh import IDH_RTSOURCE, SourceManager
+from pyidh.pyidh import IDH_INVALID_HANDLE
+
+
+class FakeServer:
+    """Fake IDHLibrary whose sources can be taken down"""
+
+    def __init__(self):
+        self.next_handle = 100
+        self.sources = {}
+        self.groups = {}
+        self.down = False
+        self.lock = threading.Lock()
+        # set: reads block until it is cleared
+        self.hold = None
+
+    def create_source(self, source_type, schema, sample_timespan_msec, flags):
+        with self.lock:
+            if self.down:
+                return IDH_INVALID_HANDLE.value
+            self.next_handle += 1
+            self.sources[self.next_handle] = True
+            return self.next_handle
+
+    def is_source_valid(self, source):
+        return self.sources.get(source, False) and not self.down
+
+    def destroy_source(self, source):
+        del self.sources[source]
+
+    def create_group(self, source, name):
+        with self.lock:
+            self.next_handle += 1
+            self.groups[self.next_handle] = source
+            return self.next_handle
+
+    def subscribe_group(self, group, tags):
+        return 0, [group * 1000 + i for i in range(len(tags))]
+
+    def unsubscribe_group(self, group, handles):
+        pass
+
+    def destroy_group(self, group):
+        del self.groups[group]
+
+    def read_group_values_into(self, group, handles_array, values, tags_size):
+        if self.hold is not None:
+            self.hold[0].set()
+            self.hold[1].wait()
+        assert group in self.groups
+        for i in range(tags_size):
+            values[i].value = handles_array[i]
+        return 0
+
+
+TAGS = [{"data_type": 1, "namespace_index": 2, "tag_name": "A"}, {"data_type": 1, "namespace_index": 2, "tag_name": "B"}]
+UA = IDH_RTSOURCE.IDH_RTSOURCE_UA
+
+
+class TestSourceManager(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.manager = SourceManager(self.server, check_interval=3600, backoff_initial=1.0, backoff_max=4.0)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def test_deduplicates_with_refcount(self):
+        first = self.manager.checkout(UA, "opc.tcp://a")
+        second = self.manager.checkout(UA.value, "opc.tcp://a")
+        other = self.manager.checkout(UA, "opc.tcp://a", flags=1)
+        self.assertEqual(first.source, second.source)
+        self.assertNotEqual(first.source, other.source)
+        self.assertEqual(len(self.server.sources), 2)
+        first.release()
+        first.release()
+        self.assertEqual(len(self.server.sources), 2)
+        second.release()
+        other.release()
+        self.assertEqual(self.server.sources, {})
+
+        start = time.perf_counter()
+        with self.manager.checkout(UA, "opc.tcp://warm"):
+            for _ in range(1000):
+                self.manager.checkout(UA, "opc.tcp://warm").release()
+        self.assertLess((time.perf_counter() - start) / 1000, 0.001)
+
+    def test_reconnect_with_backoff_recreates_groups(self):
+        with self.manager.checkout(UA, "opc.tcp://a") as lease:
+            group = lease.create_group("G", TAGS)
+            old_source, old_group = lease.source, group.group
+            _, values = group.read(as_array=True)
+            self.assertEqual(list(values["value"]), group.handles)
+
+            self.server.down = True
+            self.manager.check(now=0.0)
+            self.assertFalse(lease.healthy)
+            self.assertEqual(lease.source, old_source)
+            # first attempt after backoff_initial; the server is still down
+            self.manager.check(now=1.0)
+            self.assertIsNone(lease.source)
+            self.assertEqual(self.manager.stats()[lease.key]["reconnects"], 1)
+            with self.assertRaises(RuntimeError):
+                group.read()
+            # next attempt only after the doubled backoff
+            self.manager.check(now=2.0)
+            self.assertEqual(self.manager.stats()[lease.key]["reconnects"], 1)
+
+            self.server.down = False
+            self.manager.check(now=3.0)
+            self.assertEqual(self.manager.stats()[lease.key]["reconnects"], 2)
+            self.manager.check(now=3.5)
+            self.assertTrue(lease.healthy)
+            self.assertNotEqual(lease.source, old_source)
+            self.assertNotEqual(group.group, old_group)
+            self.assertEqual(group.generation, 2)
+            _, values = group.read(as_array=True)
+            self.assertEqual(list(values["value"]), group.handles)
+        self.assertEqual(self.server.sources, {})
+        self.assertEqual(self.server.groups, {})
+
+    def test_reconnect_waits_for_running_reads(self):
+        with self.manager.checkout(UA, "opc.tcp://a") as lease:
+            group = lease.create_group("G", TAGS)
+            old_group = group.group
+            started, release = self.server.hold = (threading.Event(), threading.Event())
+            results = []
+            reader = threading.Thread(target=lambda: results.append(group.read()[0]))
+            reader.start()
+            started.wait()
+            self.server.down = True
+            self.manager.check(now=0.0)
+            checker = threading.Thread(target=self.manager.check, kwargs={"now": 1.0})
+            checker.start()
+            time.sleep(0.05)
+            self.assertIn(old_group, self.server.groups)
+            release.set()
+            reader.join()
+            checker.join()
+            self.assertEqual(results, [0])
+            self.assertNotIn(old_group, self.server.groups)
+            self.server.hold = None
+
+    def test_failed_create(self):
+        self.server.down = True
+        with self.assertRaises(RuntimeError):
+            self.manager.checkout(UA, "opc.tcp://a")
+        self.assertEqual(self.manager.stats(), {})
+        self.server.down = False
+        self.manager.checkout(UA, "opc.tcp://a").release()
+
+
+if __name__ == '__main__':
+    unittest.main()
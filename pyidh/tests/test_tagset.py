@@ -0,0 +1,42 @@
+import io
+import unittest
+import numpy as np
+from pyidh import (
+    IDH_DATATYPE,
+    TagSet
+)
+
+
+class TestTagSet(unittest.TestCase):
+    def setUp(self):
+        self.tags = [
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 3, "tag_name": "Demo.Static.Scalar.Double"},
+            {"data_type": IDH_DATATYPE.IDH_DATATYPE_REAL.value, "namespace_index": 2, "tag_name": "温度.PV"},
+        ]
+
+    def test_from_dicts(self):
+        tagset = TagSet(self.tags)
+        self.assertEqual(len(tagset), 2)
+        self.assertEqual(list(tagset), self.tags)
+        for i, tag in enumerate(self.tags):
+            self.assertEqual(tagset.tag_array[i].tag_name, tag["tag_name"].encode("utf-8"))
+            self.assertEqual(tagset.tag_array[i].namespace_index, tag["namespace_index"])
+
+    def test_from_columns(self):
+        tagset = TagSet.from_columns(1, np.array([2, 3]), np.array(["A", "B"]))
+        self.assertEqual(tagset[1], {"data_type": 1, "namespace_index": 3, "tag_name": "B"})
+
+    def test_from_csv(self):
+        tagset = TagSet.from_csv(io.StringIO("tag_name,namespace_index,data_type\nDemo.Tag1,2,1\nDemo.Tag2,,\n"))
+        self.assertEqual(tagset.tag_names, ["Demo.Tag1", "Demo.Tag2"])
+        self.assertEqual(tagset.namespace_indexes, [2, 0])
+        self.assertEqual(tagset.data_types, [1, IDH_DATATYPE.IDH_DATATYPE_REAL.value])
+
+    def test_subset(self):
+        tagset = TagSet(self.tags)[::-1]
+        self.assertEqual(tagset.tag_names, ["温度.PV", "Demo.Static.Scalar.Double"])
+        self.assertEqual(tagset.tag_array[1].tag_name, b"Demo.Static.Scalar.Double")
+
+
+if __name__ == '__main__':
+    unittest.main()
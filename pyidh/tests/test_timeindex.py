@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyidh import empty_values
+from pyidh.decode import IDH_EPOCH_2000_MS, make_time_quality
+from pyidh.recorder import Recorder
+from pyidh.timeindex import INDEX_SUFFIX, HistoryIndex
+
+
+class TestHistoryIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        self.base_ms = 820000000000
+        values, view = empty_values(3)
+        self.recorder = Recorder(self.directory, segment_records=40)
+        for i in range(30):
+            view["value"] = [i, i + 100, i + 200]
+            view["time_quality"] = make_time_quality(0xC0, self.base_ms + i * 1000)
+            self.recorder.append(values, handles=[1, 2, 3])
+
+    def tearDown(self):
+        self.recorder.close()
+        self.tmp.cleanup()
+
+    def test_query_range(self):
+        index = HistoryIndex(self.directory, block_records=8)
+        records = index.query([2], self.base_ms + 10000, self.base_ms + 14000)
+        np.testing.assert_array_equal(records["value"], [110, 111, 112, 113, 114])
+        self.assertTrue(np.all(records["handle"] == 2))
+
+    def test_closed_segments_are_persisted(self):
+        index = HistoryIndex(self.directory, block_records=8)
+        self.assertEqual(index.build(), 3)
+        persisted = [p for p in os.listdir(self.directory) if p.endswith(INDEX_SUFFIX)]
+        # the last segment is still being recorded
+        self.assertEqual(len(persisted), 2)
+
+    def test_query_by_handle_with_datetime64(self):
+        index = HistoryIndex(self.directory, block_records=8)
+        start = np.datetime64(self.base_ms + IDH_EPOCH_2000_MS + 28000, "ms")
+        end = start + np.timedelta64(1, "h")
+        result = index.query_by_handle([1, 3, 4], start, end)
+        np.testing.assert_array_equal(result[1]["value"], [28, 29])
+        np.testing.assert_array_equal(result[3]["value"], [228, 229])
+        self.assertEqual(len(result[4]), 0)
+        self.assertEqual(len(index.query(None, 0, self.base_ms - 1)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+from pyidh import (
+    IDH_DATATYPE,
+    IDH_ERRCODE,
+    TagSet
+)
+from pyidh.tuning import BatchTuner, BatchedIO, probe_sizes
+
+EXCDLEN = IDH_ERRCODE.IDH_ERROR_EXCDLEN.value
+
+
+class LimitedServer:
+    """Fake IDHLibrary rejecting requests above ``limit`` tags"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.calls = []
+
+    def read_values_into(self, source, tag_array, values, tags_size):
+        self.calls.append(tags_size)
+        if tags_size > self.limit:
+            return EXCDLEN
+        for i in range(tags_size):
+            values[i].value = float(tag_array[i].tag_name[1:])
+        return 0
+
+    def write_values_from(self, source, tag_array, values_array, results, tags_size):
+        self.calls.append(tags_size)
+        if tags_size > self.limit:
+            return EXCDLEN
+        for i in range(tags_size):
+            results[i] = int(values_array[i])
+        return 0
+
+    def read_group_values_into(self, group, handles_array, values, tags_size):
+        self.calls.append(tags_size)
+        if tags_size > self.limit:
+            return EXCDLEN
+        for i in range(tags_size):
+            values[i].value = float(handles_array[i])
+        return 0
+
+
+class TestBatchTuner(unittest.TestCase):
+    def test_shrinks_on_size_errors_and_grows_back(self):
+        tuner = BatchTuner(initial_size=1000, min_size=10, probe_every=2, cooldown_calls=4)
+        self.assertTrue(tuner.record("s", 1000, 0.01, EXCDLEN))
+        self.assertEqual(tuner.size("s"), 500)
+        # a failing size is not retried during the cooldown
+        for _ in range(3):
+            tuner.record("s", tuner.size("s"), 0.01, 0)
+        self.assertLess(tuner.size("s"), 1000)
+        for _ in range(16):
+            tuner.record("s", tuner.size("s"), 0.001 * tuner.size("s") / 500, 0)
+        self.assertGreater(tuner.size("s"), 1000)
+        stats = tuner.stats("s")
+        self.assertEqual(stats["shrinks"], 1)
+        self.assertEqual(stats["errors"], 1)
+
+    def test_slow_calls_shrink(self):
+        tuner = BatchTuner(initial_size=1000, max_latency=0.5)
+        self.assertFalse(tuner.record("s", 1000, 1.0, 0))
+        self.assertEqual(tuner.size("s"), 500)
+
+    def test_probe(self):
+        tuner = BatchTuner(initial_size=16, min_size=16, max_size=4096)
+        self.assertEqual(probe_sizes(16, 4096), [16, 64, 256, 1024, 4096])
+        size = tuner.probe("s", lambda n: EXCDLEN if n > 300 else 0)
+        self.assertEqual(size, 256)
+
+
+class TestBatchedIO(unittest.TestCase):
+    def setUp(self):
+        self.server = LimitedServer(limit=300)
+        self.io = BatchedIO(self.server, BatchTuner(initial_size=1000, min_size=16))
+        self.tags = TagSet.from_names([f"T{i}" for i in range(2000)], 2, IDH_DATATYPE.IDH_DATATYPE_REAL.value)
+
+    def test_read_values_in_chunks(self):
+        result, values = self.io.read_values(1, self.tags, as_array=True)
+        self.assertEqual(result, 0)
+        np.testing.assert_array_equal(values["value"], np.arange(2000))
+        self.assertLessEqual(self.io.tuner.size(1), 300)
+        self.assertLessEqual(max(self.server.calls[-3:]), 300)
+
+    def test_write_and_group_values(self):
+        result, results = self.io.write_values(1, self.tags, np.arange(2000))
+        self.assertEqual(result, 0)
+        self.assertEqual(results, list(range(2000)))
+        result, values = self.io.read_group_values(7, list(range(100, 1100)), as_array=True, key=1)
+        self.assertEqual(result, 0)
+        np.testing.assert_array_equal(values["value"], np.arange(100, 1100))
+        self.assertNotIn(1000, self.server.calls[-4:])
+
+    def test_probe_read_values(self):
+        # the fastest size that the server accepts
+        self.assertIn(self.io.probe_read_values(1, self.tags), (16, 64, 256))
+        self.assertEqual(self.server.calls[-1], 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()